@@ -1,9 +1,19 @@
 """Chat endpoints for question/answer workflow."""
 
-from fastapi import APIRouter, HTTPException, status
+from __future__ import annotations
+
+import json
+import logging
+import math
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import anyio
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
 
 from .. import schemas
 from ...core.config import settings
+from ...core.metrics import CHAT_QUESTIONS, stage
 from ...core.rate_limiter import get_session_rate_limiter
 from ...services import (
     conversation_service,
@@ -11,67 +21,133 @@ from ...services import (
     question_filter,
     visitor_service,
 )
+from ...services.llm_transport import LLM_UNAVAILABLE_MESSAGE, LLMUnavailableError
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+RATE_LIMITED_MESSAGE = "세션당 허용된 질문 수를 초과했습니다. 새 세션으로 다시 시도해 주세요."
+# Same body as the non-streaming endpoint's 500 on an unexpected error.
+INTERNAL_ERROR_MESSAGE = "Internal Server Error"
 
-@router.post("", response_model=schemas.ChatResponse)
-def ask_question(payload: schemas.ChatRequest):
-    visitor = visitor_service.get_visitor_by_session(payload.session_id)
+
+async def _screen_question(
+    payload: schemas.ChatRequest,
+) -> Tuple[Dict[str, Any], Optional[str], Optional[schemas.ChatResponse]]:
+    """Resolve the visitor and apply rate limit + question filter.
+
+    Returns (visitor, category, blocked_response). When the question is
+    rejected the block is already logged and ``blocked_response`` is set.
+    ``visitor["session_id"]`` is the session UUID even when the request
+    carried a signed token; it keys the rate limit and the logs.
+    """
+    with stage("session"):
+        visitor = await visitor_service.resolve_session(payload.session_id)
     if not visitor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="세션을 찾을 수 없습니다."
         )
+    visitor.setdefault("session_id", payload.session_id)
+    session_id = visitor["session_id"]
 
     limiter = get_session_rate_limiter()
-    if not limiter.touch(payload.session_id):
-        reason = "세션당 허용된 질문 수를 초과했습니다. 새 세션으로 다시 시도해 주세요."
-        conversation_service.log_conversation(
-            session_id=payload.session_id,
-            visitor_id=visitor.get("id", payload.session_id),
+    with stage("rate_limit"):
+        within_limit = await limiter.touch(session_id)
+    if not within_limit:
+        CHAT_QUESTIONS.inc(outcome="rate_limited")
+        reason = RATE_LIMITED_MESSAGE
+        await _log(
+            session_id=session_id,
+            visitor_id=visitor.get("id", session_id),
             question=payload.question,
             answer=reason,
             category=None,
             is_blocked=True,
         )
-        return schemas.ChatResponse(
-            session_id=payload.session_id,
+        return visitor, None, schemas.ChatResponse(
+            session_id=session_id,
             answer=reason,
             blocked=True,
             reason=reason,
             category=None,
         )
 
-    allowed, category, rejection = question_filter.validate_question(payload.question)
+    with stage("filter"):
+        allowed, category, rejection = question_filter.validate_question(payload.question)
     if not allowed:
-        conversation_service.log_conversation(
-            session_id=payload.session_id,
-            visitor_id=visitor.get("id", payload.session_id),
+        CHAT_QUESTIONS.inc(outcome="blocked")
+        await _log(
+            session_id=session_id,
+            visitor_id=visitor.get("id", session_id),
             question=payload.question,
             answer=rejection or settings.blocked_message,
             category=category,
             is_blocked=True,
         )
-        return schemas.ChatResponse(
-            session_id=payload.session_id,
+        return visitor, category, schemas.ChatResponse(
+            session_id=session_id,
             answer=rejection or settings.blocked_message,
             blocked=True,
             reason=rejection or settings.blocked_message,
             category=category,
         )
 
-    answer = llm_service.generate_persona_answer(payload.question, category, visitor)
-    conversation_service.log_conversation(
-        session_id=payload.session_id,
-        visitor_id=visitor.get("id", payload.session_id),
+    return visitor, category, None
+
+
+async def _log(**fields: Any) -> None:
+    with stage("log"):
+        await conversation_service.log_conversation(**fields)
+
+
+def _wants_fresh_answer(cache_control: Optional[str]) -> bool:
+    """QA can send `Cache-Control: no-cache` to skip the answer cache."""
+    return bool(cache_control) and "no-cache" in cache_control.lower()
+
+
+@router.post("", response_model=schemas.ChatResponse)
+async def ask_question(
+    payload: schemas.ChatRequest,
+    cache_control: Optional[str] = Header(default=None),
+):
+    visitor, category, blocked_response = await _screen_question(payload)
+    if blocked_response is not None:
+        return blocked_response
+
+    # Pin the knowledge snapshot so a reload mid-request does not mix versions.
+    prompt = llm_service.get_compiled_prompt()
+    try:
+        answer = await llm_service.generate_persona_answer(
+            payload.question,
+            category,
+            visitor,
+            use_cache=not _wants_fresh_answer(cache_control),
+            prompt=prompt,
+        )
+    except LLMUnavailableError as exc:
+        CHAT_QUESTIONS.inc(outcome="llm_unavailable")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=LLM_UNAVAILABLE_MESSAGE,
+            headers={"Retry-After": str(_retry_after_header(exc))},
+        ) from exc
+    except RuntimeError:
+        CHAT_QUESTIONS.inc(outcome="error")
+        raise
+    CHAT_QUESTIONS.inc(outcome="answered")
+    await _log(
+        session_id=visitor["session_id"],
+        visitor_id=visitor["id"],
         question=payload.question,
         answer=answer,
         category=category,
         is_blocked=False,
+        prompt_version=prompt.version,
     )
 
     return schemas.ChatResponse(
-        session_id=payload.session_id,
+        session_id=visitor["session_id"],
         answer=answer,
         blocked=False,
         reason=None,
@@ -79,3 +155,97 @@ def ask_question(payload: schemas.ChatRequest):
     )
 
 
+def _retry_after_header(exc: LLMUnavailableError) -> int:
+    return max(1, math.ceil(exc.retry_after or 0))
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a single Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _stream_answer(
+    payload: schemas.ChatRequest,
+    visitor: Dict[str, Any],
+    category: Optional[str],
+    use_cache: bool,
+) -> AsyncIterator[str]:
+    """Relay LLM deltas as SSE and log the collected answer once finished.
+
+    When the client disconnects Starlette cancels this generator; the
+    ``finally`` block closes the upstream stream and logs what was sent.
+    """
+    parts = []
+    completed = False
+    prompt = llm_service.get_compiled_prompt()
+    yield _sse_event("meta", {"session_id": visitor["session_id"], "category": category})
+    try:
+        async for delta in llm_service.stream_persona_answer(
+            payload.question, category, visitor, use_cache=use_cache, prompt=prompt
+        ):
+            parts.append(delta)
+            yield _sse_event("token", {"delta": delta})
+        completed = True
+        CHAT_QUESTIONS.inc(outcome="answered")
+    except LLMUnavailableError as exc:
+        CHAT_QUESTIONS.inc(outcome="llm_unavailable")
+        yield _sse_event(
+            "error",
+            {"detail": LLM_UNAVAILABLE_MESSAGE, "retry_after": _retry_after_header(exc)},
+        )
+    except RuntimeError:
+        CHAT_QUESTIONS.inc(outcome="error")
+        # Upstream error text stays in the server log, as for the 500 response.
+        logger.exception("Streaming answer failed")
+        yield _sse_event("error", {"detail": INTERNAL_ERROR_MESSAGE})
+    finally:
+        answer = "".join(parts) or (settings.blocked_message if completed else "")
+        if answer:
+            with anyio.CancelScope(shield=True):
+                await _log(
+                    session_id=visitor["session_id"],
+                    visitor_id=visitor["id"],
+                    question=payload.question,
+                    answer=answer,
+                    category=category,
+                    is_blocked=False,
+                    prompt_version=prompt.version,
+                )
+
+    if completed:
+        response = schemas.ChatResponse(
+            session_id=visitor["session_id"],
+            answer=answer,
+            blocked=False,
+            reason=None,
+            category=category,
+        )
+        yield _sse_event("done", response.model_dump())
+
+
+async def _single_event(response: schemas.ChatResponse) -> AsyncIterator[str]:
+    yield _sse_event("done", response.model_dump())
+
+
+@router.post("/stream")
+async def ask_question_stream(
+    payload: schemas.ChatRequest,
+    cache_control: Optional[str] = Header(default=None),
+):
+    """Stream the answer as Server-Sent Events (`meta`, `token`, `done`/`error`)."""
+    visitor, category, blocked_response = await _screen_question(payload)
+    if blocked_response is not None:
+        body = _single_event(blocked_response)
+    else:
+        body = _stream_answer(
+            payload,
+            visitor,
+            category,
+            use_cache=not _wants_fresh_answer(cache_control),
+        )
+
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,33 +1,179 @@
 """Dashboard data endpoints."""
 
-from typing import List
+import hashlib
+from datetime import datetime, timezone
+from typing import List, Literal, Optional, Tuple
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 
 from .. import schemas
 from ...core.auth import verify_admin
-from ...services import conversation_service
+from ...core.cache import RefreshingValue
+from ...core.config import settings
+from ...services import conversation_service, export_service, llm_service, storage
+from ...services.knowledge_reloader import KnowledgeReloadError, get_knowledge_reloader
 
 router = APIRouter()
 
 
+async def _render_dashboard_stats() -> Tuple[bytes, str, bool]:
+    """Build, validate and serialize the stats once; returns (body, etag, partial)."""
+    stats = await conversation_service.build_dashboard_stats()
+    body = schemas.DashboardStats(**stats).model_dump_json().encode("utf-8")
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"', stats["partial"]
+
+
+_stats_cache = RefreshingValue(
+    _render_dashboard_stats,
+    ttl_seconds=settings.dashboard_stats_ttl_seconds,
+    stale_seconds=settings.dashboard_stats_stale_seconds,
+)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {item.strip().removeprefix("W/") for item in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
 @router.get(
     "/stats",
     response_model=schemas.DashboardStats,
     dependencies=[Depends(verify_admin)],
 )
-def get_dashboard_stats():
-    stats = conversation_service.build_dashboard_stats()
-    return schemas.DashboardStats(**stats)
+async def get_dashboard_stats(
+    if_none_match: Optional[str] = Header(default=None),
+    cache_control: Optional[str] = Header(default=None),
+):
+    """Cached stats; `If-None-Match` with the current ETag returns 304.
+
+    `Cache-Control: no-cache` forces a recomputation.
+    """
+    force = bool(cache_control) and "no-cache" in cache_control.lower()
+    body, etag, partial = await _stats_cache.get(force=force)
+    if partial:
+        # Serve it, but recompute on the next request instead of after the TTL.
+        _stats_cache.expire()
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(storage.CONVERSATION_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}",
+        )
+    return requested
 
 
 @router.get(
     "/logs",
-    response_model=List[schemas.ConversationRecord],
+    response_model=schemas.ConversationPage,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(verify_admin)],
+)
+async def get_recent_logs(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return, e.g. question,category"
+    ),
+    category: Optional[str] = None,
+    blocked: Optional[bool] = None,
+    session_id: Optional[str] = None,
+):
+    """Newest-first conversation logs, one cursor page at a time."""
+    try:
+        logs, next_cursor = await conversation_service.fetch_conversation_page(
+            limit=limit,
+            cursor=cursor,
+            fields=_parse_fields(fields),
+            category=category,
+            is_blocked=blocked,
+            session_id=session_id,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return schemas.ConversationPage(
+        items=[schemas.ConversationRecord(**log) for log in logs],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get(
+    "/cache",
+    response_model=schemas.AnswerCacheStats,
+    dependencies=[Depends(verify_admin)],
+)
+async def get_answer_cache_stats():
+    return schemas.AnswerCacheStats(**llm_service.get_answer_cache_stats())
+
+
+@router.get(
+    "/knowledge",
+    response_model=schemas.KnowledgeStatus,
     dependencies=[Depends(verify_admin)],
 )
-def get_recent_logs(limit: int = Query(50, ge=1, le=200)):
-    logs = conversation_service.fetch_recent_conversations(limit=limit)
-    return [schemas.ConversationRecord(**log) for log in logs]
+async def get_knowledge_status():
+    """Prompt/knowledge version served by this worker and reload history."""
+    return schemas.KnowledgeStatus(**get_knowledge_reloader().stats())
+
+
+@router.post(
+    "/knowledge/reload",
+    response_model=schemas.KnowledgeReloadResult,
+    dependencies=[Depends(verify_admin)],
+)
+async def reload_knowledge():
+    """Rebuild the prompt snapshot now instead of waiting for the watcher.
+
+    Only the worker handling this request reloads; the others pick the
+    change up on their next file check. 422 means the files failed to
+    compile and the previous version is still served.
+    """
+    try:
+        result = await get_knowledge_reloader().reload(force=True)
+    except KnowledgeReloadError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)
+        ) from exc
+    return schemas.KnowledgeReloadResult(**result)
+
 
+@router.get("/export", dependencies=[Depends(verify_admin)])
+async def export_conversations(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    gzip: bool = Query(False, description="Compress the download with gzip"),
+    since: Optional[datetime] = Query(None, description="Inclusive start (UTC if no offset)"),
+    until: Optional[datetime] = Query(None, description="Exclusive end (UTC if no offset)"),
+    ref: Optional[str] = Query(None, description="Stored visit ref (`direct` for none)"),
+):
+    """Stream every matching conversation, newest first, as a download.
 
+    Rows are read from the storage page by page while the response is sent.
+    With ``ref`` they are newest first within each group of sessions.
+    """
+    try:
+        since, until = export_service.normalize_range(since, until)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    filename = export_service.export_filename(fmt, gzip, datetime.now(timezone.utc))
+    return StreamingResponse(
+        export_service.export_conversations(
+            fmt, compress=gzip, since=since, until=until, ref=ref
+        ),
+        media_type="application/gzip" if gzip else export_service.MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+        },
+    )
@@ -9,8 +9,8 @@ router = APIRouter()
 
 
 @router.post("", response_model=schemas.VisitorResponse)
-def register_visitor(payload: schemas.VisitorCreate):
-    record = visitor_service.create_visitor(payload.model_dump())
+async def register_visitor(payload: schemas.VisitorCreate):
+    record = await visitor_service.create_visitor(payload.model_dump())
     return schemas.VisitorResponse(**record)
 
 
@@ -19,9 +19,11 @@ class VisitorResponse(BaseModel):
     visitor_name: str
     visitor_affiliation: Optional[str] = None
     visit_ref: Optional[str] = None
+    session_token: Optional[str] = None
 
 
 class ChatRequest(BaseModel):
+    # Either a signed session token or a legacy session UUID.
     session_id: str = Field(..., min_length=8)
     question: str = Field(..., min_length=4)
 
@@ -50,19 +52,68 @@ class VisitorRecord(BaseModel):
 
 class ConversationRecord(BaseModel):
     id: str
-    session_id: str
-    question: str
+    # Optional so `/dashboard/logs?fields=` projections validate.
+    session_id: Optional[str] = None
+    question: Optional[str] = None
     answer: Optional[str] = None
     category: Optional[str] = None
     is_blocked: bool = False
+    prompt_version: Optional[str] = None
     timestamp: Optional[datetime] = None
 
 
+class ConversationPage(BaseModel):
+    items: List[ConversationRecord]
+    next_cursor: Optional[str] = None
+
+
 class DashboardStats(BaseModel):
     ref_stats: List[StatPoint]
     question_categories: List[StatPoint]
     daily_visits: List[StatPoint]
     latest_visitors: List[VisitorRecord]
     recent_questions: List[ConversationRecord]
-
-
+    # True when a source timed out or failed; its sections are empty or
+    # computed from what did load.
+    partial: bool = False
+    missing_sources: List[str] = Field(default_factory=list)
+
+
+class AnswerCacheStats(BaseModel):
+    size: int
+    max_entries: int
+    hits: int
+    misses: int
+    evictions: int
+    # Single-flight coalescing of identical concurrent completions and streams.
+    in_flight: int = 0
+    coalesced_leaders: int = 0
+    coalesced_waiters: int = 0
+    # OpenAI prompt caching, from usage.prompt_tokens_details.cached_tokens.
+    upstream_completions: int = 0
+    prompt_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    prompt_cache_hits: int = 0
+    prompt_cache_hit_ratio: float = 0.0
+    cache_hit_latency_ms: Optional[float] = None
+    cache_miss_latency_ms: Optional[float] = None
+
+
+class KnowledgeStatus(BaseModel):
+    version: Optional[str] = None
+    sources: int = 0
+    watching: bool = False
+    interval_seconds: float = 0.0
+    reloads: int = 0
+    failures: int = 0
+    # Set while changed sources fail to compile; the previous version is served.
+    last_error: Optional[str] = None
+    last_reload_at: Optional[float] = None
+    last_build_ms: Optional[float] = None
+
+
+class KnowledgeReloadResult(BaseModel):
+    version: Optional[str] = None
+    previous_version: Optional[str] = None
+    rebuilt: bool = False
+    build_ms: Optional[float] = None
@@ -2,18 +2,89 @@
 
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+import hashlib
+import time
+from typing import Any, Dict, Optional
 
+import anyio
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from firebase_admin import auth
 
+from .cache import TTLCache
 from .config import settings
+from .firebase import init_firebase_app
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
+# Cached claims are dropped this many seconds before the token's ``exp``.
+TOKEN_EXPIRY_SKEW = 30
+# With ``admin_token_check_revoked`` the cache only absorbs bursts of
+# dashboard requests, so a revoked token stops working within seconds.
+REVOKED_CHECK_CACHE_SECONDS = 5
 
-def verify_admin(
+_token_cache: TTLCache[Dict[str, Any]] = TTLCache(
+    max_entries=settings.admin_token_cache_size,
+    ttl_seconds=settings.admin_token_cache_seconds,
+)
+_pending: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+
+
+def _verify_id_token(token: str) -> Dict[str, Any]:
+    from firebase_admin import auth
+
+    # Storage may not be Firestore (or warm-up may not have run yet), so the
+    # token check cannot rely on anything else having created the app.
+    init_firebase_app()
+    return auth.verify_id_token(token, check_revoked=settings.admin_token_check_revoked)
+
+
+def _cache_seconds() -> float:
+    if settings.admin_token_check_revoked:
+        return min(settings.admin_token_cache_seconds, REVOKED_CHECK_CACHE_SECONDS)
+    return settings.admin_token_cache_seconds
+
+
+async def _decode_token(token: str) -> Dict[str, Any]:
+    """Return verified claims, reusing them until shortly before ``exp``.
+
+    With revocation checking on, claims are reused for at most
+    ``REVOKED_CHECK_CACHE_SECONDS``.
+
+    Signature checks run in a worker thread, and concurrent requests with
+    the same uncached token share one verification.
+    """
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    decoded = _token_cache.get(key)
+    if decoded is not None:
+        return decoded
+
+    pending = _pending.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future: "asyncio.Future[Dict[str, Any]]" = asyncio.get_running_loop().create_future()
+    _pending[key] = future
+    try:
+        decoded = await anyio.to_thread.run_sync(_verify_id_token, token)
+    except BaseException as exc:
+        future.set_exception(exc)
+        future.exception()  # mark retrieved when nobody else is waiting
+        raise
+    finally:
+        _pending.pop(key, None)
+
+    ttl = min(
+        float(decoded.get("exp", 0)) - TOKEN_EXPIRY_SKEW - time.time(),
+        _cache_seconds(),
+    )
+    if ttl > 0:
+        _token_cache.set(key, decoded, ttl_seconds=ttl)
+    future.set_result(decoded)
+    return decoded
+
+
+async def verify_admin(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
 ):
     """Validate Firebase ID token and enforce allowlist if configured."""
@@ -23,7 +94,7 @@ def verify_admin(
         )
 
     try:
-        decoded = auth.verify_id_token(credentials.credentials)
+        decoded = await _decode_token(credentials.credentials)
     except Exception as exc:  # pragma: no cover - firebase errors
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid token: {exc}"
@@ -37,5 +108,3 @@ def verify_admin(
         )
 
     return decoded
-
-
@@ -0,0 +1,296 @@
+"""Small in-process caches shared by services."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Bounded LRU cache whose entries also expire after ``ttl_seconds``.
+
+    Not thread-safe; it is meant to be used from the event loop.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Return a fresh value and mark it recently used, or ``None``."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V, ttl_seconds: Optional[float] = None) -> None:
+        """Store ``value`` and evict least recently used entries over the cap.
+
+        ``ttl_seconds`` overrides the cache-wide TTL for this entry.
+        """
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Return counters suitable for dashboards/metrics."""
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class RefreshingValue(Generic[V]):
+    """A single async-computed value with single-flight, stale-while-revalidate refresh.
+
+    Within ``ttl_seconds`` the cached value is returned as is. For a further
+    ``stale_seconds`` it is still returned immediately while one background
+    task recomputes it. Past that (or on first use, or with ``force``) callers
+    wait for the recomputation, and concurrent callers share a single one.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Awaitable[V]],
+        ttl_seconds: float,
+        stale_seconds: float = 0.0,
+    ) -> None:
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._value: Optional[V] = None
+        self._loaded_at = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+
+    async def get(self, force: bool = False) -> V:
+        age = time.monotonic() - self._loaded_at
+        if self._value is not None and not force:
+            if age < self.ttl_seconds:
+                self.hits += 1
+                return self._value
+            if age < self.ttl_seconds + self.stale_seconds:
+                self.stale_hits += 1
+                self._start_refresh()
+                return self._value
+        return await asyncio.shield(self._start_refresh())
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.get_running_loop().create_task(self._load())
+            self._refresh.add_done_callback(self._log_failure)
+        return self._refresh
+
+    async def _load(self) -> V:
+        value = await self.loader()
+        self._value = value
+        self._loaded_at = time.monotonic()
+        self.refreshes += 1
+        return value
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background refresh failed: %s", task.exception())
+
+    def expire(self) -> None:
+        """Mark the value stale so the next ``get`` serves it and refreshes."""
+        self._loaded_at = min(self._loaded_at, time.monotonic() - self.ttl_seconds)
+
+    def clear(self) -> None:
+        self._value = None
+        self._loaded_at = 0.0
+
+
+class SingleFlight(Generic[V]):
+    """Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key (the leader) starts ``fn`` as a task; callers
+    arriving while it runs await the same task and get its result or its
+    exception. Nothing is kept once the task finishes. A cancelled caller
+    does not cancel the shared task.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.collapsed = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[V]]) -> V:
+        task = self._tasks.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.get_running_loop().create_task(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    async def join(self, key: Hashable) -> Optional[V]:
+        """Wait for an in-flight call for ``key``; None when there is none."""
+        task = self._tasks.get(key)
+        if task is None:
+            return None
+        self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._tasks),
+            "leaders": self.leaders,
+            "collapsed": self.collapsed,
+        }
+
+
+class _SharedStream(Generic[V]):
+    """One running stream whose items are replayed to every subscriber."""
+
+    def __init__(self, source: AsyncIterator[V]) -> None:
+        self.items: List[V] = []
+        self.error: Optional[BaseException] = None
+        self.finished = False
+        # Set once nobody is left to read; late joiners start a new stream.
+        self.closed = False
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+        self.task = asyncio.get_running_loop().create_task(self._pump(source))
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _pump(self, source: AsyncIterator[V]) -> None:
+        try:
+            async for item in source:
+                self.items.append(item)
+                self._notify()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001 - re-raised in every subscriber
+            self.error = exc
+        finally:
+            self.finished = True
+            self._notify()
+
+    async def subscribe(self) -> AsyncIterator[V]:
+        self.subscribers += 1
+        index = 0
+        try:
+            while True:
+                while index < len(self.items):
+                    index += 1
+                    yield self.items[index - 1]
+                if self.finished:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if not self.subscribers and not self.finished:
+                self.closed = True
+                self.task.cancel()
+
+
+class SharedStreams(Generic[V]):
+    """Coalesces concurrent streams that share a key into one producer.
+
+    The first caller for a key (the leader) starts iterating ``fn()`` in a
+    task; callers arriving while it runs get every item produced so far and
+    then the rest as it arrives, or its exception. A subscriber that stops
+    reading does not end the stream for the others, but when the last one
+    leaves early the producer is cancelled. Nothing is kept once the
+    producer finishes.
+    """
+
+    def __init__(self) -> None:
+        self._streams: Dict[Hashable, _SharedStream[V]] = {}
+        self.leaders = 0
+        self.collapsed = 0
+
+    def _running(self, key: Hashable) -> Optional[_SharedStream[V]]:
+        shared = self._streams.get(key)
+        if shared is None or shared.closed or shared.task.done():
+            return None
+        return shared
+
+    def stream(self, key: Hashable, fn: Callable[[], AsyncIterator[V]]) -> AsyncIterator[V]:
+        shared = self._running(key)
+        if shared is None:
+            self.leaders += 1
+            shared = _SharedStream(fn())
+            self._streams[key] = shared
+            shared.task.add_done_callback(lambda _: self._forget(key, shared))
+        else:
+            self.collapsed += 1
+        return shared.subscribe()
+
+    async def join(self, key: Hashable) -> Optional[List[V]]:
+        """Collect a running stream for ``key``; None when there is none."""
+        shared = self._running(key)
+        if shared is None:
+            return None
+        self.collapsed += 1
+        async with aclosing(shared.subscribe()) as items:
+            return [item async for item in items]
+
+    def _forget(self, key: Hashable, shared: _SharedStream[V]) -> None:
+        if self._streams.get(key) is shared:
+            del self._streams[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._streams),
+            "leaders": self.leaders,
+            "collapsed": self.collapsed,
+        }
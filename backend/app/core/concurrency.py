@@ -0,0 +1,37 @@
+"""Helpers for running independent I/O concurrently."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, List, Mapping, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+async def gather_partial(
+    sources: Mapping[str, Awaitable[Any]], timeout: float
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Await every source concurrently, each bounded by ``timeout`` seconds.
+
+    Returns (results, failed): ``results`` holds the value of each source that
+    finished in time and ``failed`` the names of the ones that raised or
+    timed out, so callers can return a partial answer instead of an error.
+    Total latency is that of the slowest source, capped at ``timeout``.
+    """
+    names = list(sources)
+    outcomes = await asyncio.gather(
+        *(asyncio.wait_for(sources[name], timeout) for name in names),
+        return_exceptions=True,
+    )
+    results: Dict[str, Any] = {}
+    failed: List[str] = []
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, BaseException):
+            if isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+            logger.warning("Source %s failed: %r", name, outcome)
+            failed.append(name)
+        else:
+            results[name] = outcome
+    return results, failed
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 import json
-from typing import Any, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -35,12 +35,60 @@ class Settings(BaseSettings):
 
     app_name: str = "309 Interview Agent API"
     environment: str = Field(default="local")
+    startup_warmup: str = Field(
+        default="blocking",
+        description=(
+            "blocking: warm up before serving and fail fast; background: serve "
+            "immediately and report progress on /ready; off: load lazily on first use"
+        ),
+    )
     openai_api_key: str = Field(default="", description="OpenAI API Key")
     openai_model: str = Field(default="gpt-4o-mini")
+    openai_base_url: Optional[str] = Field(
+        default=None, description="Override the OpenAI API base URL (e.g. a local fake)"
+    )
+    llm_deadline_seconds: float = Field(
+        default=30, description="Total seconds an LLM call may take, retries included"
+    )
+    llm_attempt_timeout_seconds: float = Field(
+        default=20, description="Max seconds for a single OpenAI request attempt"
+    )
+    llm_connect_timeout_seconds: float = Field(
+        default=5, description="Max seconds to open a connection to OpenAI"
+    )
+    llm_max_retries: int = Field(
+        default=2, description="Retries after 429/5xx/timeouts within the deadline"
+    )
+    llm_backoff_base_seconds: float = Field(
+        default=0.5, description="First retry backoff ceiling (doubles per retry, jittered)"
+    )
+    llm_backoff_max_seconds: float = Field(
+        default=8, description="Upper bound for a single retry backoff"
+    )
+    llm_max_connections: int = Field(
+        default=20, description="Max concurrent HTTP connections to OpenAI"
+    )
+    llm_max_keepalive_connections: int = Field(
+        default=10, description="Idle keep-alive connections kept open to OpenAI"
+    )
+    llm_keepalive_seconds: float = Field(
+        default=30, description="Seconds an idle OpenAI connection is kept alive"
+    )
+    llm_breaker_failure_threshold: int = Field(
+        default=5,
+        description="Consecutive failed LLM calls that open the circuit breaker",
+    )
+    llm_breaker_reset_seconds: float = Field(
+        default=30, description="Seconds the breaker stays open before a trial call"
+    )
     knowledge_pack_path: str = Field(
         default="../knowledge_base/309_knowledge_pack.json",
         description="Path to the 309 knowledge base JSON file",
     )
+    knowledge_reload_seconds: float = Field(
+        default=2.0,
+        description="Seconds between checks for prompt/knowledge file changes (0 disables)",
+    )
     firebase_credentials_path: Optional[str] = Field(
         default=None, description="Path to Firebase service account JSON file"
     )
@@ -62,14 +110,118 @@ class Settings(BaseSettings):
     session_window_minutes: int = Field(
         default=30, description="Time window for counting rate limited questions"
     )
+    session_token_secret: str = Field(
+        default="",
+        description="HMAC key for signed session tokens (empty keeps UUID-only sessions)",
+    )
+    session_token_max_age_hours: int = Field(
+        default=0, description="Reject session tokens older than this (0 never expires)"
+    )
+    rate_limit_backend: str = Field(
+        default="memory",
+        description="Rate limit state store: memory, sqlite or firestore",
+    )
+    rate_limit_sqlite_path: str = Field(
+        default="rate_limits.sqlite3",
+        description="SQLite file shared by workers when rate_limit_backend=sqlite",
+    )
+    rate_limit_max_keys: int = Field(
+        default=100_000, description="Max session keys tracked by the rate limiter"
+    )
+    storage_backend: str = Field(
+        default="firestore",
+        description="Where visitors and conversations are stored: firestore or sqlite",
+    )
+    storage_sqlite_path: str = Field(
+        default="storage.sqlite3",
+        description="SQLite database file when storage_backend=sqlite",
+    )
+    conversation_log_queue_size: int = Field(
+        default=10_000, description="Conversation logs buffered before spilling to disk"
+    )
+    conversation_log_batch_size: int = Field(
+        default=499, description="Max conversation logs per Firestore batch (<= 499)"
+    )
+    conversation_log_flush_seconds: float = Field(
+        default=1.0, description="Max seconds a conversation log waits in the buffer"
+    )
+    conversation_log_spill_path: str = Field(
+        default="conversation_spill.jsonl",
+        description="Local JSONL file for logs Firestore could not take (empty drops them)",
+    )
     analytics_limit: int = Field(
         default=200, description="Max records returned for dashboard lists"
     )
+    dashboard_stats_ttl_seconds: float = Field(
+        default=30.0, description="Seconds cached dashboard stats are served as fresh"
+    )
+    dashboard_stats_stale_seconds: float = Field(
+        default=300.0,
+        description="Extra seconds stale stats are served while refreshing in the background",
+    )
+    dashboard_query_timeout_seconds: float = Field(
+        default=5.0, description="Per-query timeout for dashboard aggregates"
+    )
+    analytics_counter_shards: int = Field(
+        default=8, description="Shards per dashboard counter (more shards, more write throughput)"
+    )
+    analytics_ref_labels: List[str] = Field(
+        default_factory=list,
+        description="Visit refs counted separately on the dashboard; others count as 'other'",
+    )
+    analytics_max_ref_labels: int = Field(
+        default=50,
+        description="Distinct visit ref labels kept before new refs count as 'other' (0: no cap)",
+    )
     admin_allowed_emails: List[str] = Field(
         default_factory=list, description="Firebase auth emails allowed to view dashboard"
     )
+    admin_token_cache_size: int = Field(
+        default=256, description="Verified admin ID tokens kept in memory"
+    )
+    admin_token_cache_seconds: int = Field(
+        default=3600,
+        description="Max seconds a verified token is reused (5 at most with revocation checks)",
+    )
+    admin_token_check_revoked: bool = Field(
+        default=False,
+        description="Also check Firebase token revocation; caps token reuse to 5 seconds",
+    )
+    retrieval_top_k: int = Field(
+        default=8,
+        description="309files chunks injected per question (0 injects every chunk)",
+    )
+    retrieval_chunk_chars: int = Field(
+        default=800, description="Max characters per retrievable 309files chunk"
+    )
+    prompt_token_budget: int = Field(
+        default=6000, description="Max input tokens (system + user) per LLM call"
+    )
+    prompt_section_budgets: Dict[str, int] = Field(
+        default_factory=lambda: {
+            "guardrails": 400,
+            "speaking_style": 400,
+            "summary": 600,
+            "qa_templates": 400,
+            "values": 400,
+            "collaboration_style": 400,
+            "projects": 600,
+            "extra_documents": 3000,
+        },
+        description="Token cap per context section (JSON object in env)",
+    )
+    answer_cache_size: int = Field(
+        default=256, description="Max cached LLM answers (0 disables the cache)"
+    )
+    answer_cache_ttl_seconds: int = Field(
+        default=3600, description="Seconds a cached LLM answer stays valid"
+    )
+    metrics_enabled: bool = Field(
+        default=True,
+        description="Serve Prometheus /metrics and add Server-Timing headers",
+    )
 
-    @field_validator("allowed_origins", mode="before")
+    @field_validator("allowed_origins", "analytics_ref_labels", mode="before")
     @classmethod
     def split_allowed_origins(cls, value: Optional[Union[str, List[str], Any]]):
         """Allow comma-separated strings or JSON arrays."""
@@ -1,21 +1,33 @@
-"""Firebase helpers for Firestore + Auth access."""
+"""Firebase helpers for Firestore + Auth access.
+
+``firebase_admin`` and the Firestore client libraries take a few hundred
+milliseconds to import, so they are imported on first use (normally the
+startup warm-up) rather than when the app module loads.
+"""
 
 from __future__ import annotations
 
 import json
-from typing import Optional
-
-import firebase_admin
-from firebase_admin import credentials, firestore
+import threading
+from typing import TYPE_CHECKING, Optional
 
 from .config import settings
 
+if TYPE_CHECKING:
+    import firebase_admin
+    from firebase_admin import credentials, firestore, firestore_async
+
 _firebase_app: Optional[firebase_admin.App] = None
 _firestore_client: Optional[firestore.Client] = None
+_async_firestore_client: Optional[firestore_async.AsyncClient] = None
+# Admin token checks call init_firebase_app() from worker threads.
+_init_lock = threading.Lock()
 
 
 def _build_credentials() -> credentials.Base:
     """Create firebase credentials from path or inline JSON."""
+    from firebase_admin import credentials
+
     if settings.firebase_credentials_path:
         return credentials.Certificate(settings.firebase_credentials_path)
 
@@ -33,8 +45,12 @@ def init_firebase_app() -> firebase_admin.App:
     """Initialize and cache the firebase app."""
     global _firebase_app
     if _firebase_app is None:
-        cred = _build_credentials()
-        _firebase_app = firebase_admin.initialize_app(cred)
+        with _init_lock:
+            if _firebase_app is None:
+                import firebase_admin
+
+                cred = _build_credentials()
+                _firebase_app = firebase_admin.initialize_app(cred)
     return _firebase_app
 
 
@@ -42,8 +58,19 @@ def get_firestore_client() -> firestore.Client:
     """Return a singleton firestore client."""
     global _firestore_client
     if _firestore_client is None:
+        from firebase_admin import firestore
+
         firebase_app = init_firebase_app()
         _firestore_client = firestore.client(firebase_app)
     return _firestore_client
 
 
+def get_async_firestore_client() -> firestore_async.AsyncClient:
+    """Return a singleton async firestore client for request handlers."""
+    global _async_firestore_client
+    if _async_firestore_client is None:
+        from firebase_admin import firestore_async
+
+        firebase_app = init_firebase_app()
+        _async_firestore_client = firestore_async.client(firebase_app)
+    return _async_firestore_client
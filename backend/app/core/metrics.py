@@ -0,0 +1,246 @@
+"""In-process request metrics: stage timers, Server-Timing and Prometheus text.
+
+Counters and histograms live in this worker's memory and are rendered in the
+Prometheus text exposition format by ``/metrics``. Stage timers record into
+the ``stage_duration_seconds`` histogram and into the current request's
+timings, which ``MetricsMiddleware`` sends as a ``Server-Timing`` header.
+
+Everything is updated from the event loop, so there is no locking; the cost
+of a timed stage is two ``perf_counter`` calls, a bisect and a dict update.
+"""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Request latencies range from a cache hit (~1ms) to a retried LLM call (~30s).
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(labels[name] for name in self.labelnames), 0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum].
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(tuple(labels[name] for name in self.labelnames))
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterator[str]:
+        names = self.labelnames + ("le",)
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total[0])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text format (version 0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time until the response headers were sent, by route",
+        ("method", "route", "status"),
+    )
+)
+STAGE_DURATION = REGISTRY.register(
+    Histogram(
+        "stage_duration_seconds",
+        "Time spent in each stage of the chat hot path",
+        ("stage",),
+    )
+)
+CHAT_QUESTIONS = REGISTRY.register(
+    Counter(
+        "chat_questions_total",
+        "Chat questions by outcome (answered, blocked, rate_limited, llm_unavailable, error)",
+        ("outcome",),
+    )
+)
+LLM_COMPLETIONS = REGISTRY.register(
+    Counter("llm_completions_total", "Upstream OpenAI completions that reported usage")
+)
+LLM_TOKENS = REGISTRY.register(
+    Counter(
+        "llm_tokens_total",
+        "OpenAI token usage (prompt, cached_prompt, completion)",
+        ("kind",),
+    )
+)
+
+
+class RequestTimings:
+    """Stage durations (ms) of one request, in the order they finished."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, duration_ms: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + duration_ms
+
+    def server_timing(self) -> str:
+        entries = [f"{stage};dur={ms:.1f}" for stage, ms in self.stages.items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Record a stage measured elsewhere (e.g. time to first LLM delta)."""
+    STAGE_DURATION.observe(seconds, stage=stage)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds * 1000)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as ``name`` (also when it raises)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """ASGI middleware adding ``Server-Timing`` and recording request latency.
+
+    The header carries the stages finished before the response started; for
+    streamed answers that is everything up to the first byte, and later
+    stages only reach the histograms. Streaming bodies pass through untouched.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+
+        async def send_with_timing(message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", timings.server_timing().encode("latin-1")),
+                ]
+                route = scope.get("route")
+                HTTP_REQUEST_DURATION.observe(
+                    time.perf_counter() - timings.started,
+                    method=scope["method"],
+                    route=getattr(route, "path", "unmatched"),
+                    status=str(message["status"]),
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timings.reset(token)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -1,49 +1,227 @@
-"""Simple in-memory rate limiter keyed by session or IP."""
+"""Rate limiters keyed by session or IP.
+
+``memory`` keeps state per process. ``sqlite`` shares it between workers on
+one host (WAL database file) and ``firestore`` between instances; both also
+survive restarts. Select one with ``RATE_LIMIT_BACKEND``.
+"""
 
 from __future__ import annotations
 
-from collections import defaultdict, deque
-from datetime import datetime, timedelta, timezone
-from typing import Deque, Dict, Optional
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Protocol, Tuple
+
+import anyio
 
 from .config import settings
+from .firebase import get_async_firestore_client
 
+# Max idle keys dropped per touch; keeps the amortized sweep cost bounded.
+SWEEP_BATCH = 64
+# The SQLite backend purges expired rows from all keys once per this many touches.
+SQLITE_PURGE_EVERY = 1000
 
-class SlidingWindowLimiter:
-    """Keeps timestamps per key to enforce call limits within a time window."""
 
-    def __init__(self, limit: int, window_minutes: int) -> None:
+class RateLimiter(Protocol):
+    async def touch(self, key: str) -> bool:
+        """Record a hit and return whether it is allowed."""
+
+
+class SlidingWindowLimiter:
+    """Keeps timestamps per key to enforce call limits within a time window.
+
+    Memory is bounded: keys are kept in least-recently-touched order, keys
+    whose newest hit has left the window are swept from the front a few at a
+    time on every ``touch``, and at most ``max_keys`` keys are tracked (the
+    least recently touched key is evicted first). Timestamps come from the
+    monotonic clock and are stored as a small tuple of floats per key.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        window_minutes: int,
+        max_keys: int = 100_000,
+    ) -> None:
         self.limit = limit
-        self.window = timedelta(minutes=window_minutes)
-        self._events: Dict[str, Deque[datetime]] = defaultdict(deque)
+        self.window = window_minutes * 60.0
+        self.max_keys = max_keys
+        self._events: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self.evictions = 0
 
-    def touch(self, key: str) -> bool:
+    async def touch(self, key: str) -> bool:
         """Record a hit and return whether it is allowed."""
-        now = datetime.now(tz=timezone.utc)
+        return self.hit(key)
+
+    def hit(self, key: str) -> bool:
+        """Synchronous ``touch``."""
+        now = time.monotonic()
         window_start = now - self.window
-        queue = self._events[key]
+        self._sweep(window_start)
 
-        while queue and queue[0] < window_start:
-            queue.popleft()
+        events = self._events.get(key, ())
+        if events and events[0] <= window_start:
+            events = tuple(ts for ts in events if ts > window_start)
 
-        if len(queue) >= self.limit:
+        if len(events) >= self.limit:
+            self._events[key] = events
+            self._events.move_to_end(key)
             return False
 
-        queue.append(now)
+        self._events[key] = events + (now,)
+        self._events.move_to_end(key)
+        while len(self._events) > self.max_keys:
+            self._events.popitem(last=False)
+            self.evictions += 1
         return True
 
+    def _sweep(self, window_start: float) -> None:
+        """Drop up to SWEEP_BATCH least recently touched keys that went idle."""
+        for _ in range(SWEEP_BATCH):
+            if not self._events:
+                return
+            key = next(iter(self._events))
+            events = self._events[key]
+            if events and events[-1] > window_start:
+                return
+            del self._events[key]
 
-_session_rate_limiter: Optional[SlidingWindowLimiter] = None
+    def __len__(self) -> int:
+        return len(self._events)
 
 
-def get_session_rate_limiter() -> SlidingWindowLimiter:
-    """Return a cached rate limiter instance."""
-    global _session_rate_limiter
-    if _session_rate_limiter is None:
-        _session_rate_limiter = SlidingWindowLimiter(
+class SQLiteLimiter:
+    """Sliding window shared by every process that opens the same file.
+
+    Each touch is one ``BEGIN IMMEDIATE`` transaction (expire, count, insert),
+    so concurrent workers see a consistent count. Uses wall-clock time because
+    timestamps must be comparable across processes and restarts.
+    """
+
+    def __init__(self, path: str, limit: int, window_minutes: int) -> None:
+        self.path = path
+        self.limit = limit
+        self.window = window_minutes * 60.0
+        self._local = threading.local()
+        self._touches = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_events "
+                "(key TEXT NOT NULL, ts REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS rate_events_key_ts ON rate_events (key, ts)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS rate_events_ts ON rate_events (ts)")
+            self._local.conn = conn
+        return conn
+
+    async def touch(self, key: str) -> bool:
+        """Record a hit and return whether it is allowed."""
+        return await anyio.to_thread.run_sync(self.hit, key)
+
+    def hit(self, key: str) -> bool:
+        """Synchronous ``touch``."""
+        now = time.time()
+        window_start = now - self.window
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM rate_events WHERE key = ? AND ts <= ?", (key, window_start)
+            )
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM rate_events WHERE key = ?", (key,)
+            ).fetchone()
+            allowed = count < self.limit
+            if allowed:
+                conn.execute(
+                    "INSERT INTO rate_events (key, ts) VALUES (?, ?)", (key, now)
+                )
+            self._touches += 1
+            if self._touches % SQLITE_PURGE_EVERY == 0:
+                conn.execute("DELETE FROM rate_events WHERE ts <= ?", (window_start,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed
+
+
+class FirestoreLimiter:
+    """Fixed-window counter in Firestore shared by every instance.
+
+    One document per key and window; a touch is a single merge write with an
+    ``Increment`` transform, whose committed value comes back in the write
+    result, so the check is atomic and costs one round-trip. ``expires_at``
+    can back a Firestore TTL policy on the collection for cleanup.
+    """
+
+    def __init__(
+        self, limit: int, window_minutes: int, collection: str = "rate_limits"
+    ) -> None:
+        self.limit = limit
+        self.window = window_minutes * 60
+        self.collection = collection
+
+    async def touch(self, key: str) -> bool:
+        """Record a hit and return whether it is allowed."""
+        from firebase_admin import firestore
+
+        bucket = int(time.time() // self.window)
+        expires_at = datetime.fromtimestamp((bucket + 1) * self.window, tz=timezone.utc)
+        doc_id = f"{key.replace('/', '_')}:{bucket}"
+        result = await (
+            get_async_firestore_client()
+            .collection(self.collection)
+            .document(doc_id)
+            .set(
+                {"count": firestore.Increment(1), "expires_at": expires_at},
+                merge=True,
+            )
+        )
+        return result.transform_results[0].integer_value <= self.limit
+
+
+_session_rate_limiter: Optional[RateLimiter] = None
+
+
+def build_rate_limiter(backend: str) -> RateLimiter:
+    """Create a session limiter for the given ``RATE_LIMIT_BACKEND`` value."""
+    if backend == "memory":
+        return SlidingWindowLimiter(
             limit=settings.max_session_questions,
             window_minutes=settings.session_window_minutes,
+            max_keys=settings.rate_limit_max_keys,
         )
-    return _session_rate_limiter
+    if backend == "sqlite":
+        return SQLiteLimiter(
+            path=settings.rate_limit_sqlite_path,
+            limit=settings.max_session_questions,
+            window_minutes=settings.session_window_minutes,
+        )
+    if backend == "firestore":
+        return FirestoreLimiter(
+            limit=settings.max_session_questions,
+            window_minutes=settings.session_window_minutes,
+        )
+    raise RuntimeError(
+        f"Unknown RATE_LIMIT_BACKEND '{backend}'. Use memory, sqlite or firestore."
+    )
 
 
+def get_session_rate_limiter() -> RateLimiter:
+    """Return a cached rate limiter instance."""
+    global _session_rate_limiter
+    if _session_rate_limiter is None:
+        _session_rate_limiter = build_rate_limiter(settings.rate_limit_backend)
+    return _session_rate_limiter
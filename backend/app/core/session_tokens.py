@@ -0,0 +1,82 @@
+"""HMAC-signed session tokens carrying the visitor metadata.
+
+A token is ``v1.<payload>.<signature>`` where the payload is compact JSON
+(session id, name, affiliation, ref, issue time) in base64url and the
+signature is HMAC-SHA256 over ``v1.<payload>``. Verifying one needs no
+database read.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, Dict, Optional
+
+TOKEN_PREFIX = "v1."
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(message: str, secret: str) -> str:
+    digest = hmac.new(secret.encode("utf-8"), message.encode("ascii"), hashlib.sha256)
+    return _b64encode(digest.digest())
+
+
+def is_session_token(value: str) -> bool:
+    """Whether ``value`` has the token shape (legacy sessions are bare UUIDs)."""
+    return value.startswith(TOKEN_PREFIX) and value.count(".") == 2
+
+
+def issue_session_token(visitor: Dict[str, Any], secret: str) -> str:
+    """Sign the visitor metadata returned by ``create_visitor``."""
+    claims = {
+        "sid": visitor["session_id"],
+        "n": visitor.get("visitor_name", ""),
+        "a": visitor.get("visitor_affiliation", ""),
+        "r": visitor.get("visit_ref", ""),
+        "iat": int(time.time()),
+    }
+    payload = _b64encode(
+        json.dumps(claims, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    )
+    signed = TOKEN_PREFIX + payload
+    return f"{signed}.{_sign(signed, secret)}"
+
+
+def verify_session_token(
+    token: str, secret: str, max_age_seconds: int = 0
+) -> Optional[Dict[str, Any]]:
+    """Return the visitor dict for a valid token, otherwise None.
+
+    ``max_age_seconds`` of 0 accepts tokens of any age.
+    """
+    if not secret or not is_session_token(token):
+        return None
+    signed, _, signature = token.rpartition(".")
+    if not hmac.compare_digest(signature, _sign(signed, secret)):
+        return None
+    try:
+        claims = json.loads(_b64decode(signed[len(TOKEN_PREFIX) :]))
+        session_id = claims["sid"]
+        issued_at = int(claims["iat"])
+    except (ValueError, KeyError, TypeError):
+        return None
+    if max_age_seconds and time.time() - issued_at > max_age_seconds:
+        return None
+    return {
+        "id": session_id,
+        "session_id": session_id,
+        "visitor_name": claims.get("n", ""),
+        "visitor_affiliation": claims.get("a", ""),
+        "visit_ref": claims.get("r", ""),
+        "issued_at": issued_at,
+    }
@@ -1,17 +1,26 @@
 """FastAPI entrypoint."""
 
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from .api.router import api_router
 from .core.config import settings
-from .core.firebase import get_firestore_client
+from .core.metrics import MetricsMiddleware, render_metrics
+from .services.knowledge_reloader import get_knowledge_reloader
+from .services.log_writer import get_conversation_log_writer
+from .services.warmup import get_warmup_state, warm_up
 
 app = FastAPI(
     title=settings.app_name,
     version="1.0.0",
 )
 
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins,
@@ -22,16 +31,56 @@ app.add_middleware(
 
 
 @app.on_event("startup")
-def startup_event():
-    # Ensure firebase initializes at boot to catch credential errors early.
-    get_firestore_client()
+async def startup_event():
+    get_conversation_log_writer().start()
+    if settings.startup_warmup == "blocking":
+        # Initialize everything at boot to catch credential errors early.
+        state = await warm_up()
+        if not state.ready:
+            raise RuntimeError(f"Warm-up failed: {state.errors}")
+    elif settings.startup_warmup == "background":
+        app.state.warmup_task = asyncio.create_task(warm_up())
+    get_knowledge_reloader().start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await get_knowledge_reloader().close()
+    # Flush buffered conversation logs before the process exits.
+    await get_conversation_log_writer().close()
 
 
 @app.get("/health", tags=["health"])
 def health_check():
+    """Liveness: the process is up (dependencies may still be warming)."""
     return {"status": "ok", "app": settings.app_name}
 
 
+@app.get("/ready", tags=["health"])
+def readiness_check():
+    """Readiness: clients and compiled prompt/filter are loaded."""
+    state = get_warmup_state()
+    body = {
+        "status": state.status,
+        "duration_ms": state.duration_ms,
+        "steps_ms": state.steps_ms,
+        "errors": state.errors,
+    }
+    if state.ready or settings.startup_warmup == "off":
+        return body
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=body)
+
+
+if settings.metrics_enabled:
+
+    @app.get("/metrics", tags=["health"], include_in_schema=False)
+    def metrics():
+        """Prometheus scrape endpoint (this worker's counters and histograms)."""
+        return PlainTextResponse(
+            render_metrics(), media_type="text/plain; version=0.0.4"
+        )
+
+
 app.include_router(api_router, prefix="/api")
 
 
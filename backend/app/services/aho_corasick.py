@@ -0,0 +1,65 @@
+"""Aho-Corasick automaton for multi-keyword search in a single pass."""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Generic, Iterable, Iterator, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class AhoCorasick(Generic[T]):
+    """Finds every occurrence of many literal keywords in one scan.
+
+    Scan cost depends on the length of the text, not on how many keywords
+    were added. Each keyword carries a payload that is reported on match.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, T]]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[T, ...]] = [()]
+
+        for word, payload in keywords:
+            if not word:
+                continue
+            state = 0
+            for char in word:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                    self._goto[state][char] = nxt
+                state = nxt
+            self._output[state] += (payload,)
+
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._output[nxt] += self._output[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def iter_matches(self, text: str) -> Iterator[T]:
+        """Yield the payload of every keyword occurrence in ``text``."""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                yield from output[state]
@@ -0,0 +1,128 @@
+"""Incrementally maintained dashboard counters.
+
+Each stat lives under ``analytics/{stat}/shards/{n}`` as a ``counts`` map of
+label -> count. Writers increment one random shard so concurrent visitors
+do not contend on a single document; readers sum the shards. Reading a
+stat costs ``ANALYTICS_COUNTER_SHARDS`` document reads regardless of how
+many visitors or conversations exist. Only the Firestore storage keeps
+these counters (see ``storage.FirestoreStorage.load_counter``); the SQLite
+storage computes the same labels with SQL.
+
+Ref labels come from the public visitor form, so they are normalized to a
+short ``[\w-]`` slug before they become map keys (Firestore field names).
+With ``ANALYTICS_REF_LABELS`` set anything else is counted as ``other``;
+without it at most ``ANALYTICS_MAX_REF_LABELS`` distinct labels are kept.
+The visitor document keeps the ref as entered.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import unicodedata
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Iterable, Mapping, Optional
+
+from ..core.config import settings
+
+ANALYTICS_COLLECTION = "analytics"
+SHARDS_COLLECTION = "shards"
+
+REF_STAT = "visit_ref"
+DAILY_STAT = "daily_visits"
+CATEGORY_STAT = "question_categories"
+
+DIRECT_LABEL = "direct"
+OTHER_LABEL = "other"
+MAX_REF_LENGTH = 40
+
+_REF_UNSAFE = re.compile(r"[^\w-]+")
+
+
+def normalize_ref(value: Optional[str]) -> str:
+    """Lower-case slug of a visit ref ("" when nothing usable is left).
+
+    Dots, slashes, spaces and other punctuation become ``-`` and leading or
+    trailing ``-``/``_`` are dropped, so a ref can never form a dotted field
+    path or a reserved ``__name__`` key.
+    """
+    if not value:
+        return ""
+    slug = _REF_UNSAFE.sub("-", unicodedata.normalize("NFKC", value).lower())
+    return slug.strip("-_")[:MAX_REF_LENGTH].rstrip("-_")
+
+
+def ref_label(visitor: Mapping[str, Any]) -> str:
+    """Dashboard label of a visitor's ref (before the ``cap_ref_labels`` cap)."""
+    label = normalize_ref(visitor.get("visit_ref")) or DIRECT_LABEL
+    allowed = settings.analytics_ref_labels
+    if allowed and label != DIRECT_LABEL and label not in {normalize_ref(ref) for ref in allowed}:
+        return OTHER_LABEL
+    return label
+
+
+def is_capped_label(label: str) -> bool:
+    """Whether ``label`` counts toward ``ANALYTICS_MAX_REF_LABELS``."""
+    return label not in (DIRECT_LABEL, OTHER_LABEL)
+
+
+def cap_ref_labels(counts: Mapping[str, int]) -> Counter:
+    """Keep the ``ANALYTICS_MAX_REF_LABELS`` most frequent labels; the rest count as ``other``."""
+    limit = settings.analytics_max_ref_labels
+    capped: Counter = Counter()
+    kept = 0
+    for label, count in Counter(counts).most_common():
+        if is_capped_label(label) and limit and kept >= limit:
+            label = OTHER_LABEL
+        elif is_capped_label(label):
+            kept += 1
+        capped[label] += count
+    return capped
+
+
+def day_label(moment: Any) -> str:
+    if isinstance(moment, datetime):
+        return moment.astimezone(timezone.utc).strftime("%Y-%m-%d")
+    return "unknown"
+
+
+def category_counts(conversations: Iterable[Mapping[str, Any]]) -> Counter:
+    """Answered (non-blocked) conversations per category."""
+    return Counter(
+        doc.get("category") or "general"
+        for doc in conversations
+        if not doc.get("is_blocked")
+    )
+
+
+def shard_ref(client, stat: str, shard: int):
+    return (
+        client.collection(ANALYTICS_COLLECTION)
+        .document(stat)
+        .collection(SHARDS_COLLECTION)
+        .document(str(shard))
+    )
+
+
+def add_increments(batch, client, stat: str, counts: Mapping[str, int]) -> None:
+    """Add one merge write incrementing ``counts`` on a random shard of ``stat``."""
+    from firebase_admin import firestore
+
+    counts = {label: value for label, value in counts.items() if value}
+    if not counts:
+        return
+    shard = random.randrange(max(1, settings.analytics_counter_shards))
+    batch.set(
+        shard_ref(client, stat, shard),
+        {"counts": {label: firestore.Increment(value) for label, value in counts.items()}},
+        merge=True,
+    )
+
+
+def add_visitor_increments(batch, client, ref: str) -> None:
+    """Count a new visitor under the ref label ``ref`` and by (UTC) day."""
+    add_increments(batch, client, REF_STAT, {ref: 1})
+    add_increments(
+        batch, client, DAILY_STAT, {day_label(datetime.now(timezone.utc)): 1}
+    )
@@ -2,27 +2,35 @@
 
 from __future__ import annotations
 
-from collections import Counter, defaultdict
+import base64
+import json
+from collections import Counter
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
-
-from firebase_admin import firestore
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from ..core.concurrency import gather_partial
 from ..core.config import settings
-from ..core.firebase import get_firestore_client
+from . import analytics_service
+from .log_writer import get_conversation_log_writer
+from .storage import get_storage
 
 
-def log_conversation(
+async def log_conversation(
     session_id: str,
     visitor_id: str,
     question: str,
     answer: str,
     category: Optional[str],
     is_blocked: bool,
+    prompt_version: Optional[str] = None,
 ) -> None:
-    """Persist a conversation entry."""
-    client = get_firestore_client()
-    client.collection("conversations").add(
+    """Queue a conversation entry for the write-behind logger.
+
+    ``prompt_version`` is the system prompt hash that produced the answer.
+    The timestamp is taken here rather than on commit so batching does not
+    shift it.
+    """
+    get_conversation_log_writer().submit(
         {
             "session_id": session_id,
             "visitor_id": visitor_id,
@@ -30,65 +38,111 @@ def log_conversation(
             "answer": answer,
             "category": category,
             "is_blocked": is_blocked,
-            "timestamp": firestore.SERVER_TIMESTAMP,
+            "prompt_version": prompt_version,
+            "timestamp": datetime.now(timezone.utc),
         }
     )
 
 
-def fetch_recent_conversations(limit: Optional[int] = None) -> List[Dict]:
+async def fetch_recent_conversations(limit: Optional[int] = None) -> List[Dict]:
     """Return recent conversation documents."""
-    client = get_firestore_client()
-    query = (
-        client.collection("conversations")
-        .order_by("timestamp", direction=firestore.Query.DESCENDING)
-        .limit(limit or settings.analytics_limit)
+    return await get_storage().recent_conversations(limit or settings.analytics_limit)
+
+
+def encode_cursor(timestamp: datetime, doc_id: str) -> str:
+    """Opaque page cursor: the (timestamp, document id) of the last row."""
+    raw = json.dumps({"t": timestamp.isoformat(), "id": doc_id}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of ``encode_cursor``; raises ValueError on malformed input."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(data["t"]), str(data["id"])
+    except (TypeError, KeyError, UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+async def fetch_conversation_page(
+    limit: int,
+    cursor: Optional[str] = None,
+    fields: Optional[Iterable[str]] = None,
+    category: Optional[str] = None,
+    is_blocked: Optional[bool] = None,
+    session_id: Optional[str] = None,
+) -> Tuple[List[Dict], Optional[str]]:
+    """Return one page of conversations, newest first, and the next cursor.
+
+    Pages are ordered by ``timestamp`` then document id, so a cursor resumes
+    exactly after the last row even when timestamps tie. ``fields`` limits
+    the transferred fields (``timestamp`` is always read for the cursor).
+    """
+    results = await get_storage().conversation_page(
+        limit + 1,
+        after=decode_cursor(cursor) if cursor else None,
+        fields=fields,
+        category=category,
+        is_blocked=is_blocked,
+        session_id=session_id,
     )
-    snapshots = query.stream()
-    results = []
-    for snap in snapshots:
-        doc = snap.to_dict()
-        doc["id"] = snap.id
-        results.append(doc)
-    return results
-
-
-def build_dashboard_stats() -> Dict[str, List[Dict]]:
-    """Compute high-level analytics for the dashboard."""
-    client = get_firestore_client()
-
-    visitor_docs = (
-        client.collection("visitors")
-        .order_by("created_at", direction=firestore.Query.DESCENDING)
-        .limit(settings.analytics_limit)
-        .stream()
+
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        last = results[-1]
+        next_cursor = encode_cursor(last["timestamp"], last["id"])
+    return results, next_cursor
+
+
+async def fetch_latest_visitors(limit: Optional[int] = None) -> List[Dict]:
+    """Return the most recently created visitor documents."""
+    return await get_storage().latest_visitors(limit or settings.analytics_limit)
+
+
+async def build_dashboard_stats() -> Dict[str, Any]:
+    """Compute high-level analytics for the dashboard.
+
+    Ref/day/category totals are all-time aggregates from the storage
+    (sharded counters on Firestore, ``GROUP BY`` on SQLite). Until the
+    Firestore counters are populated (see ``scripts/backfill_analytics.py``)
+    each total falls back to counting the latest ``analytics_limit``
+    documents as before.
+
+    All sources are queried concurrently, each bounded by
+    ``dashboard_query_timeout_seconds``. A source that fails or times out is
+    left empty (counters fall back as above) and listed in
+    ``missing_sources`` with ``partial`` set.
+    """
+    storage = get_storage()
+    results, failed = await gather_partial(
+        {
+            "visitors": fetch_latest_visitors(limit=settings.analytics_limit),
+            "conversations": fetch_recent_conversations(limit=settings.analytics_limit),
+            analytics_service.REF_STAT: storage.load_counter(
+                analytics_service.REF_STAT
+            ),
+            analytics_service.DAILY_STAT: storage.load_counter(
+                analytics_service.DAILY_STAT
+            ),
+            analytics_service.CATEGORY_STAT: storage.load_counter(
+                analytics_service.CATEGORY_STAT
+            ),
+        },
+        timeout=settings.dashboard_query_timeout_seconds,
     )
+    latest_visitors = results.get("visitors", [])
+    conversation_docs = results.get("conversations", [])
 
-    ref_counter = Counter()
-    daily_counter = defaultdict(int)
-    latest_visitors = []
-
-    for doc in visitor_docs:
-        data = doc.to_dict()
-        ref = data.get("visit_ref") or "direct"
-        ref_counter[ref] += 1
-
-        created_at = data.get("created_at")
-        if isinstance(created_at, datetime):
-            created_at = created_at.astimezone(timezone.utc)
-            day_key = created_at.strftime("%Y-%m-%d")
-        else:
-            day_key = "unknown"
-        daily_counter[day_key] += 1
-
-        data["id"] = doc.id
-        latest_visitors.append(data)
-
-    conversation_docs = fetch_recent_conversations(limit=settings.analytics_limit)
-    category_counter = Counter(
-        doc.get("category") or "general"
-        for doc in conversation_docs
-        if not doc.get("is_blocked")
+    ref_counter = results.get(analytics_service.REF_STAT) or Counter(
+        analytics_service.ref_label(data) for data in latest_visitors
     )
+    daily_counter = results.get(analytics_service.DAILY_STAT) or Counter(
+        analytics_service.day_label(data.get("created_at")) for data in latest_visitors
+    )
+    category_counter = results.get(
+        analytics_service.CATEGORY_STAT
+    ) or analytics_service.category_counts(conversation_docs)
 
     return {
         "ref_stats": [{"label": ref, "value": count} for ref, count in ref_counter.most_common()],
@@ -100,6 +154,6 @@ def build_dashboard_stats() -> Dict[str, List[Dict]]:
         ],
         "latest_visitors": latest_visitors,
         "recent_questions": conversation_docs,
+        "partial": bool(failed),
+        "missing_sources": failed,
     }
-
-
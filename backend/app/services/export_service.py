@@ -0,0 +1,173 @@
+"""Streaming export of the full conversation history.
+
+Conversations are read from the storage one cursor page at a time and each
+page is encoded and yielded before the next is fetched, so memory stays at
+one page regardless of how much history there is. Output is NDJSON or CSV,
+optionally gzip-compressed. CSV cells that a spreadsheet would read as a
+formula are prefixed with ``'``.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from . import analytics_service
+from .storage import CONVERSATION_FIELDS, IN_QUERY_LIMIT, get_storage
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_COLUMNS = ("id",) + CONVERSATION_FIELDS
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+DEFAULT_PAGE_SIZE = 500
+
+# Leading characters that make Excel/Sheets evaluate a cell as a formula.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+async def iter_conversations(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    ref: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield pages of conversations, newest first.
+
+    ``since`` is inclusive and ``until`` exclusive; naive datetimes are
+    taken as UTC. Conversations do not carry the visit ref, so ``ref`` (the
+    stored ``visit_ref``; ``direct`` means an empty, null or missing ref) is
+    resolved to its visitor sessions a page at a time, and conversations are
+    queried for up to ``IN_QUERY_LIMIT`` of those sessions at once. With
+    ``ref`` the rows are therefore newest first within each such group.
+    """
+    since, until = normalize_range(since, until)
+    storage = get_storage()
+    if ref is None:
+        async for rows in _pages(page_size, since, until):
+            yield rows
+        return
+
+    visit_ref = "" if ref == analytics_service.DIRECT_LABEL else ref
+    async for sessions in storage.iter_visitor_sessions(visit_ref, page_size):
+        for start in range(0, len(sessions), IN_QUERY_LIMIT):
+            group = sessions[start : start + IN_QUERY_LIMIT]
+            async for rows in _pages(page_size, since, until, session_ids=group):
+                yield rows
+
+
+async def _pages(
+    page_size: int,
+    since: Optional[datetime],
+    until: Optional[datetime],
+    session_ids: Optional[List[str]] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    storage = get_storage()
+    after = None
+    while True:
+        page = await storage.conversation_page(
+            page_size, after=after, since=since, until=until, session_ids=session_ids
+        )
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        after = (page[-1]["timestamp"], page[-1]["id"])
+
+
+def _as_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    if moment is not None and moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def normalize_range(
+    since: Optional[datetime], until: Optional[datetime]
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Return the bounds as aware datetimes; raises ValueError if empty."""
+    since, until = _as_utc(since), _as_utc(until)
+    if since is not None and until is not None and since >= until:
+        raise ValueError("`since` must be before `until`")
+    return since, until
+
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _ndjson_page(rows: List[Dict[str, Any]]) -> bytes:
+    return "".join(
+        json.dumps(
+            {column: _cell(row.get(column)) for column in EXPORT_COLUMNS},
+            ensure_ascii=False,
+        )
+        + "\n"
+        for row in rows
+    ).encode("utf-8")
+
+
+def _csv_cell(value: Any) -> Any:
+    value = _cell(value)
+    # Questions and answers are visitor-written: never let one run as a formula.
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_page(rows: List[Dict[str, Any]], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([_csv_cell(row.get(column)) for column in EXPORT_COLUMNS])
+    return buffer.getvalue().encode("utf-8")
+
+
+async def export_conversations(
+    fmt: str = "ndjson",
+    compress: bool = False,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    ref: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> AsyncIterator[bytes]:
+    """Yield the encoded export, one chunk per storage page.
+
+    A CSV export always starts with the header row, even when nothing matches.
+    With ``compress`` the chunks form a single gzip stream; every page is
+    sync-flushed so the client receives rows as they are read.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Use ndjson or csv.")
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def encode(data: bytes) -> bytes:
+        if compressor is None:
+            return data
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    if fmt == "csv":
+        yield encode(_csv_page([], header=True))
+    async for rows in iter_conversations(since, until, ref, page_size):
+        if fmt == "ndjson":
+            yield encode(_ndjson_page(rows))
+        else:
+            yield encode(_csv_page(rows, header=False))
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def export_filename(fmt: str, compress: bool, now: datetime) -> str:
+    name = f"conversations-{now:%Y%m%d-%H%M%S}.{fmt}"
+    return f"{name}.gz" if compress else name
+
@@ -3,16 +3,50 @@
 from __future__ import annotations
 
 import json
-from functools import lru_cache
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from ..core.config import settings
 
 
-@lru_cache
-def load_knowledge_pack() -> Dict[str, Any]:
-    """Load and cache the knowledge pack JSON file."""
+@dataclass(frozen=True)
+class KnowledgeSnapshot:
+    """The knowledge pack JSON and 309files markdown as read at one moment.
+
+    Snapshots are never modified; a reload reads a new one and swaps it in
+    with ``set_knowledge_snapshot``, so readers holding the old one keep a
+    consistent view.
+    """
+
+    pack: Dict[str, Any]
+    documents: Tuple[Tuple[str, str], ...]
+
+
+_snapshot: Optional[KnowledgeSnapshot] = None
+
+
+def read_knowledge_snapshot() -> KnowledgeSnapshot:
+    """Read the pack and markdown files from disk (no caching)."""
+    return KnowledgeSnapshot(
+        pack=_read_knowledge_pack(), documents=tuple(_read_markdown_documents())
+    )
+
+
+def get_knowledge_snapshot() -> KnowledgeSnapshot:
+    """Return the current snapshot, reading it on first use."""
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = read_knowledge_snapshot()
+    return _snapshot
+
+
+def set_knowledge_snapshot(snapshot: KnowledgeSnapshot) -> None:
+    global _snapshot
+    _snapshot = snapshot
+
+
+def _read_knowledge_pack() -> Dict[str, Any]:
     knowledge_path = Path(settings.knowledge_pack_path).resolve()
     if not knowledge_path.exists():
         raise FileNotFoundError(
@@ -24,10 +58,37 @@ def load_knowledge_pack() -> Dict[str, Any]:
         return json.load(source)
 
 
-def build_context_block() -> str:
-    """Format the knowledge pack into a prompt-friendly block."""
-    pack = load_knowledge_pack()
-    extra_documents = load_extra_documents()
+def load_knowledge_pack() -> Dict[str, Any]:
+    """Return the knowledge pack JSON of the current snapshot."""
+    return get_knowledge_snapshot().pack
+
+
+def build_context_block(
+    include_extra_documents: bool = True,
+    snapshot: Optional[KnowledgeSnapshot] = None,
+) -> str:
+    """Format the knowledge pack into a prompt-friendly block.
+
+    Pass ``include_extra_documents=False`` to get only the pack sections, e.g.
+    when the 309files markdown is injected through retrieval instead.
+    """
+    sections = build_context_sections(include_extra_documents, snapshot)
+    return "\n\n".join(text for _, text in sections)
+
+
+def build_context_sections(
+    include_extra_documents: bool = True,
+    snapshot: Optional[KnowledgeSnapshot] = None,
+) -> List[Tuple[str, str]]:
+    """Return the non-empty context sections as (name, text) in prompt order.
+
+    ``snapshot`` defaults to the current one.
+    """
+    snapshot = snapshot or get_knowledge_snapshot()
+    pack = snapshot.pack
+    extra_documents = (
+        load_extra_documents(snapshot=snapshot) if include_extra_documents else ""
+    )
 
     summary = pack.get("summary", "")
     collaboration = pack.get("collaboration_style", "")
@@ -62,28 +123,54 @@ def build_context_block() -> str:
     qa_templates_text = _format_qa_templates()
 
     sections = [
-        f"=== 309 SUMMARY ===\n{summary}",
-        f"=== SPEAKING STYLE ===\n{speaking_style}" if speaking_style else "",
-        f"=== COLLABORATION STYLE ===\n{collaboration}",
-        f"=== VALUES & DECISION FRAMEWORK ===\n{philosophy}",
-        f"=== PROJECT HIGHLIGHTS ===\n{highlights}",
-        f"=== QA TEMPLATES ===\n{qa_templates_text}" if qa_templates_text else "",
-        f"=== GUARDRAILS ===\n{guardrails_text}" if guardrails_text else "",
-        extra_documents,
+        ("summary", f"=== 309 SUMMARY ===\n{summary}"),
+        (
+            "speaking_style",
+            f"=== SPEAKING STYLE ===\n{speaking_style}" if speaking_style else "",
+        ),
+        ("collaboration_style", f"=== COLLABORATION STYLE ===\n{collaboration}"),
+        ("values", f"=== VALUES & DECISION FRAMEWORK ===\n{philosophy}"),
+        ("projects", f"=== PROJECT HIGHLIGHTS ===\n{highlights}"),
+        (
+            "qa_templates",
+            f"=== QA TEMPLATES ===\n{qa_templates_text}" if qa_templates_text else "",
+        ),
+        (
+            "guardrails",
+            f"=== GUARDRAILS ===\n{guardrails_text}" if guardrails_text else "",
+        ),
+        ("extra_documents", extra_documents),
     ]
 
-    return "\n\n".join(filter(None, sections))
+    return [(name, text) for name, text in sections if text]
+
+
+def extra_documents_dir() -> Path:
+    """Directory holding the raw 309 markdown files."""
+    return Path(settings.knowledge_pack_path).resolve().parent / "309files"
 
 
-@lru_cache
-def load_extra_documents(limit_chars: int = 20000) -> str:
-    """Load raw markdown files from knowledge_base/309files directory."""
-    pack_path = Path(settings.knowledge_pack_path).resolve()
-    base_dir = pack_path.parent / "309files"
+def knowledge_source_paths() -> List[Path]:
+    """Files whose content feeds the context block."""
+    paths = [Path(settings.knowledge_pack_path).resolve()]
+    base_dir = extra_documents_dir()
+    if base_dir.is_dir():
+        paths.extend(sorted(base_dir.glob("*.md")))
+    return paths
+
+
+def load_markdown_documents() -> List[Tuple[str, str]]:
+    """Return (heading, content) for each 309files markdown file in the snapshot."""
+    return list(get_knowledge_snapshot().documents)
+
+
+def _read_markdown_documents() -> List[Tuple[str, str]]:
+    """Read (heading, content) for each non-empty 309files markdown file."""
+    base_dir = extra_documents_dir()
     if not base_dir.exists() or not base_dir.is_dir():
-        return ""
+        return []
 
-    documents: List[str] = []
+    documents: List[Tuple[str, str]] = []
     for md_file in sorted(base_dir.glob("*.md")):
         try:
             content = md_file.read_text(encoding="utf-8").strip()
@@ -92,7 +179,19 @@ def load_extra_documents(limit_chars: int = 20000) -> str:
         if not content:
             continue
         heading = md_file.stem.replace("_", " ").title()
-        documents.append(f"=== 309 FILE: {heading} ===\n{content}")
+        documents.append((heading, content))
+    return documents
+
+
+def load_extra_documents(
+    limit_chars: int = 20000, snapshot: Optional[KnowledgeSnapshot] = None
+) -> str:
+    """Join the 309files markdown into one block, truncated to ``limit_chars``."""
+    snapshot = snapshot or get_knowledge_snapshot()
+    documents = [
+        f"=== 309 FILE: {heading} ===\n{content}"
+        for heading, content in snapshot.documents
+    ]
 
     if not documents:
         return ""
@@ -103,9 +202,9 @@ def load_extra_documents(limit_chars: int = 20000) -> str:
     return combined
 
 
-def get_allowed_topics() -> list[str]:
+def get_allowed_topics(pack: Optional[Dict[str, Any]] = None) -> list[str]:
     """Return pre-defined allowed question categories."""
-    pack = load_knowledge_pack()
+    pack = load_knowledge_pack() if pack is None else pack
     topics = pack.get("allowed_topics", [])
     if isinstance(topics, list):
         return topics
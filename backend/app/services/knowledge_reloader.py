@@ -0,0 +1,148 @@
+"""Hot reload of the system prompt, knowledge pack and 309files markdown.
+
+A background task checks the sources' (mtime, size) every
+``knowledge_reload_seconds``. When they change it compiles a new prompt
+snapshot and question matcher in a worker thread, then installs both with
+plain assignments on the event loop. Requests never rebuild anything: a
+request already running finishes on the snapshot it pinned, and the next
+one starts on the new version. A build that fails (e.g. a half-written
+JSON file) leaves the current snapshot in place and is retried once the
+files change again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import anyio
+
+from ..core.config import settings
+from . import llm_service, question_filter
+
+logger = logging.getLogger(__name__)
+
+
+class KnowledgeReloadError(RuntimeError):
+    """The sources changed but could not be compiled; the old snapshot stays."""
+
+
+def _build() -> Tuple[llm_service.CompiledPrompt, question_filter.QuestionMatcher]:
+    compiled = llm_service.compile_prompt()
+    return compiled, question_filter.build_matcher(compiled.knowledge.pack)
+
+
+class KnowledgeReloader:
+    """Polls the prompt sources and swaps in rebuilt snapshots off the request path."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._failed_sources: Optional[llm_service.SourceSignature] = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_reload_at: Optional[float] = None
+        self.last_build_ms: Optional[float] = None
+
+    def start(self) -> None:
+        """Start polling on the running event loop (no-op when interval is 0)."""
+        if self.interval <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.reload()
+            except KnowledgeReloadError:
+                pass  # Logged in reload(); retried when the files change again.
+            except Exception:  # noqa: BLE001 - keep watching
+                logger.exception("Knowledge source check failed")
+
+    async def reload(self, force: bool = False) -> Dict[str, Any]:
+        """Rebuild and swap the snapshot if the sources changed (or ``force``).
+
+        One rebuild runs at a time; a caller arriving meanwhile waits for it
+        and then usually finds nothing left to do.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            current = llm_service.current_prompt()
+            sources = await anyio.to_thread.run_sync(llm_service.source_signature)
+            unchanged = current is not None and sources == current.sources
+            if not force and (unchanged or sources == self._failed_sources):
+                version = current.version if current else None
+                return {"version": version, "previous_version": version, "rebuilt": False}
+
+            started = time.perf_counter()
+            try:
+                compiled, matcher = await anyio.to_thread.run_sync(_build)
+            except Exception as exc:
+                self._failed_sources = sources
+                self.failures += 1
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.error("Knowledge reload failed, keeping the current version: %s", exc)
+                raise KnowledgeReloadError(self.last_error) from exc
+            self.last_build_ms = round((time.perf_counter() - started) * 1000, 1)
+
+            # No await from here on: requests see either the old or the new pair.
+            question_filter.install_matcher(matcher, compiled.knowledge.pack)
+            llm_service.install_prompt(compiled)
+            self._failed_sources = None
+            self.last_error = None
+            self.reloads += 1
+            self.last_reload_at = time.time()
+            previous = current.version if current else None
+            logger.info(
+                "Knowledge reloaded %s -> %s in %.1f ms",
+                previous,
+                compiled.version,
+                self.last_build_ms,
+            )
+            return {
+                "version": compiled.version,
+                "previous_version": previous,
+                "rebuilt": True,
+                "build_ms": self.last_build_ms,
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        current = llm_service.current_prompt()
+        return {
+            "version": current.version if current else None,
+            "sources": len(current.sources) if current else 0,
+            "watching": self._task is not None and not self._task.done(),
+            "interval_seconds": self.interval,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_reload_at": self.last_reload_at,
+            "last_build_ms": self.last_build_ms,
+        }
+
+
+_reloader: Optional[KnowledgeReloader] = None
+
+
+def get_knowledge_reloader() -> KnowledgeReloader:
+    """Return the process-wide knowledge reloader."""
+    global _reloader
+    if _reloader is None:
+        _reloader = KnowledgeReloader(interval=settings.knowledge_reload_seconds)
+    return _reloader
@@ -2,44 +2,374 @@
 
 from __future__ import annotations
 
-from functools import lru_cache
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from openai import OpenAI
+import anyio
 
+from ..core.cache import SharedStreams, SingleFlight, TTLCache
 from ..core.config import settings
-from .knowledge_base import build_context_block
+from ..core.metrics import LLM_COMPLETIONS, LLM_TOKENS, record_stage, stage
+from .knowledge_base import (
+    KnowledgeSnapshot,
+    build_context_sections,
+    knowledge_source_paths,
+    read_knowledge_snapshot,
+    set_knowledge_snapshot,
+)
+from .llm_transport import (
+    LLMUnavailableError,
+    build_openai_client,
+    call_with_retries,
+)
+from .prompt_budget import (
+    PromptReport,
+    chat_tokens,
+    count_tokens,
+    pack_sections,
+    tokenizer_name,
+)
+from .question_filter import normalize_question
+from .retrieval import BM25Index, build_index
 
-_openai_client: Optional[OpenAI] = None
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
+logger = logging.getLogger(__name__)
 
-def get_openai_client() -> OpenAI:
-    """Lazy initialize the OpenAI client."""
+_openai_client: Optional[AsyncOpenAI] = None
+_answer_cache: TTLCache[str] = TTLCache(
+    max_entries=settings.answer_cache_size,
+    ttl_seconds=settings.answer_cache_ttl_seconds,
+)
+# Identical questions asked at the same time share one completion. Keyed like
+# the answer cache, so the leader's prompt must not depend on anything outside
+# the key (in particular the visitor): followers receive its answer verbatim.
+_inflight_answers: SingleFlight[str] = SingleFlight()
+# Streamed answers are coalesced the same way, with the same key.
+_inflight_streams: SharedStreams[str] = SharedStreams()
+
+TEMPERATURE = 0.35
+MAX_TOKENS = 600
+
+SYSTEM_PROMPT_PATH = (
+    Path(__file__).resolve().parent.parent / "prompts" / "system_prompt.txt"
+)
+
+SourceSignature = Tuple[Tuple[str, int, int], ...]
+
+
+# Tokens kept free for the user message when packing the static sections.
+USER_PAYLOAD_RESERVE = 256
+
+
+# Heading of the per-question message carrying retrieved 309files chunks.
+DOCUMENTS_HEADING = "## 질문 관련 참고 자료"
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    """Pre-rendered system prompt plus the file state it came from.
+
+    ``system`` is the whole template with the budget-packed knowledge pack
+    sections filled in. It is the same bytes for every request so OpenAI can
+    serve it from its prompt cache; the question-specific 309files chunks
+    picked by ``index`` go in a separate message after it.
+
+    A compiled prompt is an immutable, versioned snapshot of every prompt
+    source. A request uses one snapshot from start to finish, even if a
+    reload swaps in a newer one meanwhile.
+    """
+
+    system: str
+    system_tokens: int
+    index: BM25Index
+    chunk_tokens: Tuple[int, ...]
+    section_tokens: Dict[str, int]
+    version: str
+    sources: SourceSignature
+    knowledge: KnowledgeSnapshot
+
+    def render(
+        self, question: str, user_tokens: int
+    ) -> Tuple[Optional[str], PromptReport]:
+        """Return the retrieved-documents message for ``question`` and the report.
+
+        Retrieved chunks are added best-first while they fit in both the
+        ``extra_documents`` budget and what is left of the total budget. The
+        message is ``None`` when no chunk is selected.
+        """
+        if settings.retrieval_top_k > 0:
+            candidates = self.index.rank(question, settings.retrieval_top_k)
+        else:
+            candidates = list(range(len(self.index)))
+
+        fixed = chat_tokens([self.system, DOCUMENTS_HEADING]) + user_tokens
+        remaining = min(
+            settings.prompt_section_budgets.get("extra_documents", 0),
+            settings.prompt_token_budget - fixed,
+        )
+        selected = []
+        for idx in candidates:
+            cost = self.chunk_tokens[idx]
+            if cost <= remaining:
+                selected.append(idx)
+                remaining -= cost
+
+        sections = dict(self.section_tokens)
+        documents = None
+        contents = [self.system]
+        if selected:
+            documents = DOCUMENTS_HEADING + "".join(
+                "\n\n" + self.index.chunks[idx].render() for idx in sorted(selected)
+            )
+            contents.append(documents)
+            sections["extra_documents"] = sum(self.chunk_tokens[i] for i in selected)
+
+        report = PromptReport(
+            input_tokens=chat_tokens(contents) + user_tokens,
+            sections=sections,
+            budget=settings.prompt_token_budget,
+            tokenizer=tokenizer_name(),
+            prefix_tokens=self.system_tokens,
+        )
+        return documents, report
+
+
+_compiled_prompt: Optional[CompiledPrompt] = None
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Lazy initialize the shared, keep-alive pooled async OpenAI client."""
     global _openai_client
     if _openai_client is None:
         if not settings.openai_api_key:
             raise RuntimeError("OPENAI_API_KEY is not configured.")
-        _openai_client = OpenAI(api_key=settings.openai_api_key)
+        _openai_client = build_openai_client()
     return _openai_client
 
 
-@lru_cache
 def load_system_prompt() -> str:
-    """Load persona system prompt template."""
-    prompt_path = (
-        Path(__file__).resolve().parent.parent / "prompts" / "system_prompt.txt"
-    )
-    with prompt_path.open(encoding="utf-8") as prompt_file:
+    """Read the persona system prompt template from disk."""
+    with SYSTEM_PROMPT_PATH.open(encoding="utf-8") as prompt_file:
         return prompt_file.read().strip()
 
 
+def source_signature() -> SourceSignature:
+    """(path, mtime_ns, size) for every file the system prompt depends on."""
+    signature = []
+    for path in [SYSTEM_PROMPT_PATH, *knowledge_source_paths()]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            signature.append((str(path), -1, -1))
+            continue
+        signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def compile_prompt() -> CompiledPrompt:
+    """Read every prompt source from disk and build a new snapshot.
+
+    Pure apart from the file reads: nothing shared is touched, so it can run
+    in a worker thread while requests keep using the current snapshot. The
+    signature is taken before reading, so a file changed mid-read is picked
+    up again by the next check.
+    """
+    sources = source_signature()
+    template = load_system_prompt()
+    knowledge = read_knowledge_snapshot()
+    index = build_index(knowledge.documents, max_chars=settings.retrieval_chunk_chars)
+    packed = pack_sections(
+        build_context_sections(include_extra_documents=False, snapshot=knowledge),
+        budgets=settings.prompt_section_budgets,
+        total_budget=settings.prompt_token_budget
+        - count_tokens(template.format(knowledge_block=""))
+        - USER_PAYLOAD_RESERVE,
+    )
+
+    # The whole snapshot, not the truncated context block: retrieval indexes
+    # every document in full, so any edit can change an answer.
+    digest = hashlib.sha256(template.encode("utf-8"))
+    digest.update(
+        json.dumps(
+            [knowledge.pack, knowledge.documents],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        ).encode("utf-8")
+    )
+    digest.update(
+        json.dumps(
+            [
+                settings.prompt_token_budget,
+                settings.prompt_section_budgets,
+                settings.retrieval_chunk_chars,
+            ],
+            sort_keys=True,
+        ).encode("utf-8")
+    )
+    system = template.format(
+        knowledge_block="\n\n".join(section.text for section in packed)
+    )
+    return CompiledPrompt(
+        system=system,
+        system_tokens=chat_tokens([system]) - chat_tokens([]),
+        index=index,
+        # +2 for the blank line joining each chunk to the block.
+        chunk_tokens=tuple(
+            count_tokens(chunk.render()) + 2 for chunk in index.chunks
+        ),
+        section_tokens={section.name: section.tokens for section in packed},
+        version=digest.hexdigest()[:16],
+        sources=sources,
+        knowledge=knowledge,
+    )
+
+
+def install_prompt(compiled: CompiledPrompt) -> None:
+    """Make ``compiled`` the snapshot new requests use.
+
+    Plain reference assignments with no ``await`` in between, so on the
+    event loop the swap is atomic.
+    """
+    global _compiled_prompt
+    set_knowledge_snapshot(compiled.knowledge)
+    _compiled_prompt = compiled
+
+
+def current_prompt() -> Optional[CompiledPrompt]:
+    """The installed snapshot, or None before the first compile."""
+    return _compiled_prompt
+
+
+def get_compiled_prompt() -> CompiledPrompt:
+    """Return the current snapshot, compiling it on first use.
+
+    Later source changes are picked up by ``knowledge_reloader`` off the
+    request path; this never touches the disk once a snapshot exists.
+    """
+    if _compiled_prompt is None:
+        install_prompt(compile_prompt())
+    return _compiled_prompt
+
+
+def prompt_version() -> str:
+    """Content hash of the prompt template and the whole knowledge corpus."""
+    return get_compiled_prompt().version
+
+
+def answer_cache_key(
+    question: str, category: Optional[str], prompt: Optional[CompiledPrompt] = None
+) -> Tuple[str, str, str]:
+    """Cache key for an answer.
+
+    Visitor metadata is not part of the key, so recruiters asking the same
+    question share one completion; cacheable answers are therefore generated
+    without it (see ``build_user_payload``). The prompt version is part of
+    the key, so a knowledge reload stops serving answers built from the old
+    one.
+    """
+    version = (prompt or get_compiled_prompt()).version
+    return (normalize_question(question), category or "general", version)
+
+
+@dataclass
+class PromptCacheStats:
+    """Upstream prompt-cache usage reported in ``usage.prompt_tokens_details``.
+
+    Latency is the time to the first answer byte: the whole response for
+    plain completions, the first delta for streams. It is split by whether
+    the request hit the provider cache so the saving can be compared.
+    """
+
+    completions: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    cache_hits: int = 0
+    hit_latency_ms: float = 0.0
+    miss_latency_ms: float = 0.0
+
+    def record(self, usage, latency_ms: float) -> None:
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", None) or 0) if details else 0
+        self.completions += 1
+        self.prompt_tokens += usage.prompt_tokens or 0
+        self.cached_tokens += cached
+        LLM_COMPLETIONS.inc()
+        LLM_TOKENS.inc(usage.prompt_tokens or 0, kind="prompt")
+        LLM_TOKENS.inc(cached, kind="cached_prompt")
+        LLM_TOKENS.inc(usage.completion_tokens or 0, kind="completion")
+        if cached:
+            self.cache_hits += 1
+            self.hit_latency_ms += latency_ms
+        else:
+            self.miss_latency_ms += latency_ms
+        logger.info(
+            "completion usage: prompt=%d cached=%d latency=%.0fms",
+            usage.prompt_tokens or 0,
+            cached,
+            latency_ms,
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        misses = self.completions - self.cache_hits
+        return {
+            "upstream_completions": self.completions,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_tokens,
+            "prompt_cache_hits": self.cache_hits,
+            "prompt_cache_hit_ratio": round(
+                self.cached_tokens / self.prompt_tokens, 4
+            )
+            if self.prompt_tokens
+            else 0.0,
+            "cache_hit_latency_ms": round(self.hit_latency_ms / self.cache_hits, 1)
+            if self.cache_hits
+            else None,
+            "cache_miss_latency_ms": round(self.miss_latency_ms / misses, 1)
+            if misses
+            else None,
+        }
+
+
+_prompt_cache_stats = PromptCacheStats()
+
+
+def get_answer_cache_stats() -> Dict[str, Any]:
+    inflight = _inflight_answers.stats()
+    streams = _inflight_streams.stats()
+    return {
+        **_answer_cache.stats(),
+        "in_flight": inflight["in_flight"] + streams["in_flight"],
+        "coalesced_leaders": inflight["leaders"] + streams["leaders"],
+        "coalesced_waiters": inflight["collapsed"] + streams["collapsed"],
+        **_prompt_cache_stats.snapshot(),
+    }
+
+
 def build_user_payload(
     question: str,
     category: Optional[str],
-    visitor: Dict[str, str],
+    visitor: Optional[Dict[str, str]],
 ) -> str:
-    """Compose the user-facing payload that guides the answer."""
+    """Compose the user-facing payload that guides the answer.
+
+    ``visitor=None`` leaves the visitor line out; answers that may be served
+    to other visitors are built that way so they cannot address one of them.
+    """
+    category_text = f"질문 카테고리: {category or 'general'}"
+    if visitor is None:
+        return f"{category_text}\n질문: {question.strip()}"
     visitor_meta = ", ".join(
         filter(
             None,
@@ -50,7 +380,6 @@ def build_user_payload(
             ],
         )
     )
-    category_text = f"질문 카테고리: {category or 'general'}"
     return (
         f"{category_text}\n"
         f"방문자 정보: {visitor_meta or '익명 방문자'}\n"
@@ -58,34 +387,217 @@ def build_user_payload(
     )
 
 
-def generate_persona_answer(
+def build_messages(
+    question: str,
+    category: Optional[str],
+    visitor: Optional[Dict[str, str]],
+    prompt: Optional[CompiledPrompt] = None,
+) -> List[Dict[str, str]]:
+    """Return the chat messages sent to OpenAI for a single question."""
+    messages, _ = build_messages_with_report(question, category, visitor, prompt)
+    return messages
+
+
+def build_messages_with_report(
+    question: str,
+    category: Optional[str],
+    visitor: Optional[Dict[str, str]],
+    prompt: Optional[CompiledPrompt] = None,
+) -> Tuple[List[Dict[str, str]], PromptReport]:
+    """Return the chat messages plus their input-token accounting.
+
+    Messages go from most to least stable so the provider prompt cache can
+    reuse the longest prefix: the static system prompt, then the chunks
+    retrieved for this question, then the visitor/question payload.
+    ``prompt`` defaults to the current snapshot.
+    """
+    compiled = prompt or get_compiled_prompt()
+    user_payload = build_user_payload(question, category, visitor)
+    user_tokens = chat_tokens([user_payload]) - chat_tokens([])
+    documents, report = compiled.render(question, user_tokens)
+    if report.over_budget:
+        logger.warning(
+            "prompt over budget: %d > %d tokens", report.input_tokens, report.budget
+        )
+    else:
+        logger.info("prompt input tokens: %d", report.input_tokens)
+    messages = [{"role": "system", "content": compiled.system}]
+    if documents:
+        messages.append({"role": "system", "content": documents})
+    messages.append({"role": "user", "content": user_payload})
+    return messages, report
+
+
+async def generate_persona_answer(
     question: str,
     category: Optional[str],
     visitor: Dict[str, str],
+    use_cache: bool = True,
+    prompt: Optional[CompiledPrompt] = None,
+) -> str:
+    """Call OpenAI with persona/system prompts and the knowledge base.
+
+    Answers are served from the in-process answer cache when possible, and
+    concurrent calls with the same cache key share one upstream completion
+    or join an identical stream in flight (waiters get its answer or its
+    error). Since those answers reach other
+    visitors, they are generated without ``visitor``. ``use_cache=False``
+    forces a fresh, uncoalesced completion that does use it and is not
+    stored. ``prompt`` pins the snapshot the caller started with (default:
+    the current one).
+    """
+    prompt = prompt or get_compiled_prompt()
+    if not use_cache:
+        return await _complete_answer(question, category, visitor, None, prompt)
+
+    cache_key = answer_cache_key(question, category, prompt)
+    cached = _answer_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    streamed = await _inflight_streams.join(cache_key)
+    if streamed is not None:
+        return "".join(streamed) or settings.blocked_message
+    # visitor=None: the completion is shared with every caller coalesced onto it.
+    return await _inflight_answers.do(
+        cache_key,
+        lambda: _complete_answer(question, category, None, cache_key, prompt),
+    )
+
+
+async def _complete_answer(
+    question: str,
+    category: Optional[str],
+    visitor: Optional[Dict[str, str]],
+    cache_key: Optional[Tuple[str, str, str]],
+    prompt: CompiledPrompt,
 ) -> str:
-    """Call OpenAI with persona/system prompts and the knowledge base."""
     client = get_openai_client()
-    context_block = build_context_block()
-    system_prompt = load_system_prompt().format(knowledge_block=context_block)
-    user_payload = build_user_payload(question, category, visitor)
+    with stage("prompt"):
+        messages = build_messages(question, category, visitor, prompt)
 
+    started = time.perf_counter()
     try:
-        completion = client.chat.completions.create(
-            model=settings.openai_model,
-            temperature=0.35,
-            max_tokens=600,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {
-                    "role": "user",
-                    "content": user_payload,
-                },
-            ],
+        completion = await call_with_retries(
+            lambda timeout: client.chat.completions.create(
+                model=settings.openai_model,
+                temperature=TEMPERATURE,
+                max_tokens=MAX_TOKENS,
+                messages=messages,
+                timeout=timeout,
+            )
         )
+    except LLMUnavailableError:
+        raise
     except Exception as exc:  # pragma: no cover - upstream error
         raise RuntimeError(f"OpenAI API error: {exc}") from exc
+    elapsed = time.perf_counter() - started
+    record_stage("llm", elapsed)
+    _prompt_cache_stats.record(completion.usage, elapsed * 1000)
 
     message = completion.choices[0].message
-    return message.content or settings.blocked_message
+    if not message.content:
+        return settings.blocked_message
+    if cache_key is not None:
+        _answer_cache.set(cache_key, message.content)
+    return message.content
+
+
+async def stream_persona_answer(
+    question: str,
+    category: Optional[str],
+    visitor: Dict[str, str],
+    use_cache: bool = True,
+    prompt: Optional[CompiledPrompt] = None,
+) -> AsyncIterator[str]:
+    """Yield answer deltas from a streaming OpenAI completion.
+
+    A cached answer is yielded as a single delta, as is the result of an
+    identical non-streaming completion already in flight. Identical
+    concurrent streams share one upstream stream: joiners first get the
+    deltas already sent, then follow along. Closing the generator (e.g. when
+    the client disconnects) leaves the shared stream; once every reader has
+    left, the upstream HTTP response is closed so OpenAI stops generating
+    tokens. Only fully streamed answers are cached. As in
+    ``generate_persona_answer``, ``visitor`` is only sent with
+    ``use_cache=False``, and ``prompt`` pins the snapshot.
+    """
+    prompt = prompt or get_compiled_prompt()
+    if not use_cache:
+        deltas = _stream_completion(question, category, visitor, None, prompt)
+    else:
+        cache_key = answer_cache_key(question, category, prompt)
+        cached = _answer_cache.get(cache_key)
+        if cached is None:
+            cached = await _inflight_answers.join(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        # visitor=None: the stream is shared with every caller that joins it.
+        deltas = _inflight_streams.stream(
+            cache_key,
+            lambda: _stream_completion(question, category, None, cache_key, prompt),
+        )
+
+    async with aclosing(deltas):
+        async for delta in deltas:
+            yield delta
 
 
+async def _stream_completion(
+    question: str,
+    category: Optional[str],
+    visitor: Optional[Dict[str, str]],
+    cache_key: Optional[Tuple[str, str, str]],
+    prompt: CompiledPrompt,
+) -> AsyncIterator[str]:
+    client = get_openai_client()
+    with stage("prompt"):
+        messages = build_messages(question, category, visitor, prompt)
+
+    # Only opening the stream is retried; once deltas flow a failure ends it.
+    started = time.perf_counter()
+    try:
+        stream = await call_with_retries(
+            lambda timeout: client.chat.completions.create(
+                model=settings.openai_model,
+                temperature=TEMPERATURE,
+                max_tokens=MAX_TOKENS,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True},
+                timeout=timeout,
+            )
+        )
+    except LLMUnavailableError:
+        raise
+    except Exception as exc:  # pragma: no cover - upstream error
+        raise RuntimeError(f"OpenAI API error: {exc}") from exc
+
+    parts = []
+    first_delta_ms = None
+    try:
+        async for chunk in stream:
+            # With include_usage the last chunk carries usage and no choices.
+            if chunk.usage is not None:
+                _prompt_cache_stats.record(
+                    chunk.usage,
+                    first_delta_ms or (time.perf_counter() - started) * 1000,
+                )
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if first_delta_ms is None:
+                    first_delta_ms = (time.perf_counter() - started) * 1000
+                    record_stage("llm", first_delta_ms / 1000)
+                parts.append(delta)
+                yield delta
+    except Exception as exc:  # pragma: no cover - upstream error
+        raise RuntimeError(f"OpenAI API error: {exc}") from exc
+    finally:
+        # Shield the close so it still runs when the stream is cancelled.
+        with anyio.CancelScope(shield=True):
+            await stream.close()
+
+    if parts and cache_key is not None:
+        _answer_cache.set(cache_key, "".join(parts))
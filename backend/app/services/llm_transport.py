@@ -0,0 +1,230 @@
+"""Resilient transport for OpenAI calls.
+
+Every call runs under a deadline (``LLM_DEADLINE_SECONDS``) that covers all
+attempts. 429, 5xx, timeouts and connection errors are retried with
+exponential backoff plus jitter, honouring ``Retry-After`` when the server
+sends it, as long as the wait still fits in the deadline. Consecutive
+exhausted calls open a circuit breaker; while it is open calls fail fast with
+``LLMUnavailableError`` instead of queueing behind a degraded upstream.
+
+``openai`` and ``httpx`` are imported lazily to keep app start-up fast.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from ..core.config import settings
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+LLM_UNAVAILABLE_MESSAGE = (
+    "지금은 답변 서버가 혼잡해 응답할 수 없습니다. 잠시 후 다시 질문해 주세요."
+)
+
+
+class LLMUnavailableError(RuntimeError):
+    """OpenAI is degraded (breaker open or retries exhausted)."""
+
+    def __init__(self, detail: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(detail)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures.
+
+    While open every call is rejected until ``reset_seconds`` have passed;
+    then one trial call is let through (half-open) and its outcome closes or
+    re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def release_trial(self) -> None:
+        """End a call that says nothing about upstream health (a 401, a cancel)."""
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_running = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning("OpenAI circuit breaker opened after %d failures", self.failures)
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+
+_breaker = CircuitBreaker(
+    failure_threshold=settings.llm_breaker_failure_threshold,
+    reset_seconds=settings.llm_breaker_reset_seconds,
+)
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    return _breaker
+
+
+def build_openai_client() -> AsyncOpenAI:
+    """AsyncOpenAI over an explicitly sized keep-alive pool, without SDK retries."""
+    import httpx
+    from openai import AsyncOpenAI
+
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_seconds,
+        ),
+        timeout=httpx.Timeout(
+            settings.llm_attempt_timeout_seconds,
+            connect=settings.llm_connect_timeout_seconds,
+        ),
+    )
+    return AsyncOpenAI(
+        api_key=settings.openai_api_key,
+        base_url=settings.openai_base_url or None,
+        max_retries=0,
+        http_client=http_client,
+    )
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    import openai
+
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return isinstance(exc, asyncio.TimeoutError)
+
+
+def _retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Parse ``retry-after-ms`` / ``Retry-After`` (seconds or HTTP date)."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None  # Malformed: fall back to the normal backoff.
+    return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry number (0-based)."""
+    ceiling = min(settings.llm_backoff_max_seconds, settings.llm_backoff_base_seconds * 2**attempt)
+    return random.uniform(0, ceiling)
+
+
+async def call_with_retries(call: Callable[[float], Awaitable[T]]) -> T:
+    """Run ``call(timeout)`` under the LLM deadline, retry policy and breaker.
+
+    ``call`` receives the seconds left for that attempt. Non-retryable errors
+    (400, 401, ...) propagate unchanged and neither close nor trip the
+    breaker. A cancelled call (e.g. the client disconnected) counts as a
+    failure, so a half-open trial can never be left running.
+    """
+    if not _breaker.allow():
+        raise LLMUnavailableError(
+            "OpenAI circuit breaker is open", retry_after=_breaker.retry_after()
+        )
+    try:
+        return await _call_until_deadline(call)
+    except asyncio.CancelledError:
+        # A client disconnect says nothing about upstream health.
+        _breaker.release_trial()
+        raise
+
+
+async def _call_until_deadline(call: Callable[[float], Awaitable[T]]) -> T:
+    deadline = time.monotonic() + settings.llm_deadline_seconds
+    attempt = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        attempt_timeout = min(settings.llm_attempt_timeout_seconds, remaining)
+        try:
+            result = await asyncio.wait_for(call(attempt_timeout), attempt_timeout)
+        except Exception as exc:  # noqa: BLE001 - classified below
+            if not _is_retryable(exc):
+                _breaker.release_trial()
+                raise
+            delay = _retry_after_seconds(exc)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            remaining = deadline - time.monotonic()
+            if attempt >= settings.llm_max_retries or delay >= remaining:
+                _breaker.record_failure()
+                raise LLMUnavailableError(
+                    f"OpenAI unavailable after {attempt + 1} attempt(s): {exc}",
+                    retry_after=delay,
+                ) from exc
+            logger.info("OpenAI attempt %d failed (%s); retrying in %.2fs", attempt + 1, exc, delay)
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+        _breaker.record_success()
+        return result
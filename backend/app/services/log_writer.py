@@ -0,0 +1,333 @@
+"""Write-behind buffer for conversation logs.
+
+Requests only enqueue a document; a background task commits them in
+batches through the storage (on Firestore one ``WriteBatch`` round-trip per
+batch, together with the dashboard category counter increments; on SQLite
+one transaction). The queue is bounded: when it is full, or when a commit
+fails or times out, documents are appended to a local JSONL spill file and
+replayed once the storage accepts writes again, so request latency never
+includes the log write. Spill lines that no longer decode (e.g. cut short
+by a crash mid-write) are moved to a ``.corrupt`` file instead of blocking
+the replay.
+
+Every document gets its id on submit, so a batch whose commit timed out but
+landed anyway is replayed onto the same documents; the replay skips ids
+already stored rather than counting them again. Each process spills to its
+own ``<stem>.<pid><suffix>`` file and only adopts the files of processes
+that are no longer running, so workers sharing the path never replay each
+other's live spill.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..core.config import settings
+from .storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Firestore rejects batches with more than 500 writes; one is kept for the
+# category counter increment committed with each batch.
+MAX_BATCH_SIZE = 499
+# Minimum seconds between attempts to replay the spill file. A failed commit
+# also waits this long, so one that timed out has settled before its replay.
+REPLAY_INTERVAL = 30.0
+REPLAY_SUFFIX = ".replay"
+
+
+def _encode(doc: Dict[str, Any]) -> str:
+    return json.dumps(
+        doc,
+        ensure_ascii=False,
+        default=lambda value: value.isoformat() if isinstance(value, datetime) else str(value),
+    )
+
+
+def _pid_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)  # Signal 0 only checks that the process exists.
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _decode(line: str) -> Dict[str, Any]:
+    """Parse one spill line; raises ValueError when it is not a log document."""
+    doc = json.loads(line)
+    if not isinstance(doc, dict):
+        raise ValueError(f"expected a JSON object, got {type(doc).__name__}")
+    if isinstance(doc.get("timestamp"), str):
+        doc["timestamp"] = datetime.fromisoformat(doc["timestamp"])
+    return doc
+
+
+class ConversationLogWriter:
+    """Bounded queue drained into storage batch commits by one worker task.
+
+    A batch is committed when it reaches ``batch_size`` documents or when
+    ``flush_seconds`` have passed since its first document, whichever comes
+    first. ``close`` flushes what is left.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = 10_000,
+        batch_size: int = MAX_BATCH_SIZE,
+        flush_seconds: float = 1.0,
+        commit_timeout: float = 10.0,
+        spill_path: Optional[str] = None,
+    ) -> None:
+        self.queue_size = queue_size
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.flush_seconds = flush_seconds
+        self.commit_timeout = commit_timeout
+        self.spill_path = Path(spill_path) if spill_path else None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_replay = 0.0
+        self.written = 0
+        self.batches = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.dropped = 0
+        self.quarantined = 0
+
+    def start(self) -> None:
+        """Start the worker on the running event loop (idempotent)."""
+        if self._task is not None and not self._task.done():
+            return
+        previous = self._queue
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        # Carry over what a stopped worker (or one on an earlier event loop)
+        # left behind; a queue is never bound to more than one loop.
+        while previous is not None and not previous.empty():
+            doc = previous.get_nowait()
+            if doc is not None:
+                self._queue.put_nowait(doc)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, doc: Dict[str, Any]) -> None:
+        """Enqueue a document without waiting; spills to disk when full."""
+        if "id" not in doc:
+            doc = {**doc, "id": uuid.uuid4().hex}
+        self.start()
+        try:
+            self._queue.put_nowait(doc)
+        except asyncio.QueueFull:
+            self._spill([doc])
+
+    async def close(self, timeout: float = 30.0) -> None:
+        """Flush queued documents and stop the worker."""
+        if self._task is None or self._task.done():
+            return
+        await self._queue.put(None)
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Conversation log flush timed out; spilling the rest")
+            leftovers: List[Dict[str, Any]] = []
+            while not self._queue.empty():
+                doc = self._queue.get_nowait()
+                if doc is not None:
+                    leftovers.append(doc)
+            self._spill(leftovers)
+        self._task = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "written": self.written,
+            "batches": self.batches,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "dropped": self.dropped,
+            "quarantined": self.quarantined,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        await self._try_replay()
+        while True:
+            doc = await queue.get()
+            if doc is None:
+                return
+            batch = [doc]
+            deadline = loop.time() + self.flush_seconds
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    doc = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if doc is None:
+                    stop = True
+                    break
+                batch.append(doc)
+
+            try:
+                if await self._commit(batch):
+                    if queue.empty():
+                        await self._try_replay()
+                else:
+                    self._spill(batch)
+            except Exception:  # noqa: BLE001 - keep draining the queue
+                logger.exception("Conversation log worker failed on a batch of %d", len(batch))
+            if stop:
+                return
+
+    async def _try_replay(self) -> None:
+        # The worker must outlive any replay error, or queued logs stall.
+        try:
+            await self._replay_spill()
+        except Exception:  # noqa: BLE001 - retried after REPLAY_INTERVAL
+            logger.exception("Replaying the conversation log spill file failed")
+
+    async def _commit(self, docs: List[Dict[str, Any]], retry: bool = False) -> bool:
+        try:
+            await asyncio.wait_for(
+                get_storage().add_conversations(docs, retry=retry), self.commit_timeout
+            )
+        except Exception as exc:  # noqa: BLE001 - any failure falls back to disk
+            logger.warning("Conversation log batch of %d failed: %s", len(docs), exc)
+            # A timed-out commit may still land; replay only once it has.
+            self._last_replay = asyncio.get_running_loop().time()
+            return False
+        self.written += len(docs)
+        self.batches += 1
+        return True
+
+    def _spill_file(self) -> Path:
+        """This process's spill file, ``<stem>.<pid><suffix>``."""
+        return self.spill_path.with_name(
+            f"{self.spill_path.stem}.{os.getpid()}{self.spill_path.suffix}"
+        )
+
+    def _spill(self, docs: List[Dict[str, Any]]) -> None:
+        if not docs:
+            return
+        if self.spill_path is None:
+            self.dropped += len(docs)
+            logger.error("Dropped %d conversation logs (no spill file)", len(docs))
+            return
+        try:
+            with self._spill_file().open("a", encoding="utf-8") as handle:
+                handle.writelines(_encode(doc) + "\n" for doc in docs)
+        except OSError as exc:
+            self.dropped += len(docs)
+            logger.error("Dropped %d conversation logs (spill failed: %s)", len(docs), exc)
+            return
+        self.spilled += len(docs)
+
+    def _claimable(self) -> List[Path]:
+        """Spill files this process may replay, its own first.
+
+        Besides its own, the unsuffixed path (written before files were per
+        process) and the files of processes that are no longer running.
+        """
+        own = self._spill_file()
+        paths = [own.with_name(own.name + REPLAY_SUFFIX), own]
+        legacy = self.spill_path
+        paths += [legacy.with_name(legacy.name + REPLAY_SUFFIX), legacy]
+        prefix, suffix = f"{legacy.stem}.", legacy.suffix
+        for path in sorted(legacy.parent.glob(f"{prefix}*{suffix}*")):
+            name = path.name
+            if name.endswith(REPLAY_SUFFIX):
+                name = name[: -len(REPLAY_SUFFIX)]
+            pid = name[len(prefix) : len(name) - len(suffix)]
+            if (
+                name.endswith(suffix)
+                and pid.isdigit()
+                and int(pid) != os.getpid()
+                and not _pid_running(int(pid))
+            ):
+                paths.append(path)
+        return [path for path in paths if path.exists()]
+
+    async def _replay_spill(self) -> None:
+        """Commit spilled documents once the storage is reachable again."""
+        if self.spill_path is None:
+            return
+        now = asyncio.get_running_loop().time()
+        if self._last_replay and now - self._last_replay < REPLAY_INTERVAL:
+            return
+        sources = self._claimable()
+        if not sources:
+            return
+        self._last_replay = now
+
+        own = self._spill_file()
+        replay_path = own.with_name(own.name + REPLAY_SUFFIX)
+        for source in sources:
+            if source != replay_path:
+                try:
+                    # Atomic claim: of two workers adopting a file, one wins.
+                    os.replace(source, replay_path)
+                except FileNotFoundError:
+                    continue
+            if not await self._replay_file(replay_path):
+                return
+
+    async def _replay_file(self, replay_path: Path) -> bool:
+        """Replay one claimed file; False when the storage failed again."""
+        docs: List[Dict[str, Any]] = []
+        corrupt: List[str] = []
+        with replay_path.open(encoding="utf-8", errors="replace") as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                try:
+                    docs.append(_decode(line))
+                except ValueError:
+                    corrupt.append(line if line.endswith("\n") else line + "\n")
+        if corrupt:
+            self._quarantine(corrupt)
+
+        committed = True
+        for start in range(0, len(docs), self.batch_size):
+            chunk = docs[start : start + self.batch_size]
+            if not await self._commit(chunk, retry=True):
+                self._spill(docs[start:])
+                committed = False
+                break
+            self.replayed += len(chunk)
+        replay_path.unlink()
+        return committed
+
+    def _quarantine(self, lines: List[str]) -> None:
+        corrupt_path = self.spill_path.with_suffix(self.spill_path.suffix + ".corrupt")
+        with corrupt_path.open("a", encoding="utf-8") as handle:
+            handle.writelines(lines)
+        self.quarantined += len(lines)
+        logger.error(
+            "Moved %d undecodable conversation log lines to %s", len(lines), corrupt_path
+        )
+
+
+_writer: Optional[ConversationLogWriter] = None
+
+
+def get_conversation_log_writer() -> ConversationLogWriter:
+    """Return the process-wide conversation log writer."""
+    global _writer
+    if _writer is None:
+        _writer = ConversationLogWriter(
+            queue_size=settings.conversation_log_queue_size,
+            batch_size=settings.conversation_log_batch_size,
+            flush_seconds=settings.conversation_log_flush_seconds,
+            spill_path=settings.conversation_log_spill_path or None,
+        )
+    return _writer
@@ -0,0 +1,167 @@
+"""Token counting and budgeted packing of prompt sections.
+
+Budgets are counted with a conservative per-character estimate: Hangul and
+other non-ASCII characters count as one token each, ASCII as a quarter
+token. It over-counts (Korean most), so a budget packs somewhat less than
+the model would accept. ``tiktoken`` is deliberately not a dependency: it
+downloads its BPE files on first use, which would land on the cold-start
+path. When it is installed and its encoding files are already cached
+locally (``TIKTOKEN_CACHE_DIR``), exact counts are used instead;
+``tokenizer_name()`` reports which one is active.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sections that get their budget first. Anything not listed goes last.
+SECTION_PRIORITY = (
+    "guardrails",
+    "speaking_style",
+    "summary",
+    "qa_templates",
+    "values",
+    "collaboration_style",
+    "projects",
+    "extra_documents",
+)
+
+# Fixed chat-format overhead per message and per request (OpenAI cookbook).
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REQUEST = 3
+
+_ASCII_WEIGHT = 0.25
+
+
+@lru_cache
+def _get_encoding():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(settings.openai_model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:  # pragma: no cover - encoding files unavailable offline
+        logger.warning("tiktoken encoding unavailable, using token estimate")
+        return None
+
+
+def tokenizer_name() -> str:
+    encoding = _get_encoding()
+    return encoding.name if encoding is not None else "estimate"
+
+
+def _char_weight(char: str) -> float:
+    return _ASCII_WEIGHT if char.isascii() else 1.0
+
+
+def count_tokens(text: str) -> int:
+    """Return the number of tokens ``text`` encodes to."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    ascii_chars = sum(1 for char in text if char.isascii())
+    return int(ascii_chars * _ASCII_WEIGHT + (len(text) - ascii_chars) + 0.999)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to at most ``max_tokens`` tokens, marking the cut."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    marker = "\n... (truncated)"
+    limit = max_tokens - count_tokens(marker)
+    if limit <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is not None:
+        cut = encoding.decode(encoding.encode(text)[:limit])
+    else:
+        used = 0.0
+        end = 0
+        for end, char in enumerate(text):
+            used += _char_weight(char)
+            if used > limit:
+                break
+        else:
+            end = len(text)
+        cut = text[:end]
+    return cut.rstrip() + marker
+
+
+@dataclass(frozen=True)
+class PackedSection:
+    name: str
+    text: str
+    tokens: int
+
+
+def _priority(name: str) -> int:
+    try:
+        return SECTION_PRIORITY.index(name)
+    except ValueError:
+        return len(SECTION_PRIORITY)
+
+
+def pack_sections(
+    sections: Sequence[Tuple[str, str]],
+    budgets: Mapping[str, int],
+    total_budget: int,
+) -> List[PackedSection]:
+    """Fit sections into per-section and total token budgets.
+
+    Sections are funded in ``SECTION_PRIORITY`` order, each capped by its own
+    budget (unbudgeted sections are only capped by what is left), and returned
+    in their original order. Sections that get no tokens are dropped.
+    """
+    remaining = total_budget
+    packed: Dict[int, PackedSection] = {}
+    order = sorted(range(len(sections)), key=lambda idx: _priority(sections[idx][0]))
+    for idx in order:
+        name, text = sections[idx]
+        allowance = min(budgets.get(name, remaining), remaining)
+        fitted = truncate_to_tokens(text, allowance)
+        if not fitted:
+            logger.info("prompt section %s dropped (budget exhausted)", name)
+            continue
+        tokens = count_tokens(fitted)
+        remaining -= tokens
+        packed[idx] = PackedSection(name=name, text=fitted, tokens=tokens)
+    return [packed[idx] for idx in sorted(packed)]
+
+
+@dataclass(frozen=True)
+class PromptReport:
+    """Token accounting for one request's input messages."""
+
+    input_tokens: int
+    sections: Dict[str, int]
+    budget: int
+    tokenizer: str
+    # Tokens of the leading static system message (cacheable upstream).
+    prefix_tokens: int = 0
+
+    @property
+    def over_budget(self) -> bool:
+        return self.input_tokens > self.budget
+
+
+def chat_tokens(contents: Sequence[str]) -> int:
+    """Input tokens for a chat request made of ``contents`` messages."""
+    return TOKENS_PER_REQUEST + sum(
+        TOKENS_PER_MESSAGE + count_tokens(text) for text in contents
+    )
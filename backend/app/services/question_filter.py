@@ -3,10 +3,13 @@
 from __future__ import annotations
 
 import re
-from typing import Optional, Tuple
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from ..core.config import settings
-from .knowledge_base import get_allowed_topics
+from .aho_corasick import AhoCorasick
+from .knowledge_base import get_allowed_topics, load_knowledge_pack
 
 BANNED_MESSAGE = settings.blocked_message
 OUT_OF_SCOPE_MESSAGE = (
@@ -39,20 +42,135 @@ QUESTION_CATEGORIES = {
 
 
 def _normalize(text: str) -> str:
-    return text.strip().lower()
+    return unicodedata.normalize("NFKC", text).strip().casefold()
+
+
+def normalize_question(text: str) -> str:
+    """Canonical form used to compare questions (cache keys, coalescing).
+
+    Applies NFKC (composes Hangul jamo, folds full-width forms), casefolds,
+    drops punctuation/symbols and collapses whitespace.
+    """
+    folded = unicodedata.normalize("NFKC", text).casefold()
+    kept = [
+        " " if unicodedata.category(char)[0] in ("P", "S") else char
+        for char in folded
+    ]
+    return " ".join("".join(kept).split())
+
+
+_OPTIONAL_GROUP_RE = re.compile(r"\(([^()\\.^$*+?{}\[\]|]*)\)\?")
+_REGEX_META = set("\\.^$*+?{}[]|()")
+
+
+def _expand_optional_groups(pattern: str) -> Optional[List[str]]:
+    """Expand ``a (b)? c`` into literals, or return None for other regex syntax."""
+    parts = _OPTIONAL_GROUP_RE.split(pattern)
+    # split() alternates literal text and captured optional group contents.
+    if any(_REGEX_META & set(part) for part in parts[::2]):
+        return None
+    variants = [""]
+    for idx, part in enumerate(parts):
+        if idx % 2 == 0:
+            variants = [variant + part for variant in variants]
+        else:
+            variants = [variant + extra for variant in variants for extra in ("", part)]
+    return variants
+
+
+@dataclass(frozen=True)
+class ScanResult:
+    banned: bool
+    category: Optional[str]
+    topic: Optional[str]
+
+
+class QuestionMatcher:
+    """Finds banned phrases, category keywords and allowed topics in one pass.
+
+    All literals go into one Aho-Corasick automaton, so the per-question cost
+    depends on the question length rather than on the keyword lists. Banned
+    patterns are expanded into literals when they only use ``(...)?`` groups;
+    anything more complex is kept in a single fallback regex.
+    """
+
+    def __init__(
+        self,
+        banned_patterns: Sequence[str],
+        categories: Dict[str, Sequence[str]],
+        topics: Sequence[str],
+    ) -> None:
+        self.category_names = list(categories)
+        self.topics = list(topics)
+
+        keywords: List[Tuple[str, Tuple[str, int]]] = []
+        residual: List[str] = []
+        for pattern in banned_patterns:
+            variants = _expand_optional_groups(pattern)
+            if variants is None:
+                residual.append(pattern)
+                continue
+            keywords.extend((_normalize(variant), ("b", 0)) for variant in variants)
+        for idx, words in enumerate(categories.values()):
+            keywords.extend((_normalize(word), ("c", idx)) for word in words)
+        for idx, topic in enumerate(self.topics):
+            keywords.append((_normalize(topic), ("t", idx)))
+
+        self._automaton = AhoCorasick(keywords)
+        self._residual = re.compile("|".join(residual)) if residual else None
+
+    def scan(self, normalized_text: str) -> ScanResult:
+        """Scan text already passed through ``_normalize``."""
+        banned = False
+        best_category: Optional[int] = None
+        best_topic: Optional[int] = None
+        for kind, idx in self._automaton.iter_matches(normalized_text):
+            if kind == "b":
+                banned = True
+            elif kind == "c":
+                if best_category is None or idx < best_category:
+                    best_category = idx
+            elif best_topic is None or idx < best_topic:
+                best_topic = idx
+
+        if not banned and self._residual is not None:
+            banned = self._residual.search(normalized_text) is not None
+
+        return ScanResult(
+            banned=banned,
+            category=(
+                self.category_names[best_category] if best_category is not None else None
+            ),
+            topic=self.topics[best_topic] if best_topic is not None else None,
+        )
+
+
+_matcher: Optional[QuestionMatcher] = None
+_matcher_pack: Optional[Dict] = None
+
+
+def build_matcher(pack: Dict) -> QuestionMatcher:
+    """Compile a matcher for ``pack``'s allowed topics."""
+    return QuestionMatcher(BANNED_PATTERNS, QUESTION_CATEGORIES, get_allowed_topics(pack))
+
+
+def install_matcher(matcher: QuestionMatcher, pack: Dict) -> None:
+    """Use a matcher prebuilt for ``pack`` (the knowledge reloader's swap)."""
+    global _matcher, _matcher_pack
+    _matcher, _matcher_pack = matcher, pack
+
+
+def get_matcher() -> QuestionMatcher:
+    """Return the compiled matcher, rebuilding it when the pack was reloaded."""
+    pack = load_knowledge_pack()
+    if _matcher is None or _matcher_pack is not pack:
+        install_matcher(build_matcher(pack), pack)
+    return _matcher
 
 
 def detect_category(question: str) -> Optional[str]:
-    lowered = _normalize(question)
-    for category, keywords in QUESTION_CATEGORIES.items():
-        if any(keyword in lowered for keyword in keywords):
-            return category
-
-    for topic in get_allowed_topics():
-        if topic.lower() in lowered:
-            return topic
-
-    return None
+    result = get_matcher().scan(_normalize(question))
+    return result.category or result.topic
 
 
 def validate_question(question: str) -> Tuple[bool, Optional[str], Optional[str]]:
@@ -62,17 +180,14 @@ def validate_question(question: str) -> Tuple[bool, Optional[str], Optional[str]
     if not lowered:
         return False, None, "질문이 비어 있습니다."
 
-    for pattern in BANNED_PATTERNS:
-        if re.search(pattern, lowered, flags=re.IGNORECASE):
-            return False, None, BANNED_MESSAGE
+    result = get_matcher().scan(lowered)
+    if result.banned:
+        return False, None, BANNED_MESSAGE
 
+    category = result.category or result.topic
     if "309" not in lowered:
-        category = detect_category(lowered)
         if not category:
             return False, None, OUT_OF_SCOPE_MESSAGE
         return True, category, None
 
-    category = detect_category(lowered) or "general"
-    return True, category, None
-
-
+    return True, category or "general", None
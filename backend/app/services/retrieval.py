@@ -0,0 +1,146 @@
+"""Local BM25 retrieval over the 309files markdown.
+
+Only the chunks relevant to a question are injected into the prompt, so the
+prompt grows with the question rather than with the size of the corpus.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+_WORD_RE = re.compile(r"[a-z0-9]+|[가-힣]+")
+_HEADING_RE = re.compile(r"^#{1,6}\s*(.*)$")
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A retrievable slice of a markdown document."""
+
+    source: str
+    heading: str
+    text: str
+
+    def render(self) -> str:
+        title = f"{self.source} / {self.heading}" if self.heading else self.source
+        return f"=== 309 FILE: {title} ===\n{self.text}"
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into latin/digit words and Hangul character bigrams.
+
+    Bigrams keep recall for Korean, where particles are glued to nouns
+    (경력은/경력을 both share 경력).
+    """
+    normalized = unicodedata.normalize("NFKC", text).casefold()
+    tokens: List[str] = []
+    for word in _WORD_RE.findall(normalized):
+        if word[0] < "가":
+            tokens.append(word)
+        elif len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i : i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """Pack paragraphs into pieces of at most ``max_chars`` (best effort)."""
+    pieces: List[str] = []
+    current: List[str] = []
+    size = 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and size + len(paragraph) > max_chars:
+            pieces.append("\n\n".join(current))
+            current, size = [], 0
+        while len(paragraph) > max_chars:
+            pieces.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        current.append(paragraph)
+        size += len(paragraph)
+    if current:
+        pieces.append("\n\n".join(current))
+    return pieces
+
+
+def chunk_markdown(source: str, content: str, max_chars: int) -> List[Chunk]:
+    """Split a markdown document on headings, then on paragraphs."""
+    sections: List[Tuple[str, List[str]]] = [("", [])]
+    for line in content.splitlines():
+        match = _HEADING_RE.match(line.strip())
+        if match:
+            sections.append((match.group(1).strip(), [line]))
+        else:
+            sections[-1][1].append(line)
+
+    chunks: List[Chunk] = []
+    for heading, lines in sections:
+        body = "\n".join(lines).strip()
+        if not body or body.lstrip("#").strip() == heading:
+            continue
+        for piece in _split_long(body, max_chars):
+            chunks.append(Chunk(source=source, heading=heading, text=piece))
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of chunks with an inverted index."""
+
+    def __init__(self, chunks: Sequence[Chunk]) -> None:
+        self.chunks = list(chunks)
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._lengths: List[int] = []
+        for idx, chunk in enumerate(self.chunks):
+            counts = Counter(tokenize(f"{chunk.heading}\n{chunk.text}"))
+            self._lengths.append(sum(counts.values()))
+            for term, freq in counts.items():
+                self._postings[term].append((idx, freq))
+
+        total = len(self.chunks)
+        self._avg_length = (sum(self._lengths) / total) if total else 0.0
+        self._idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def search(self, query: str, top_k: int) -> List[Chunk]:
+        """Return up to ``top_k`` chunks in document order, best matches only."""
+        return [self.chunks[idx] for idx in sorted(self.rank(query, top_k))]
+
+    def rank(self, query: str, top_k: int) -> List[int]:
+        """Return the positions of the ``top_k`` best chunks, best first."""
+        if top_k <= 0 or not self.chunks:
+            return []
+
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term]
+            for idx, freq in postings:
+                norm = 1 - BM25_B + BM25_B * self._lengths[idx] / self._avg_length
+                scores[idx] += idf * freq * (BM25_K1 + 1) / (freq + BM25_K1 * norm)
+
+        return sorted(scores, key=lambda idx: scores[idx], reverse=True)[:top_k]
+
+
+def build_index(documents: Iterable[Tuple[str, str]], max_chars: int) -> BM25Index:
+    """Chunk (heading, content) documents and index them."""
+    chunks: List[Chunk] = []
+    for source, content in documents:
+        chunks.extend(chunk_markdown(source, content, max_chars))
+    return BM25Index(chunks)
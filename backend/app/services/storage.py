@@ -0,0 +1,604 @@
+"""Persistence for visitors, conversations and dashboard aggregates.
+
+``firestore`` stores everything in Firestore (aggregates as the sharded
+counters of ``analytics_service``). ``sqlite`` keeps it in one local WAL
+database for self-hosted and single-box deployments: writes are local
+transactions and the aggregates are ``GROUP BY`` queries over indexed
+columns, so no counters are maintained. Select one with
+``STORAGE_BACKEND``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+import anyio
+
+from ..core.config import settings
+from ..core.firebase import get_async_firestore_client
+from . import analytics_service
+
+logger = logging.getLogger(__name__)
+
+VISITORS_COLLECTION = "visitors"
+CONVERSATIONS_COLLECTION = "conversations"
+# How often the ref labels already in the counter are re-read for the cap.
+REF_LABELS_REFRESH_SECONDS = 300.0
+
+# Columns a conversation page may be projected to.
+CONVERSATION_FIELDS = (
+    "session_id",
+    "visitor_id",
+    "question",
+    "answer",
+    "category",
+    "is_blocked",
+    "prompt_version",
+    "timestamp",
+)
+
+T = TypeVar("T")
+
+# (timestamp, document id) of the last row of the previous page.
+PageCursor = Tuple[datetime, str]
+# Most values a Firestore ``in`` filter accepts.
+IN_QUERY_LIMIT = 30
+
+
+class Storage(Protocol):
+    def connect(self) -> None:
+        """Open clients or connections ahead of the first request."""
+
+    async def create_visitor(self, record: Dict[str, Any]) -> None:
+        """Persist a visitor keyed by ``record["session_id"]``."""
+
+    async def get_visitor(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the visitor with ``id`` set, or None."""
+
+    async def latest_visitors(self, limit: int) -> List[Dict[str, Any]]:
+        """Most recently created visitors, newest first."""
+
+    def iter_visitor_sessions(
+        self, visit_ref: str, page_size: int
+    ) -> AsyncIterator[List[str]]:
+        """Session ids of visitors with this ``visit_ref``, one page at a time.
+
+        An empty ``visit_ref`` also matches visitors whose ref is null or
+        missing.
+        """
+
+    async def add_conversations(
+        self, docs: Sequence[Dict[str, Any]], retry: bool = False
+    ) -> None:
+        """Persist conversation logs atomically (all or none).
+
+        Each document is stored under its ``id``. With ``retry`` (a batch
+        whose earlier commit may have landed) ids already stored are skipped
+        and not counted again.
+        """
+
+    async def recent_conversations(self, limit: int) -> List[Dict[str, Any]]:
+        """Most recent conversations, newest first."""
+
+    async def conversation_page(
+        self,
+        limit: int,
+        after: Optional[PageCursor] = None,
+        fields: Optional[Iterable[str]] = None,
+        category: Optional[str] = None,
+        is_blocked: Optional[bool] = None,
+        session_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        session_ids: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Up to ``limit`` conversations ordered by (timestamp, id) descending.
+
+        ``since`` is inclusive and ``until`` exclusive. ``session_ids`` keeps
+        the conversations of those sessions (at most ``IN_QUERY_LIMIT``).
+        """
+
+    async def load_counter(self, stat: str) -> Counter:
+        """All-time label -> count totals for an ``analytics_service`` stat."""
+
+
+class FirestoreStorage:
+    """Firestore collections plus sharded ``analytics`` counters."""
+
+    def __init__(self) -> None:
+        self._ref_labels: Optional[Set[str]] = None
+        self._ref_labels_at = 0.0
+
+    def connect(self) -> None:
+        get_async_firestore_client()
+
+    async def create_visitor(self, record: Dict[str, Any]) -> None:
+        """Write the visitor and, concurrently, its ref/day counter increments.
+
+        The counters are best-effort: a failed increment is logged (the
+        backfill script repairs them) instead of failing the registration.
+        """
+        from firebase_admin import firestore
+
+        client = get_async_firestore_client()
+        visitor = client.collection(VISITORS_COLLECTION).document(record["session_id"])
+        await asyncio.gather(
+            visitor.set({**record, "created_at": firestore.SERVER_TIMESTAMP}),
+            self._count_visitor(record),
+        )
+
+    async def _count_visitor(self, record: Dict[str, Any]) -> None:
+        try:
+            client = get_async_firestore_client()
+            batch = client.batch()
+            analytics_service.add_visitor_increments(
+                batch, client, await self._capped_ref_label(record)
+            )
+            await batch.commit()
+        except Exception:  # noqa: BLE001 - counters must not fail a registration
+            logger.warning("Visitor counter update failed", exc_info=True)
+
+    async def _capped_ref_label(self, record: Dict[str, Any]) -> str:
+        """``ref_label``, or ``other`` once ``ANALYTICS_MAX_REF_LABELS`` labels exist.
+
+        The existing labels are re-read every ``REF_LABELS_REFRESH_SECONDS``,
+        so several workers can together overshoot the cap by a few labels.
+        """
+        label = analytics_service.ref_label(record)
+        limit = settings.analytics_max_ref_labels
+        if not limit or not analytics_service.is_capped_label(label):
+            return label
+        now = time.monotonic()
+        if self._ref_labels is None or now - self._ref_labels_at > REF_LABELS_REFRESH_SECONDS:
+            counts = await self.load_counter(analytics_service.REF_STAT)
+            self._ref_labels = {
+                known for known in counts if analytics_service.is_capped_label(known)
+            }
+            self._ref_labels_at = now
+        if label not in self._ref_labels:
+            if len(self._ref_labels) >= limit:
+                return analytics_service.OTHER_LABEL
+            self._ref_labels.add(label)
+        return label
+
+    async def get_visitor(self, session_id: str) -> Optional[Dict[str, Any]]:
+        client = get_async_firestore_client()
+        doc = await client.collection(VISITORS_COLLECTION).document(session_id).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        data["id"] = doc.id
+        return data
+
+    async def latest_visitors(self, limit: int) -> List[Dict[str, Any]]:
+        from firebase_admin import firestore
+
+        query = (
+            get_async_firestore_client()
+            .collection(VISITORS_COLLECTION)
+            .order_by("created_at", direction=firestore.Query.DESCENDING)
+            .limit(limit)
+        )
+        return await _collect(query)
+
+    async def iter_visitor_sessions(
+        self, visit_ref: str, page_size: int
+    ) -> AsyncIterator[List[str]]:
+        """A query can't match a missing field, so ``""`` scans every visitor."""
+        from firebase_admin import firestore
+
+        query = (
+            get_async_firestore_client()
+            .collection(VISITORS_COLLECTION)
+            .select(["visit_ref"])
+            .order_by("__name__")
+            .limit(page_size)
+        )
+        if visit_ref:
+            query = query.where(filter=firestore.FieldFilter("visit_ref", "==", visit_ref))
+        last = None
+        while True:
+            page = query if last is None else query.start_after({"__name__": last})
+            snaps = [snap async for snap in page.stream()]
+            sessions = [
+                snap.id
+                for snap in snaps
+                if visit_ref or not (snap.to_dict() or {}).get("visit_ref")
+            ]
+            if sessions:
+                yield sessions
+            if len(snaps) < page_size:
+                return
+            last = snaps[-1].id
+
+    async def add_conversations(
+        self, docs: Sequence[Dict[str, Any]], retry: bool = False
+    ) -> None:
+        """One ``WriteBatch`` with the documents and the category increments.
+
+        A retry reads the ids first: the increments are not idempotent, so a
+        document that already landed must not be counted twice.
+        """
+        client = get_async_firestore_client()
+        collection = client.collection(CONVERSATIONS_COLLECTION)
+        refs = [collection.document(doc.get("id")) for doc in docs]
+        if retry:
+            stored = {snap.id async for snap in client.get_all(refs) if snap.exists}
+            pending = [(ref, doc) for ref, doc in zip(refs, docs) if ref.id not in stored]
+            refs, docs = [ref for ref, _ in pending], [doc for _, doc in pending]
+            if not docs:
+                return
+        batch = client.batch()
+        for ref, doc in zip(refs, docs):
+            batch.set(ref, {key: value for key, value in doc.items() if key != "id"})
+        analytics_service.add_increments(
+            batch,
+            client,
+            analytics_service.CATEGORY_STAT,
+            analytics_service.category_counts(docs),
+        )
+        await batch.commit()
+
+    async def recent_conversations(self, limit: int) -> List[Dict[str, Any]]:
+        from firebase_admin import firestore
+
+        query = (
+            get_async_firestore_client()
+            .collection(CONVERSATIONS_COLLECTION)
+            .order_by("timestamp", direction=firestore.Query.DESCENDING)
+            .limit(limit)
+        )
+        return await _collect(query)
+
+    async def conversation_page(
+        self,
+        limit: int,
+        after: Optional[PageCursor] = None,
+        fields: Optional[Iterable[str]] = None,
+        category: Optional[str] = None,
+        is_blocked: Optional[bool] = None,
+        session_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        session_ids: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Filters need the composite indexes in docs/firestore-schema.md."""
+        from firebase_admin import firestore
+
+        query = get_async_firestore_client().collection(CONVERSATIONS_COLLECTION)
+        if category is not None:
+            query = query.where(filter=firestore.FieldFilter("category", "==", category))
+        if is_blocked is not None:
+            query = query.where(filter=firestore.FieldFilter("is_blocked", "==", is_blocked))
+        if session_id is not None:
+            query = query.where(filter=firestore.FieldFilter("session_id", "==", session_id))
+        if session_ids is not None:
+            query = query.where(
+                filter=firestore.FieldFilter("session_id", "in", list(session_ids))
+            )
+        if since is not None:
+            query = query.where(filter=firestore.FieldFilter("timestamp", ">=", since))
+        if until is not None:
+            query = query.where(filter=firestore.FieldFilter("timestamp", "<", until))
+        if fields is not None:
+            query = query.select(sorted(set(fields) | {"timestamp"}))
+        query = query.order_by("timestamp", direction=firestore.Query.DESCENDING).order_by(
+            "__name__", direction=firestore.Query.DESCENDING
+        )
+        if after is not None:
+            timestamp, doc_id = after
+            query = query.start_after({"timestamp": timestamp, "__name__": doc_id})
+        return await _collect(query.limit(limit))
+
+    async def load_counter(self, stat: str) -> Counter:
+        """Sum every shard of ``stat``."""
+        total: Counter = Counter()
+        shards = (
+            get_async_firestore_client()
+            .collection(analytics_service.ANALYTICS_COLLECTION)
+            .document(stat)
+            .collection(analytics_service.SHARDS_COLLECTION)
+            .stream()
+        )
+        async for snap in shards:
+            for label, value in (snap.to_dict() or {}).get("counts", {}).items():
+                total[label] += int(value)
+        return total
+
+
+async def _collect(query) -> List[Dict[str, Any]]:
+    results = []
+    async for snap in query.stream():
+        data = snap.to_dict()
+        data["id"] = snap.id
+        results.append(data)
+    return results
+
+
+SQLITE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS visitors (
+        session_id TEXT PRIMARY KEY,
+        visitor_name TEXT,
+        visitor_affiliation TEXT,
+        visit_ref TEXT,
+        created_at INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS visitors_created_at ON visitors (created_at)",
+    "CREATE INDEX IF NOT EXISTS visitors_visit_ref ON visitors (visit_ref)",
+    """
+    CREATE TABLE IF NOT EXISTS conversations (
+        id TEXT PRIMARY KEY,
+        session_id TEXT,
+        visitor_id TEXT,
+        question TEXT,
+        answer TEXT,
+        category TEXT,
+        is_blocked INTEGER NOT NULL DEFAULT 0,
+        prompt_version TEXT,
+        timestamp INTEGER NOT NULL
+    )
+    """,
+    # (filter, timestamp, id) so filtered pages are index scans without a sort.
+    "CREATE INDEX IF NOT EXISTS conversations_timestamp "
+    "ON conversations (timestamp, id)",
+    "CREATE INDEX IF NOT EXISTS conversations_session "
+    "ON conversations (session_id, timestamp, id)",
+    "CREATE INDEX IF NOT EXISTS conversations_category "
+    "ON conversations (category, timestamp, id)",
+)
+
+# GROUP BY queries behind each analytics stat; labels match analytics_service.
+SQLITE_COUNTERS = {
+    analytics_service.REF_STAT: (
+        "SELECT COALESCE(NULLIF(visit_ref, ''), 'direct'), COUNT(*) "
+        "FROM visitors GROUP BY 1"
+    ),
+    analytics_service.DAILY_STAT: (
+        "SELECT strftime('%Y-%m-%d', created_at / 1000000, 'unixepoch'), COUNT(*) "
+        "FROM visitors GROUP BY 1"
+    ),
+    analytics_service.CATEGORY_STAT: (
+        "SELECT COALESCE(NULLIF(category, ''), 'general'), COUNT(*) "
+        "FROM conversations WHERE is_blocked = 0 GROUP BY 1"
+    ),
+}
+
+VISITOR_COLUMNS = ("session_id", "visitor_name", "visitor_affiliation", "visit_ref", "created_at")
+
+
+def _to_micros(moment: datetime) -> int:
+    """UTC microseconds since the epoch; exact, so cursors compare equal."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    delta = moment - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _from_micros(value: int) -> datetime:
+    return datetime.fromtimestamp(value // 1_000_000, tz=timezone.utc).replace(
+        microsecond=value % 1_000_000
+    )
+
+
+class SQLiteStorage:
+    """Local WAL database; every call runs in a worker thread.
+
+    Timestamps are stored as UTC microseconds so ordering and cursor
+    comparisons are exact integer comparisons on the indexes.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in SQLITE_SCHEMA:
+                conn.execute(statement)
+            self._local.conn = conn
+        return conn
+
+    def connect(self) -> None:
+        self._connection()
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        return await anyio.to_thread.run_sync(func, *args)
+
+    def _write(self, sql: str, rows: Sequence[Sequence[Any]]) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(sql, rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _query(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        return self._connection().execute(sql, params).fetchall()
+
+    async def create_visitor(self, record: Dict[str, Any]) -> None:
+        row = {**record, "created_at": _to_micros(datetime.now(timezone.utc))}
+        await self._run(
+            self._write,
+            f"INSERT INTO visitors ({', '.join(VISITOR_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in VISITOR_COLUMNS)})",
+            [tuple(row.get(column) for column in VISITOR_COLUMNS)],
+        )
+
+    @staticmethod
+    def _visitor(row: sqlite3.Row) -> Dict[str, Any]:
+        data = dict(row)
+        data["created_at"] = _from_micros(data["created_at"])
+        data["id"] = data["session_id"]
+        return data
+
+    async def get_visitor(self, session_id: str) -> Optional[Dict[str, Any]]:
+        rows = await self._run(
+            self._query, "SELECT * FROM visitors WHERE session_id = ?", (session_id,)
+        )
+        return self._visitor(rows[0]) if rows else None
+
+    async def latest_visitors(self, limit: int) -> List[Dict[str, Any]]:
+        rows = await self._run(
+            self._query,
+            "SELECT * FROM visitors ORDER BY created_at DESC LIMIT ?",
+            (limit,),
+        )
+        return [self._visitor(row) for row in rows]
+
+    async def iter_visitor_sessions(
+        self, visit_ref: str, page_size: int
+    ) -> AsyncIterator[List[str]]:
+        match = "visit_ref = ?" if visit_ref else "(visit_ref = ? OR visit_ref IS NULL)"
+        last = ""
+        while True:
+            rows = await self._run(
+                self._query,
+                f"SELECT session_id FROM visitors WHERE {match} AND session_id > ? "
+                "ORDER BY session_id LIMIT ?",
+                (visit_ref, last, page_size),
+            )
+            if rows:
+                yield [row[0] for row in rows]
+            if len(rows) < page_size:
+                return
+            last = rows[-1][0]
+
+    async def add_conversations(
+        self, docs: Sequence[Dict[str, Any]], retry: bool = False
+    ) -> None:
+        # Counters are aggregated from this table, so ignoring ids already
+        # stored is enough to make any batch safe to replay.
+        columns = ("id",) + CONVERSATION_FIELDS
+        rows = []
+        for doc in docs:
+            row = {**doc, "id": doc.get("id") or uuid.uuid4().hex}
+            row["is_blocked"] = int(bool(doc.get("is_blocked")))
+            row["timestamp"] = _to_micros(doc["timestamp"])
+            rows.append(tuple(row.get(column) for column in columns))
+        await self._run(
+            self._write,
+            f"INSERT OR IGNORE INTO conversations ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})",
+            rows,
+        )
+
+    @staticmethod
+    def _conversation(row: sqlite3.Row) -> Dict[str, Any]:
+        data = dict(row)
+        data["timestamp"] = _from_micros(data["timestamp"])
+        if "is_blocked" in data:
+            data["is_blocked"] = bool(data["is_blocked"])
+        return data
+
+    async def recent_conversations(self, limit: int) -> List[Dict[str, Any]]:
+        return await self.conversation_page(limit)
+
+    async def conversation_page(
+        self,
+        limit: int,
+        after: Optional[PageCursor] = None,
+        fields: Optional[Iterable[str]] = None,
+        category: Optional[str] = None,
+        is_blocked: Optional[bool] = None,
+        session_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        session_ids: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        if fields is None:
+            columns = CONVERSATION_FIELDS
+        else:
+            wanted = set(fields) | {"timestamp"}
+            columns = tuple(column for column in CONVERSATION_FIELDS if column in wanted)
+
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column, value in (("category", category), ("session_id", session_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if session_ids is not None:
+            clauses.append(f"session_id IN ({', '.join('?' for _ in session_ids)})")
+            params.extend(session_ids)
+        if is_blocked is not None:
+            clauses.append("is_blocked = ?")
+            params.append(int(is_blocked))
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_to_micros(since))
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(_to_micros(until))
+        if after is not None:
+            micros = _to_micros(after[0])
+            clauses.append("(timestamp < ? OR (timestamp = ? AND id < ?))")
+            params.extend((micros, micros, after[1]))
+
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        rows = await self._run(
+            self._query,
+            f"SELECT id, {', '.join(columns)} FROM conversations {where}"
+            "ORDER BY timestamp DESC, id DESC LIMIT ?",
+            (*params, limit),
+        )
+        return [self._conversation(row) for row in rows]
+
+    async def load_counter(self, stat: str) -> Counter:
+        rows = await self._run(self._query, SQLITE_COUNTERS[stat])
+        if stat != analytics_service.REF_STAT:
+            return Counter({label: count for label, count in rows})
+        # Same labels and cap as the Firestore counters (rows hold raw refs).
+        counts: Counter = Counter()
+        for ref, count in rows:
+            counts[analytics_service.ref_label({"visit_ref": ref})] += count
+        return analytics_service.cap_ref_labels(counts)
+
+
+_storage: Optional[Storage] = None
+
+
+def build_storage(backend: str) -> Storage:
+    """Create the storage for the given ``STORAGE_BACKEND`` value."""
+    if backend == "firestore":
+        return FirestoreStorage()
+    if backend == "sqlite":
+        return SQLiteStorage(settings.storage_sqlite_path)
+    raise RuntimeError(f"Unknown STORAGE_BACKEND '{backend}'. Use firestore or sqlite.")
+
+
+def get_storage() -> Storage:
+    """Return the process-wide storage."""
+    global _storage
+    if _storage is None:
+        _storage = build_storage(settings.storage_backend)
+    return _storage
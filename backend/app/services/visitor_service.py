@@ -5,39 +5,57 @@ from __future__ import annotations
 from typing import Dict, Optional
 from uuid import uuid4
 
-from firebase_admin import firestore
+from ..core.config import settings
+from ..core.session_tokens import (
+    is_session_token,
+    issue_session_token,
+    verify_session_token,
+)
+from .storage import get_storage
 
-from ..core.firebase import get_firestore_client
 
+async def create_visitor(payload: Dict[str, str]) -> Dict[str, str]:
+    """Persist visitor metadata and return the session descriptor.
 
-def create_visitor(payload: Dict[str, str]) -> Dict[str, str]:
-    """Persist visitor metadata and return the session descriptor."""
-    client = get_firestore_client()
-    session_id = str(uuid4())
-    doc_ref = client.collection("visitors").document(session_id)
+    On Firestore the ref/day dashboard counters are incremented alongside,
+    best-effort.
 
+    When ``SESSION_TOKEN_SECRET`` is set the descriptor also carries a signed
+    ``session_token`` that the chat endpoints verify without a Firestore read.
+    """
+    session_id = str(uuid4())
     record = {
         "visitor_name": payload.get("visitor_name", "").strip(),
-        "visitor_affiliation": payload.get("visitor_affiliation", "").strip(),
-        "visit_ref": payload.get("visit_ref", "").strip(),
+        "visitor_affiliation": (payload.get("visitor_affiliation") or "").strip(),
+        # Stored as entered; only the dashboard counter label is normalized.
+        "visit_ref": (payload.get("visit_ref") or "").strip(),
         "session_id": session_id,
-        "created_at": firestore.SERVER_TIMESTAMP,
     }
-    doc_ref.set(record)
+    await get_storage().create_visitor(record)
 
+    if settings.session_token_secret:
+        record["session_token"] = issue_session_token(
+            record, settings.session_token_secret
+        )
     return record
 
 
-def get_visitor_by_session(session_id: str) -> Optional[Dict[str, str]]:
+async def get_visitor_by_session(session_id: str) -> Optional[Dict[str, str]]:
     """Return visitor metadata by session id."""
     if not session_id:
         return None
+    return await get_storage().get_visitor(session_id)
 
-    client = get_firestore_client()
-    doc = client.collection("visitors").document(session_id).get()
-    if not doc.exists:
-        return None
-    data = doc.to_dict()
-    data["id"] = doc.id
-    return data
 
+async def resolve_session(session_id: str) -> Optional[Dict[str, str]]:
+    """Return visitor metadata for a signed session token or a legacy UUID.
+
+    Tokens are verified locally; only legacy sessions hit the storage.
+    """
+    if is_session_token(session_id):
+        return verify_session_token(
+            session_id,
+            settings.session_token_secret,
+            max_age_seconds=settings.session_token_max_age_hours * 3600,
+        )
+    return await get_visitor_by_session(session_id)
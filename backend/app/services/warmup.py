@@ -0,0 +1,108 @@
+"""Startup warm-up so the first chat does not pay import and compile costs.
+
+Heavy client libraries are imported on first use (see ``core.firebase`` and
+``llm_service.get_openai_client``). Warm-up imports them in worker threads
+while the prompt and question matcher are compiled in another, installed as
+one pair the way ``knowledge_reloader`` does, then connects the storage and
+creates the OpenAI client on the event loop. ``/ready`` reports the result.
+"""
+
+from __future__ import annotations
+
+import importlib
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+import anyio
+
+from ..core.config import settings
+from . import knowledge_reloader, llm_service, question_filter
+from .storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Steps run in parallel worker threads: imports of the heavy client libraries.
+THREAD_STEPS: Dict[str, Callable[[], object]] = {
+    "import_openai": lambda: importlib.import_module("openai"),
+    "import_firestore": lambda: importlib.import_module("firebase_admin.firestore_async"),
+    "import_firebase_auth": lambda: importlib.import_module("firebase_admin.auth"),
+}
+
+
+@dataclass
+class WarmupState:
+    status: str = "pending"  # pending | warming | ready | failed
+    started_at: Optional[float] = None
+    duration_ms: Optional[float] = None
+    steps_ms: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+
+_state = WarmupState()
+
+
+def get_warmup_state() -> WarmupState:
+    return _state
+
+
+async def compile_knowledge() -> None:
+    """Build the prompt and its matcher from one snapshot and install both.
+
+    Compiling them in separate threads would let the matcher read the pack
+    before ``install_prompt`` swaps the snapshot, and the first question
+    would then rebuild it.
+    """
+    if llm_service.current_prompt() is not None:
+        await anyio.to_thread.run_sync(question_filter.get_matcher)
+        return
+    compiled, matcher = await anyio.to_thread.run_sync(knowledge_reloader._build)
+    # No await between the two installs, as in KnowledgeReloader.reload().
+    question_filter.install_matcher(matcher, compiled.knowledge.pack)
+    llm_service.install_prompt(compiled)
+
+
+async def _timed(name: str, func: Callable[[], object], in_thread: bool) -> None:
+    started = time.perf_counter()
+    try:
+        if in_thread:
+            await anyio.to_thread.run_sync(func)
+        else:
+            result = func()
+            if inspect.isawaitable(result):
+                await result
+    except Exception as exc:  # noqa: BLE001 - reported through /ready
+        _state.errors[name] = f"{type(exc).__name__}: {exc}"
+        logger.error("Warm-up step %s failed: %s", name, exc)
+    finally:
+        _state.steps_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+async def warm_up() -> WarmupState:
+    """Run every warm-up step once and record timings and failures."""
+    _state.status = "warming"
+    _state.started_at = time.time()
+    _state.steps_ms.clear()
+    _state.errors.clear()
+    started = time.perf_counter()
+
+    async with anyio.create_task_group() as group:
+        for name, func in THREAD_STEPS.items():
+            group.start_soon(_timed, name, func, True)
+        group.start_soon(_timed, "compile_knowledge", compile_knowledge, False)
+
+    # Clients are created on the event loop they will be used from.
+    await _timed("storage", lambda: get_storage().connect(), False)
+    if settings.openai_api_key:
+        await _timed("openai_client", llm_service.get_openai_client, False)
+
+    _state.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    _state.status = "failed" if _state.errors else "ready"
+    logger.info("Warm-up %s in %.1f ms: %s", _state.status, _state.duration_ms, _state.steps_ms)
+    return _state
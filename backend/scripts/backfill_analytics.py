@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Rebuild the sharded dashboard counters from the full Firestore history.
+
+Streams `visitors` and `conversations` in pages (only the fields the
+counters need), then replaces every shard of each stat with the totals.
+Increments that land while the backfill runs are overwritten, so run it
+while traffic is quiet.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+load_dotenv(ROOT_DIR / ".env")
+
+from app.core.firebase import get_firestore_client  # noqa: E402
+from app.services import analytics_service  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Backfill analytics counters")
+    parser.add_argument("--page-size", type=int, default=500, help="페이지당 문서 수")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="집계 결과만 출력하고 analytics 컬렉션은 수정하지 않음",
+    )
+    return parser.parse_args()
+
+
+def iter_pages(client, collection: str, fields: List[str], page_size: int) -> Iterator[Dict]:
+    """Yield documents of ``collection`` ordered by id, one page per query."""
+    query = client.collection(collection).select(fields).order_by("__name__").limit(page_size)
+    last = None
+    while True:
+        page = list((query.start_after(last) if last else query).stream())
+        for snap in page:
+            yield snap.to_dict() or {}
+        if len(page) < page_size:
+            return
+        last = page[-1]
+
+
+def collect(client, page_size: int) -> Dict[str, Counter]:
+    refs: Counter = Counter()
+    days: Counter = Counter()
+    visitors = 0
+    for visitor in iter_pages(client, "visitors", ["visit_ref", "created_at"], page_size):
+        refs[analytics_service.ref_label(visitor)] += 1
+        days[analytics_service.day_label(visitor.get("created_at"))] += 1
+        visitors += 1
+        if visitors % 10_000 == 0:
+            print(f"  visitors: {visitors:,}")
+
+    categories: Counter = Counter()
+    conversations = 0
+    for conversation in iter_pages(
+        client, "conversations", ["category", "is_blocked"], page_size
+    ):
+        categories.update(analytics_service.category_counts([conversation]))
+        conversations += 1
+        if conversations % 10_000 == 0:
+            print(f"  conversations: {conversations:,}")
+
+    print(f"visitors={visitors:,} conversations={conversations:,}")
+    return {
+        analytics_service.REF_STAT: analytics_service.cap_ref_labels(refs),
+        analytics_service.DAILY_STAT: days,
+        analytics_service.CATEGORY_STAT: categories,
+    }
+
+
+def write_counters(client, counters: Dict[str, Counter]) -> None:
+    """Replace all shards of each stat with a single shard holding the totals."""
+    batch = client.batch()
+    for stat, counts in counters.items():
+        shards = (
+            client.collection(analytics_service.ANALYTICS_COLLECTION)
+            .document(stat)
+            .collection(analytics_service.SHARDS_COLLECTION)
+        )
+        for snap in shards.stream():
+            if snap.id != "0":
+                batch.delete(snap.reference)
+        batch.set(analytics_service.shard_ref(client, stat, 0), {"counts": dict(counts)})
+    batch.commit()
+
+
+def main() -> None:
+    args = parse_args()
+    client = get_firestore_client()
+    counters = collect(client, args.page_size)
+    summary = {stat: dict(counts) for stat, counts in counters.items()}
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if args.dry_run:
+        return
+    write_counters(client, counters)
+    print("analytics counters updated.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: per-question cost of the question filter vs keyword count."""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.services import question_filter  # noqa: E402
+
+SAMPLE_QUESTIONS = [
+    "309의 프로젝트 경험 중 B2B SaaS 대시보드 설계에서 가장 어려웠던 의사결정은?",
+    "What was your role in the design system project at Payhere?",
+    "팀 협업에서 stakeholder와 갈등이 있을 때 어떻게 해결했나요?",
+    "오늘 날씨 어때?",
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Question filter micro-benchmark")
+    parser.add_argument(
+        "--sizes",
+        default="0,100,500,2000",
+        help="추가로 생성할 키워드 수 목록 (콤마 구분)",
+    )
+    parser.add_argument("--number", type=int, default=2000, help="질문당 반복 횟수")
+    parser.add_argument("--seed", type=int, default=309)
+    return parser.parse_args()
+
+
+def synthetic_keywords(count: int, rng: random.Random) -> list[str]:
+    alphabet = "가나다라마바사아자차카타파하abcdefghijklmnop"
+    return [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(3, 8)))
+        for _ in range(count)
+    ]
+
+
+def naive_validate(question, banned, categories, topics):
+    """The previous implementation: one re.search per pattern + substring scans."""
+    lowered = question.strip().lower()
+    for pattern in banned:
+        if re.search(pattern, lowered, flags=re.IGNORECASE):
+            return False
+    for keywords in categories.values():
+        if any(keyword in lowered for keyword in keywords):
+            return True
+    return any(topic.lower() in lowered for topic in topics)
+
+
+def main() -> None:
+    args = parse_args()
+    rng = random.Random(args.seed)
+    base_topics = question_filter.get_allowed_topics()
+
+    print(f"{'extra':>6} {'keywords':>9} {'naive us':>10} {'compiled us':>12}")
+    for size in (int(item) for item in args.sizes.split(",") if item.strip()):
+        extra = synthetic_keywords(size, rng)
+        banned = question_filter.BANNED_PATTERNS + extra[: size // 4]
+        categories = dict(question_filter.QUESTION_CATEGORIES)
+        categories["synthetic"] = extra[size // 4 : size // 2]
+        topics = base_topics + extra[size // 2 :]
+        matcher = question_filter.QuestionMatcher(banned, categories, topics)
+        total = len(banned) + sum(map(len, categories.values())) + len(topics)
+
+        naive = compiled = 0.0
+        for question in SAMPLE_QUESTIONS:
+            naive += timeit.timeit(
+                lambda: naive_validate(question, banned, categories, topics),
+                number=args.number,
+            )
+            compiled += timeit.timeit(
+                lambda: matcher.scan(question_filter._normalize(question)),
+                number=args.number,
+            )
+
+        runs = args.number * len(SAMPLE_QUESTIONS)
+        print(
+            f"{size:>6} {total:>9} {naive / runs * 1e6:>10.1f} "
+            f"{compiled / runs * 1e6:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
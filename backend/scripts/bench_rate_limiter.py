@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Benchmark rate limiter memory and throughput with many distinct keys."""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from uuid import uuid4
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.core.rate_limiter import SlidingWindowLimiter  # noqa: E402
+
+
+class LegacyLimiter:
+    """The previous unbounded defaultdict(deque) + datetime implementation."""
+
+    def __init__(self, limit: int, window_minutes: int) -> None:
+        self.limit = limit
+        self.window = timedelta(minutes=window_minutes)
+        self._events = defaultdict(deque)
+
+    def hit(self, key: str) -> bool:
+        now = datetime.now(tz=timezone.utc)
+        window_start = now - self.window
+        queue = self._events[key]
+        while queue and queue[0] < window_start:
+            queue.popleft()
+        if len(queue) >= self.limit:
+            return False
+        queue.append(now)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rate limiter benchmark")
+    parser.add_argument("--keys", type=int, default=1_000_000, help="고유 세션 키 수")
+    parser.add_argument(
+        "--hits-per-key", type=int, default=2, help="키당 touch 횟수 (limit 이하)"
+    )
+    parser.add_argument("--limit", type=int, default=3)
+    parser.add_argument("--window-minutes", type=int, default=30)
+    parser.add_argument(
+        "--max-keys", type=int, default=100_000, help="bounded 리미터의 키 상한"
+    )
+    return parser.parse_args()
+
+
+def drive(limiter, keys: list[str], hits_per_key: int) -> float:
+    started = time.perf_counter()
+    for _ in range(hits_per_key):
+        for key in keys:
+            limiter.hit(key)
+    return time.perf_counter() - started
+
+
+def run(name: str, factory, keys: list[str], hits_per_key: int) -> None:
+    """Measure throughput untraced, then memory on a fresh limiter."""
+    gc.collect()
+    elapsed = drive(factory(), keys, hits_per_key)
+
+    gc.collect()
+    tracemalloc.start()
+    limiter = factory()
+    drive(limiter, keys, hits_per_key)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    touches = len(keys) * hits_per_key
+    print(
+        f"{name:<10} tracked={len(limiter):>9,} "
+        f"mem={current / 1024 / 1024:>8.1f}MiB peak={peak / 1024 / 1024:>8.1f}MiB "
+        f"throughput={touches / elapsed:>12,.0f} touch/s"
+    )
+
+
+def main() -> None:
+    args = parse_args()
+    keys = [str(uuid4()) for _ in range(args.keys)]
+    print(f"{args.keys:,} keys x {args.hits_per_key} touches")
+
+    run(
+        "legacy",
+        lambda: LegacyLimiter(args.limit, args.window_minutes),
+        keys,
+        args.hits_per_key,
+    )
+    run(
+        "bounded",
+        lambda: SlidingWindowLimiter(
+            args.limit, args.window_minutes, max_keys=args.max_keys
+        ),
+        keys,
+        args.hits_per_key,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Check admin auth through the real ``verify_admin`` dependency.
+
+Runs the app in-process once per mode (SQLite storage with blocking warm-up,
+Firestore storage with warm-up off or in the background) and calls a
+dashboard endpoint with an ID token, so nothing but the token check itself
+has had a chance to create the Firebase app. The Firebase Auth emulator
+mode (``FIREBASE_AUTH_EMULATOR_HOST``) is used so tokens verify offline;
+the service account is a throwaway key generated here. In SQLite mode it
+also checks that ``ADMIN_TOKEN_CHECK_REVOKED`` caps how long verified claims
+are cached. Prints a JSON report and exits non-zero when a check fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+PROJECT_ID = "persona-auth-check"
+ADMIN_EMAIL = "admin@example.com"
+
+MODES = {
+    "sqlite": {"STORAGE_BACKEND": "sqlite", "STARTUP_WARMUP": "blocking"},
+    "firestore_warmup_off": {"STORAGE_BACKEND": "firestore", "STARTUP_WARMUP": "off"},
+    "firestore_warmup_background": {
+        "STORAGE_BACKEND": "firestore",
+        "STARTUP_WARMUP": "background",
+    },
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Admin auth checks")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    # Internal: run the checks for one mode in this process.
+    parser.add_argument("--mode", choices=sorted(MODES), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def service_account_json() -> str:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode("ascii")
+    return json.dumps(
+        {
+            "type": "service_account",
+            "project_id": PROJECT_ID,
+            "private_key_id": "auth-check",
+            "private_key": pem,
+            "client_email": f"auth-check@{PROJECT_ID}.iam.gserviceaccount.com",
+            "client_id": "0",
+            "token_uri": "https://oauth2.googleapis.com/token",
+        }
+    )
+
+
+def _b64(data: Dict[str, Any]) -> str:
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def emulator_token(email: str, project_id: str = PROJECT_ID) -> str:
+    """An unsigned ID token, accepted only in Auth emulator mode."""
+    now = int(time.time())
+    claims = {
+        "iss": f"https://securetoken.google.com/{project_id}",
+        "aud": project_id,
+        "sub": email.split("@")[0],
+        "email": email,
+        "iat": now,
+        "auth_time": now,
+        "exp": now + 3600,
+    }
+    return f"{_b64({'alg': 'none', 'typ': 'JWT'})}.{_b64(claims)}."
+
+
+def run_mode(mode: str) -> List[Dict[str, Any]]:
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    def bearer(token: str) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {token}"}
+
+    results: List[Dict[str, Any]] = []
+
+    def check(name: str, response, expected: int) -> None:
+        results.append(
+            {
+                "mode": mode,
+                "check": name,
+                "ok": response.status_code == expected,
+                "status": response.status_code,
+                "detail": response.json().get("detail") if response.status_code != 200 else None,
+            }
+        )
+
+    with TestClient(app) as client:
+        check(
+            "valid_token",
+            client.get("/api/dashboard/knowledge", headers=bearer(emulator_token(ADMIN_EMAIL))),
+            200,
+        )
+        check("missing_header", client.get("/api/dashboard/knowledge"), 401)
+        check(
+            "other_project_token",
+            client.get(
+                "/api/dashboard/knowledge",
+                headers=bearer(emulator_token(ADMIN_EMAIL, project_id="someone-else")),
+            ),
+            401,
+        )
+        check(
+            "email_not_allowed",
+            client.get(
+                "/api/dashboard/knowledge",
+                headers=bearer(emulator_token("visitor@example.com")),
+            ),
+            403,
+        )
+        if MODES[mode]["STORAGE_BACKEND"] == "sqlite":
+            check(
+                "sqlite_dashboard_stats",
+                client.get("/api/dashboard/stats", headers=bearer(emulator_token(ADMIN_EMAIL))),
+                200,
+            )
+            results.append(revoked_check_cache(client, bearer))
+    return results
+
+
+def revoked_check_cache(client, bearer) -> Dict[str, Any]:
+    """With revocation checks on, verified claims are cached only briefly.
+
+    The emulator has no revocation endpoint to call, so verification keeps
+    its revocation check off here and only the cache TTL is inspected.
+    """
+    from app.core import auth
+    from app.core.config import settings
+
+    token = emulator_token(ADMIN_EMAIL)
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    settings.admin_token_check_revoked = True
+    verify = auth._verify_id_token
+
+    def verify_without_revocation(raw: str) -> Dict[str, Any]:
+        from firebase_admin import auth as firebase_auth
+
+        return firebase_auth.verify_id_token(raw, check_revoked=False)
+
+    auth._verify_id_token = verify_without_revocation
+    try:
+        auth._token_cache.clear()
+        response = client.get("/api/dashboard/knowledge", headers=bearer(token))
+        expires_at, _ = auth._token_cache._entries[key]
+        ttl = expires_at - time.monotonic()
+    finally:
+        settings.admin_token_check_revoked = False
+        auth._verify_id_token = verify
+    return {
+        "mode": "sqlite",
+        "check": "revoked_check_cache_ttl",
+        "ok": response.status_code == 200 and 0 < ttl <= auth.REVOKED_CHECK_CACHE_SECONDS,
+        "status": response.status_code,
+        "ttl_seconds": round(ttl, 2),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    if args.mode:
+        print(json.dumps(run_mode(args.mode), ensure_ascii=False))
+        return
+
+    results: List[Dict[str, Any]] = []
+    credentials = service_account_json()
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode, overrides in MODES.items():
+            env = {
+                **os.environ,
+                **overrides,
+                "FIREBASE_CREDENTIALS_PATH": "",
+                "FIREBASE_CREDENTIALS_JSON": credentials,
+                "FIREBASE_AUTH_EMULATOR_HOST": "127.0.0.1:9099",
+                "ADMIN_ALLOWED_EMAILS": json.dumps([ADMIN_EMAIL]),
+                "ADMIN_TOKEN_CHECK_REVOKED": "false",
+                "STORAGE_SQLITE_PATH": str(Path(workdir) / f"{mode}.sqlite3"),
+                "RATE_LIMIT_BACKEND": "memory",
+                "KNOWLEDGE_RELOAD_SECONDS": "0",
+                "OPENAI_API_KEY": "",
+            }
+            proc = subprocess.run(
+                [sys.executable, __file__, "--mode", mode],
+                cwd=ROOT_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            if proc.returncode != 0:
+                results.append(
+                    {"mode": mode, "check": "run", "ok": False, "detail": proc.stderr[-2000:]}
+                )
+                continue
+            results.extend(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    report = {"ok": all(result["ok"] for result in results), "checks": results}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Check that answers shared between visitors never carry visitor metadata.
+
+Starts scripts/fake_openai_server.py and asks questions as different
+visitors: concurrent identical questions must coalesce into one upstream
+completion whose prompt names neither visitor, cached and streamed answers
+must be built the same way, identical streams (including one joining
+mid-answer, one outliving the leader, and a non-streaming call joining a
+stream) must share one upstream stream, and only ``use_cache=False`` completions may
+send the visitor's name, affiliation and ref (and are not cached). Prints a
+JSON report and exits non-zero when a check fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+from check_llm_transport import free_port, start_fake_server
+from fake_openai_server import DEFAULT_ANSWER
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+VISITORS = {
+    "alice": {"visitor_name": "앨리스", "visitor_affiliation": "에이랩", "visit_ref": "ref-alice"},
+    "bob": {"visitor_name": "밥", "visitor_affiliation": "비컴퍼니", "visit_ref": "ref-bob"},
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Shared answer privacy checks")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    return parser.parse_args()
+
+
+def configure_env(port: int) -> None:
+    # Settings are read at import time, so this runs before importing `app`.
+    os.environ.update(
+        {
+            "OPENAI_API_KEY": "fake-key",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{port}/v1",
+            "ANSWER_CACHE_SIZE": "256",
+        }
+    )
+
+
+def mentions_visitor(message: str) -> List[str]:
+    return [
+        value
+        for visitor in VISITORS.values()
+        for value in visitor.values()
+        if value in message
+    ]
+
+
+async def main_async(port: int) -> List[Dict[str, Any]]:
+    from app.services import llm_service
+
+    control = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}")
+    results: List[Dict[str, Any]] = []
+
+    async def sent() -> List[str]:
+        return (await control.get("/_requests")).json()["user_messages"]
+
+    async def check(name: str, body: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+        await control.post("/_reset")
+        try:
+            outcome = await body()
+        except AssertionError as exc:
+            outcome = {"ok": False, "error": str(exc)}
+        outcome["upstream_requests"] = len(await sent())
+        results.append({"check": name, **outcome})
+
+    async def coalesced():
+        await control.post("/_script", json=[{"delay": 0.3}])
+        answers = await asyncio.gather(
+            *(
+                llm_service.generate_persona_answer(
+                    "309의 협업 스타일은?", "general", visitor
+                )
+                for visitor in VISITORS.values()
+            )
+        )
+        messages = await sent()
+        assert len(messages) == 1, f"{len(messages)} upstream requests"
+        assert not mentions_visitor(messages[0]), messages[0]
+        assert answers[0] == answers[1], answers
+        return {"ok": True}
+
+    async def cached_stream():
+        # Same question as above: served from the cache without a request.
+        parts = [
+            delta
+            async for delta in llm_service.stream_persona_answer(
+                "309의 협업 스타일은?", "general", VISITORS["bob"]
+            )
+        ]
+        assert parts and not await sent(), "cached answer went upstream"
+        return {"ok": True}
+
+    async def streamed():
+        parts = [
+            delta
+            async for delta in llm_service.stream_persona_answer(
+                "디자인 시스템을 어떻게 운영했나요?", "general", VISITORS["alice"]
+            )
+        ]
+        messages = await sent()
+        assert parts and len(messages) == 1, messages
+        assert not mentions_visitor(messages[0]), messages[0]
+        return {"ok": True}
+
+    async def personal_not_cached():
+        question = "UX 리서치는 어떻게 진행하나요?"
+        await llm_service.generate_persona_answer(
+            question, "general", VISITORS["alice"], use_cache=False
+        )
+        await llm_service.generate_persona_answer(question, "general", VISITORS["bob"])
+        messages = await sent()
+        assert len(messages) == 2, "personal answer was served from the cache"
+        assert mentions_visitor(messages[0]), "use_cache=False dropped the visitor"
+        assert not mentions_visitor(messages[1]), messages[1]
+        return {"ok": True}
+
+    async def read(deltas, limit: int = 0) -> str:
+        """Join up to ``limit`` deltas (all when 0) without closing ``deltas``."""
+        parts = []
+        async for delta in deltas:
+            parts.append(delta)
+            if limit and len(parts) >= limit:
+                break
+        return "".join(parts)
+
+    def stream(question: str, visitor: str):
+        return llm_service.stream_persona_answer(question, "general", VISITORS[visitor])
+
+    async def coalesced_streams():
+        await control.post("/_script", json=[{"chunk_delay": 0.1}])
+        question = "가장 어려웠던 프로젝트 의사결정은?"
+        answers = await asyncio.gather(
+            read(stream(question, "alice")), read(stream(question, "bob"))
+        )
+        messages = await sent()
+        assert len(messages) == 1, f"{len(messages)} upstream requests"
+        assert not mentions_visitor(messages[0]), messages[0]
+        assert answers[0] == answers[1] == DEFAULT_ANSWER, answers
+        return {"ok": True}
+
+    async def late_stream_joiner():
+        await control.post("/_script", json=[{"chunk_delay": 0.1}])
+        question = "신입 디자이너에게 어떤 조언을 하나요?"
+        leader = stream(question, "alice")
+        head = await read(leader, limit=2)
+        joined = await read(stream(question, "bob"))
+        rest = await read(leader)
+        assert len(await sent()) == 1, "the joiner opened its own stream"
+        assert head + rest == joined == DEFAULT_ANSWER, (head, rest, joined)
+        return {"ok": True}
+
+    async def stream_leader_leaves():
+        await control.post("/_script", json=[{"chunk_delay": 0.1}])
+        question = "요즘 관심 있는 디자인 주제는?"
+        leader = stream(question, "alice")
+        await read(leader, limit=1)
+        joined = asyncio.ensure_future(read(stream(question, "bob")))
+        await asyncio.sleep(0)
+        await leader.aclose()
+        assert await joined == DEFAULT_ANSWER, "the joiner lost the stream"
+        stats = (await control.get("/_stats")).json()
+        assert stats.get("streams_completed") == 1 and len(await sent()) == 1, stats
+        return {"ok": True}
+
+    async def completion_joins_stream():
+        await control.post("/_script", json=[{"chunk_delay": 0.1}])
+        question = "포트폴리오에서 가장 자랑하고 싶은 작업은?"
+        leader = stream(question, "alice")
+        head = await read(leader, limit=1)
+        answer = await llm_service.generate_persona_answer(question, "general", VISITORS["bob"])
+        rest = await read(leader)
+        assert len(await sent()) == 1, "the completion did not join the stream"
+        assert answer == head + rest == DEFAULT_ANSWER, (answer, head, rest)
+        return {"ok": True}
+
+    await check("coalesced", coalesced)
+    await check("cached_stream", cached_stream)
+    await check("streamed", streamed)
+    await check("personal_not_cached", personal_not_cached)
+    await check("coalesced_streams", coalesced_streams)
+    await check("late_stream_joiner", late_stream_joiner)
+    await check("stream_leader_leaves", stream_leader_leaves)
+    await check("completion_joins_stream", completion_joins_stream)
+    await control.aclose()
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    port = free_port()
+    configure_env(port)
+    server = start_fake_server(port)
+    try:
+        results = asyncio.run(main_async(port))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    if not all(result["ok"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Check the conversation export's ref filter and CSV escaping.
+
+Runs against a throwaway SQLite file and the in-memory
+``scripts/fake_firestore.py``: ``ref=direct`` covers visitors whose ref is
+empty, null or (on Firestore) missing, a ref export with more sessions than
+one ``in`` filter takes returns every row while each conversation query is
+limited to a group of sessions, and CSV cells starting with ``=``, ``+``,
+``-`` or ``@`` are prefixed with ``'``. Prints a JSON report and exits
+non-zero when a check fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+BULK_SESSIONS = 70
+PAGE_SIZE = 25
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Conversation export checks")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    return parser.parse_args()
+
+
+def conversation(session_id: str, question: str, minutes: int) -> Dict[str, Any]:
+    return {
+        "id": f"{session_id}-{minutes}",
+        "session_id": session_id,
+        "visitor_id": session_id,
+        "question": question,
+        "answer": "ok",
+        "category": "general",
+        "is_blocked": False,
+        "prompt_version": "check",
+        "timestamp": datetime(2026, 10, 1, tzinfo=timezone.utc) + timedelta(minutes=minutes),
+    }
+
+
+async def main_async(workdir: Path) -> List[Dict[str, Any]]:
+    import fake_firestore
+    from app.services import export_service, storage
+
+    results: List[Dict[str, Any]] = []
+    fake = None
+
+    async def exported(ref: Optional[str]) -> List[str]:
+        rows = []
+        async for page in export_service.iter_conversations(ref=ref, page_size=PAGE_SIZE):
+            rows.extend(row["session_id"] for row in page)
+        return sorted(rows)
+
+    async def seed(refs: Dict[str, Optional[str]], missing: bool) -> None:
+        for session_id, visit_ref in refs.items():
+            await storage.get_storage().create_visitor(
+                {"session_id": session_id, "visitor_name": "확인", "visit_ref": visit_ref}
+            )
+        if missing:
+            visitors = fake._collections[storage.VISITORS_COLLECTION]
+            visitors["no-ref"] = {"visitor_name": "확인"}
+        sessions = list(refs) + (["no-ref"] if missing else [])
+        await storage.get_storage().add_conversations(
+            [conversation(session_id, "질문", index) for index, session_id in enumerate(sessions)]
+        )
+
+    async def check(name: str, body: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+        try:
+            outcome = await body()
+        except Exception as exc:  # noqa: BLE001 - reported per check
+            outcome = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+        results.append({"check": name, **outcome})
+
+    refs = {"linkedin-1": "LinkedIn", "empty": "", "null": None}
+
+    async def direct_ref(backend: str) -> Dict[str, Any]:
+        missing = backend == "firestore"
+        await seed(refs, missing)
+        direct = await exported("direct")
+        expected = sorted(["empty", "null"] + (["no-ref"] if missing else []))
+        assert direct == expected, direct
+        linkedin = await exported("LinkedIn")
+        assert linkedin == ["linkedin-1"], linkedin
+        return {"ok": True}
+
+    async def grouped_sessions() -> Dict[str, Any]:
+        bulk = {f"bulk-{index:03d}": "bulk" for index in range(BULK_SESSIONS)}
+        await seed(bulk, missing=False)
+        page = storage.get_storage().conversation_page
+        groups: List[int] = []
+
+        async def recording_page(*args: Any, **kwargs: Any):
+            groups.append(len(kwargs.get("session_ids") or ()))
+            return await page(*args, **kwargs)
+
+        storage.get_storage().conversation_page = recording_page
+        sessions = await exported("bulk")
+        assert sessions == sorted(bulk), f"{len(sessions)} of {len(bulk)} rows"
+        assert groups and all(0 < size <= storage.IN_QUERY_LIMIT for size in groups), groups
+        return {"ok": True, "session_groups": groups}
+
+    async def csv_formulas() -> Dict[str, Any]:
+        questions = ["=HYPERLINK(\"http://x\")", "+1", "-2", "@SUM(A1)", "평범한 질문"]
+        await storage.get_storage().add_conversations(
+            [conversation("csv", question, index) for index, question in enumerate(questions)]
+        )
+        chunks = [chunk async for chunk in export_service.export_conversations(fmt="csv")]
+        rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+        cells = sorted(row["question"] for row in rows)
+        expected = sorted(["'=HYPERLINK(\"http://x\")", "'+1", "'-2", "'@SUM(A1)", "평범한 질문"])
+        assert cells == expected, cells
+        return {"ok": True}
+
+    def use_storage(backend: str) -> None:
+        nonlocal fake
+        if backend == "sqlite":
+            path = workdir / f"export-{len(results)}.sqlite3"
+            storage._storage = storage.SQLiteStorage(str(path))
+        else:
+            fake = fake_firestore.install()
+            storage._storage = storage.FirestoreStorage()
+
+    for backend in ("sqlite", "firestore"):
+        use_storage(backend)
+        await check(f"{backend}_direct_ref", lambda: direct_ref(backend))
+        use_storage(backend)
+        await check(f"{backend}_grouped_sessions", grouped_sessions)
+    use_storage("sqlite")
+    await check("csv_formulas", csv_formulas)
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = asyncio.run(main_async(Path(workdir)))
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    if not all(result["ok"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Exercise the LLM transport against scripts/fake_openai_server.py.
+
+Starts the fake server, points the app at it and checks that 429 with
+Retry-After is retried, exhausted 5xx retries and slow responses fail
+within the deadline, the circuit breaker fails fast while open and recovers
+after its reset time, a cancelled or non-retryable (401) half-open trial
+does not wedge, reopen or close the breaker, client disconnects do not
+count as failures, a malformed Retry-After falls back to the backoff, and
+sequential calls reuse one keep-alive connection.
+Prints a JSON report and exits non-zero when a check fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+DEADLINE_SECONDS = 2.0
+BREAKER_THRESHOLD = 3
+BREAKER_RESET_SECONDS = 1.0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="LLM transport resilience checks")
+    parser.add_argument("--keepalive-calls", type=int, default=20, help="연결 재사용 확인용 호출 수")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    return parser.parse_args()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def configure_env(port: int) -> None:
+    # Settings are read at import time, so this runs before importing `app`.
+    os.environ.update(
+        {
+            "OPENAI_API_KEY": "fake-key",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{port}/v1",
+            "LLM_DEADLINE_SECONDS": str(DEADLINE_SECONDS),
+            "LLM_ATTEMPT_TIMEOUT_SECONDS": "1",
+            "LLM_MAX_RETRIES": "2",
+            "LLM_BACKOFF_BASE_SECONDS": "0.05",
+            "LLM_BREAKER_FAILURE_THRESHOLD": str(BREAKER_THRESHOLD),
+            "LLM_BREAKER_RESET_SECONDS": str(BREAKER_RESET_SECONDS),
+            "ANSWER_CACHE_SIZE": "0",
+        }
+    )
+
+
+def start_fake_server(port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, str(ROOT_DIR / "scripts" / "fake_openai_server.py"), "--port", str(port)],
+        cwd=ROOT_DIR,
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/_stats").raise_for_status()
+            return server
+        except httpx.TransportError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("fake OpenAI server did not start")
+
+
+async def main_async(args: argparse.Namespace, port: int) -> List[Dict[str, Any]]:
+    from app.services import llm_service
+    from app.services.llm_transport import LLMUnavailableError, get_circuit_breaker
+
+    control = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}")
+    breaker = get_circuit_breaker()
+    visitor = {"visitor_name": "transport-check"}
+    results: List[Dict[str, Any]] = []
+
+    async def ask() -> str:
+        return await llm_service.generate_persona_answer(
+            "309의 협업 스타일은?", "general", visitor, use_cache=False
+        )
+
+    async def check(name: str, steps: List[Dict[str, Any]], body: Callable[[], Awaitable[Dict[str, Any]]]):
+        await control.post("/_reset")
+        breaker.record_success()
+        if steps:
+            await control.post("/_script", json=steps)
+        started = time.perf_counter()
+        try:
+            outcome = await body()
+        except AssertionError as exc:
+            outcome = {"ok": False, "error": str(exc)}
+        outcome["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        outcome["upstream"] = (await control.get("/_stats")).json()
+        outcome["breaker"] = breaker.stats()
+        results.append({"check": name, **outcome})
+
+    async def expect_unavailable() -> LLMUnavailableError:
+        try:
+            await ask()
+        except LLMUnavailableError as exc:
+            return exc
+        raise AssertionError("expected LLMUnavailableError")
+
+    async def retry_after_429():
+        answer = await ask()
+        stats = (await control.get("/_stats")).json()
+        assert stats["requests"] == 2, stats
+        return {"ok": bool(answer)}
+
+    async def malformed_retry_after():
+        # Unparseable Retry-After falls back to the normal backoff.
+        return await retry_after_429()
+
+    async def exhausted_5xx():
+        await expect_unavailable()
+        stats = (await control.get("/_stats")).json()
+        assert stats["requests"] == 3, stats
+        return {"ok": True}
+
+    async def deadline():
+        started = time.perf_counter()
+        await expect_unavailable()
+        elapsed = time.perf_counter() - started
+        assert elapsed < DEADLINE_SECONDS + 0.5, f"took {elapsed:.2f}s"
+        return {"ok": True}
+
+    async def breaker_opens():
+        for _ in range(BREAKER_THRESHOLD):
+            await expect_unavailable()
+        assert breaker.state == "open", breaker.state
+        before = (await control.get("/_stats")).json()["requests"]
+        started = time.perf_counter()
+        exc = await expect_unavailable()
+        fast_ms = (time.perf_counter() - started) * 1000
+        after = (await control.get("/_stats")).json()["requests"]
+        assert after == before, "open breaker still called upstream"
+        await asyncio.sleep(BREAKER_RESET_SECONDS)
+        answer = await ask()
+        assert breaker.state == "closed", breaker.state
+        return {
+            "ok": bool(answer),
+            "fail_fast_ms": round(fast_ms, 2),
+            "retry_after": round(exc.retry_after or 0, 2),
+        }
+
+    async def open_breaker() -> None:
+        for _ in range(BREAKER_THRESHOLD):
+            await expect_unavailable()
+        assert breaker.state == "open", breaker.state
+        await asyncio.sleep(BREAKER_RESET_SECONDS)
+        assert breaker.state == "half_open", breaker.state
+
+    async def half_open_cancel():
+        await open_breaker()
+        trial = asyncio.create_task(ask())  # the scripted slow response
+        await asyncio.sleep(0.2)
+        trial.cancel()
+        try:
+            await trial
+        except asyncio.CancelledError:
+            pass
+        assert breaker.state == "half_open", f"cancelled trial left {breaker.state}"
+        answer = await ask()
+        assert breaker.state == "closed", breaker.state
+        return {"ok": bool(answer)}
+
+    async def cancels_while_closed():
+        for _ in range(BREAKER_THRESHOLD):
+            call = asyncio.create_task(ask())
+            await asyncio.sleep(0.2)
+            call.cancel()
+            try:
+                await call
+            except asyncio.CancelledError:
+                pass
+        assert breaker.state == "closed", f"client disconnects left {breaker.state}"
+        assert breaker.failures == 0, breaker.stats()
+        return {"ok": bool(await ask())}
+
+    async def half_open_401():
+        await open_breaker()
+        try:
+            await ask()
+        except LLMUnavailableError as exc:
+            raise AssertionError(f"expected the 401 to propagate, got {exc}") from exc
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("expected the 401 to propagate")
+        assert breaker.state == "half_open", f"401 left the breaker {breaker.state}"
+        answer = await ask()
+        assert breaker.state == "closed", breaker.state
+        return {"ok": bool(answer)}
+
+    async def keepalive():
+        for _ in range(args.keepalive_calls):
+            await ask()
+        stats = (await control.get("/_stats")).json()
+        assert stats["connections"] == 1, stats
+        return {"ok": True}
+
+    async def streaming_retry():
+        parts = [
+            delta
+            async for delta in llm_service.stream_persona_answer(
+                "309의 협업 스타일은?", "general", visitor, use_cache=False
+            )
+        ]
+        stats = (await control.get("/_stats")).json()
+        assert stats["requests"] == 2, stats
+        return {"ok": bool(parts)}
+
+    await check("retry_after_429", [{"status": 429, "retry_after": 0.2}], retry_after_429)
+    await check(
+        "malformed_retry_after",
+        [{"status": 429, "retry_after": "soon"}],
+        malformed_retry_after,
+    )
+    await check("exhausted_5xx", [{"status": 503}] * 3, exhausted_5xx)
+    await check("deadline", [{"delay": 5}] * 3, deadline)
+    # Three failed calls (three attempts each) open the breaker.
+    await check("breaker", [{"status": 500}] * 3 * BREAKER_THRESHOLD, breaker_opens)
+    failures = [{"status": 500}] * 3 * BREAKER_THRESHOLD
+    await check("half_open_cancel", failures + [{"delay": 0.8}], half_open_cancel)
+    await check("half_open_401", failures + [{"status": 401}], half_open_401)
+    await check(
+        "cancels_while_closed", [{"delay": 0.8}] * BREAKER_THRESHOLD, cancels_while_closed
+    )
+    await check("keepalive", [], keepalive)
+    await check("stream_retry", [{"status": 502}], streaming_retry)
+    await control.aclose()
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    port = free_port()
+    configure_env(port)
+    server = start_fake_server(port)
+    try:
+        results = asyncio.run(main_async(args, port))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    if not all(result["ok"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""Check the conversation log writer's spill replay and worker recovery.
+
+Runs against a throwaway SQLite storage and checks that a spill file with
+truncated or non-object lines still replays its good lines (the bad ones go
+to ``<spill>.corrupt``), that a failing replay does not stop the worker, and
+that documents left in the queue by a dead worker are written after a
+restart. Against ``scripts/fake_firestore.py`` it checks that a batch whose
+commit landed but timed out is not written or counted twice when replayed,
+and that a worker replays its own and dead processes' spill files but not
+those of a running one. Prints a JSON report and exits non-zero when a
+check fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Conversation log writer checks")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    return parser.parse_args()
+
+
+def make_doc(question: str) -> Dict[str, Any]:
+    return {
+        "session_id": "log-writer-check",
+        "visitor_id": "log-writer-check",
+        "question": question,
+        "answer": "ok",
+        "category": "general",
+        "is_blocked": False,
+        "prompt_version": "check",
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+
+async def stored_questions() -> List[str]:
+    from app.services.storage import get_storage
+
+    page = await get_storage().conversation_page(1000)
+    return sorted(row["question"] for row in page)
+
+
+async def main_async(workdir: Path) -> List[Dict[str, Any]]:
+    from app.services import storage
+    from app.services.log_writer import ConversationLogWriter, _encode
+
+    results: List[Dict[str, Any]] = []
+
+    async def check(name: str, body: Callable[[Path], Awaitable[Dict[str, Any]]]) -> None:
+        case_dir = workdir / name
+        case_dir.mkdir()
+        storage._storage = storage.SQLiteStorage(str(case_dir / "storage.sqlite3"))
+        try:
+            outcome = await body(case_dir)
+        except Exception as exc:  # noqa: BLE001 - reported per check
+            outcome = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+        results.append({"check": name, **outcome})
+
+    async def corrupt_spill(case_dir: Path) -> Dict[str, Any]:
+        spill = case_dir / "spill.jsonl"
+        good = _encode(make_doc("spilled-1"))
+        spill.write_text(
+            "\n".join(
+                [good, good[: len(good) // 2], "[1, 2]", _encode(make_doc("spilled-2"))]
+            )
+            + "\n"
+            + good[:10],  # cut short by a crash, no trailing newline
+            encoding="utf-8",
+        )
+        writer = ConversationLogWriter(flush_seconds=0.05, spill_path=str(spill))
+        for index in range(3):
+            writer.submit(make_doc(f"queued-{index}"))
+        await writer.close()
+
+        questions = await stored_questions()
+        expected = sorted(["spilled-1", "spilled-2", "queued-0", "queued-1", "queued-2"])
+        assert questions == expected, questions
+        corrupt = spill.with_suffix(".jsonl.corrupt")
+        assert len(corrupt.read_text(encoding="utf-8").splitlines()) == 3, "corrupt lines"
+        assert not spill.exists(), "spill file left behind"
+        assert not spill.with_suffix(".jsonl.replay").exists(), "replay file left behind"
+        return {"ok": True, "stats": writer.stats()}
+
+    async def replay_error(case_dir: Path) -> Dict[str, Any]:
+        writer = ConversationLogWriter(flush_seconds=0.05, spill_path=str(case_dir / "s.jsonl"))
+
+        async def broken_replay() -> None:
+            raise OSError("disk unavailable")
+
+        writer._replay_spill = broken_replay
+        writer.submit(make_doc("first"))
+        await asyncio.sleep(0.2)
+        assert not writer._task.done(), "worker died on a replay error"
+        writer.submit(make_doc("second"))
+        await writer.close()
+        questions = await stored_questions()
+        assert questions == ["first", "second"], questions
+        return {"ok": True, "stats": writer.stats()}
+
+    async def restart_keeps_queue(case_dir: Path) -> Dict[str, Any]:
+        writer = ConversationLogWriter(flush_seconds=0.05, spill_path=str(case_dir / "s.jsonl"))
+        writer.start()
+        writer._task.cancel()
+        try:
+            await writer._task
+        except asyncio.CancelledError:
+            pass
+        for index in range(3):
+            writer._queue.put_nowait(make_doc(f"stranded-{index}"))
+        writer.submit(make_doc("after-restart"))
+        await writer.close()
+        questions = await stored_questions()
+        expected = sorted(["after-restart", "stranded-0", "stranded-1", "stranded-2"])
+        assert questions == expected, questions
+        return {"ok": True, "stats": writer.stats()}
+
+    async def timed_out_commit(case_dir: Path) -> Dict[str, Any]:
+        import fake_firestore
+        from app.services import analytics_service
+
+        fake = fake_firestore.install()
+        firestore_storage = storage.FirestoreStorage()
+        commit = firestore_storage.add_conversations
+
+        async def late_ack(docs, retry: bool = False) -> None:
+            # The batch lands, but its acknowledgement arrives after the timeout.
+            await commit(docs, retry=retry)
+            if not retry:
+                await asyncio.sleep(1.0)
+
+        firestore_storage.add_conversations = late_ack
+        storage._storage = firestore_storage
+        writer = ConversationLogWriter(
+            flush_seconds=0.05, commit_timeout=0.2, spill_path=str(case_dir / "s.jsonl")
+        )
+        for index in range(3):
+            writer.submit(make_doc(f"late-{index}"))
+        await asyncio.sleep(0.5)
+        assert writer.spilled == 3, writer.stats()
+        writer._last_replay = 0.0  # skip REPLAY_INTERVAL
+        await writer._replay_spill()
+        await writer.close()
+
+        stored = fake.document_count(storage.CONVERSATIONS_COLLECTION)
+        assert stored == 3, f"{stored} conversation documents"
+        counts = await firestore_storage.load_counter(analytics_service.CATEGORY_STAT)
+        assert sum(counts.values()) == 3, dict(counts)
+        return {"ok": True, "stats": writer.stats()}
+
+    async def per_process_spill(case_dir: Path) -> Dict[str, Any]:
+        spill = case_dir / "spill.jsonl"
+        finished = subprocess.Popen([sys.executable, "-c", "pass"])
+        finished.wait()
+        live = case_dir / f"spill.{os.getppid()}.jsonl"
+        live.write_text(_encode({**make_doc("live-worker"), "id": "live"}) + "\n")
+        dead = case_dir / f"spill.{finished.pid}.jsonl"
+        dead.write_text(_encode({**make_doc("dead-worker"), "id": "dead"}) + "\n")
+
+        writer = ConversationLogWriter(flush_seconds=0.05, spill_path=str(spill))
+        writer._spill([{**make_doc("own-spill"), "id": "own"}])
+        own = case_dir / f"spill.{os.getpid()}.jsonl"
+        assert own.exists() and not spill.exists(), "spill is not per process"
+        writer.submit(make_doc("queued"))
+        await writer.close()
+
+        questions = await stored_questions()
+        assert questions == ["dead-worker", "own-spill", "queued"], questions
+        assert live.exists(), "replayed a running worker's spill file"
+        assert not dead.exists() and not own.exists(), "spill file left behind"
+        return {"ok": True, "stats": writer.stats()}
+
+    await check("corrupt_spill", corrupt_spill)
+    await check("replay_error", replay_error)
+    await check("restart_keeps_queue", restart_keeps_queue)
+    await check("timed_out_commit", timed_out_commit)
+    await check("per_process_spill", per_process_spill)
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = asyncio.run(main_async(Path(workdir)))
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    if not all(result["ok"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
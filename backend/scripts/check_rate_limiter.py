@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Check every rate limit backend at the limit boundary and window rollover.
+
+Drives ``memory``, ``sqlite`` (a throwaway file) and ``firestore`` (the
+in-memory ``scripts/fake_firestore.py``, whose writes return ``Increment``
+transform results like Firestore) on a controlled clock: ``limit`` touches
+pass and the next is refused, keys are independent, and a key is allowed
+again once its window has passed. For the fixed-window Firestore limiter it
+also checks that the count resets exactly at the window boundary and that
+each window document carries ``expires_at``. Prints a JSON report and exits
+non-zero when a check fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+LIMIT = 3
+WINDOW_MINUTES = 30
+WINDOW = WINDOW_MINUTES * 60
+# Start of a fixed window, so the Firestore bucket boundaries are known.
+EPOCH = WINDOW * 1_000_000
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rate limiter checks")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    return parser.parse_args()
+
+
+class FakeClock:
+    """Stands in for the ``time`` module inside ``app.core.rate_limiter``."""
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+async def main_async(workdir: Path) -> List[Dict[str, Any]]:
+    import fake_firestore
+    from app.core import rate_limiter
+
+    clock = FakeClock(EPOCH)
+    rate_limiter.time = clock
+    fake = fake_firestore.install()
+
+    factories: Dict[str, Callable[[], Any]] = {
+        "memory": lambda: rate_limiter.SlidingWindowLimiter(LIMIT, WINDOW_MINUTES),
+        "sqlite": lambda: rate_limiter.SQLiteLimiter(
+            str(workdir / "rate_limits.sqlite3"), LIMIT, WINDOW_MINUTES
+        ),
+        "firestore": lambda: rate_limiter.FirestoreLimiter(LIMIT, WINDOW_MINUTES),
+    }
+    results: List[Dict[str, Any]] = []
+
+    async def touches(limiter, key: str, count: int) -> List[bool]:
+        return [await limiter.touch(key) for _ in range(count)]
+
+    for backend, factory in factories.items():
+        limiter = factory()
+        clock.now = EPOCH + 10
+        try:
+            boundary = await touches(limiter, "session-a", LIMIT + 2)
+            assert boundary == [True] * LIMIT + [False, False], boundary
+            assert await limiter.touch("session-b"), "keys are not independent"
+
+            clock.now += WINDOW
+            rollover = await touches(limiter, "session-a", LIMIT + 1)
+            assert rollover == [True] * LIMIT + [False], rollover
+            outcome: Dict[str, Any] = {"ok": True}
+        except AssertionError as exc:
+            outcome = {"ok": False, "error": str(exc)}
+        results.append({"check": f"{backend}_boundary_rollover", **outcome})
+
+    # Fixed window: the last second of a window and the first of the next
+    # are separate counts, and every window is its own document.
+    limiter = factories["firestore"]()
+    try:
+        clock.now = EPOCH + 2 * WINDOW - 1
+        end_of_window = await touches(limiter, "session-c", LIMIT + 1)
+        assert end_of_window == [True] * LIMIT + [False], end_of_window
+        clock.now = EPOCH + 2 * WINDOW
+        assert await limiter.touch("session-c"), "count did not reset at the boundary"
+        docs = fake._collections.get(limiter.collection, {})
+        windows = sorted(doc_id for doc_id in docs if doc_id.startswith("session-c:"))
+        assert len(windows) == 2, windows
+        counts = [docs[doc_id]["count"] for doc_id in windows]
+        assert counts == [LIMIT + 1, 1], counts
+        assert all("expires_at" in docs[doc_id] for doc_id in windows), "expires_at missing"
+        outcome = {"ok": True, "windows": dict(zip(windows, counts))}
+    except AssertionError as exc:
+        outcome = {"ok": False, "error": str(exc)}
+    results.append({"check": "firestore_fixed_window_edge", **outcome})
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = asyncio.run(main_async(Path(workdir)))
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    if not all(result["ok"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
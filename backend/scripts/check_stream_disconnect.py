@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Check what ``/api/chat/stream`` does when the browser goes away.
+
+Boots the app in a uvicorn subprocess (SQLite storage in a throwaway
+directory) against ``scripts/fake_openai_server.py`` streaming a long answer
+slowly. One stream is read to the end; another is closed after the first
+few ``token`` events. The fake server must see the second upstream stream
+cut off rather than run to the end, and once the app has shut down (which
+flushes the log writer) the conversation log must hold the full answer for
+the first and the partial answer that was sent for the second. Prints a
+JSON report and exits non-zero when a check fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+from load_test import free_port, wait_until_up
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+# 40 chunks of 8 characters, 100 ms apart: about four seconds per answer.
+ANSWER = "".join(f"문장{index:02d}입니다. " for index in range(40))[:320]
+CHUNK_MS = 100
+TOKENS_BEFORE_DISCONNECT = 3
+QUESTIONS = {
+    "completed": "309의 협업 스타일은?",
+    "disconnected": "디자인 시스템을 어떻게 운영했나요?",
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Streaming disconnect checks")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    # Internal: run the app server.
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def serve(port: int) -> None:
+    import uvicorn
+
+    from app.main import app
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+async def stream_tokens(client: httpx.AsyncClient, session_id: str, question: str, limit: int) -> List[str]:
+    """Read up to ``limit`` token deltas (all when 0), then close the stream."""
+    deltas: List[str] = []
+    payload = {"session_id": session_id, "question": question}
+    async with client.stream("POST", "/api/chat/stream", json=payload) as response:
+        response.raise_for_status()
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: ") :]
+            elif line.startswith("data: ") and event == "token":
+                deltas.append(json.loads(line[len("data: ") :])["delta"])
+                if limit and len(deltas) >= limit:
+                    break
+            elif line.startswith("data: ") and event == "error":
+                raise RuntimeError(f"stream error event: {line}")
+    return deltas
+
+
+async def drive(app_port: int, openai_port: int) -> Dict[str, Any]:
+    control = httpx.AsyncClient(base_url=f"http://127.0.0.1:{openai_port}")
+    await control.post("/_reset")
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{app_port}", timeout=30) as client:
+        response = await client.post(
+            "/api/visitors", json={"visitor_name": "연결 확인", "visit_ref": "check"}
+        )
+        response.raise_for_status()
+        body = response.json()
+        session_id = body.get("session_token") or body["session_id"]
+
+        completed = await stream_tokens(client, session_id, QUESTIONS["completed"], 0)
+        partial = await stream_tokens(
+            client, session_id, QUESTIONS["disconnected"], TOKENS_BEFORE_DISCONNECT
+        )
+
+    # The app only notices the closed socket on its next write.
+    deadline = time.monotonic() + 10
+    while True:
+        stats = (await control.get("/_stats")).json()
+        if stats.get("streams_aborted") or time.monotonic() > deadline:
+            break
+        await asyncio.sleep(0.1)
+    await control.aclose()
+    return {"completed": "".join(completed), "partial": "".join(partial), "stats": stats}
+
+
+async def logged_answers(path: Path) -> Dict[str, str]:
+    from app.services.storage import SQLiteStorage
+
+    page = await SQLiteStorage(str(path)).conversation_page(100)
+    return {row["question"]: row["answer"] for row in page}
+
+
+def main() -> None:
+    args = parse_args()
+    if args.serve:
+        serve(args.port)
+        return
+
+    openai_port, app_port = free_port(), free_port()
+    results: List[Dict[str, Any]] = []
+
+    def check(name: str, body: Callable[[], Dict[str, Any]]) -> None:
+        try:
+            outcome = body()
+        except Exception as exc:  # noqa: BLE001 - reported per check
+            outcome = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+        results.append({"check": name, **outcome})
+
+    with tempfile.TemporaryDirectory() as workdir:
+        sqlite_path = Path(workdir) / "storage.sqlite3"
+        env = {
+            **os.environ,
+            "OPENAI_API_KEY": "fake-key",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+            "ANSWER_CACHE_SIZE": "0",
+            "RATE_LIMIT_BACKEND": "memory",
+            "STARTUP_WARMUP": "blocking",
+            "KNOWLEDGE_RELOAD_SECONDS": "0",
+            "CONVERSATION_LOG_SPILL_PATH": "",
+            "STORAGE_BACKEND": "sqlite",
+            "STORAGE_SQLITE_PATH": str(sqlite_path),
+        }
+        fake = subprocess.Popen(
+            [
+                sys.executable,
+                str(ROOT_DIR / "scripts" / "fake_openai_server.py"),
+                "--port",
+                str(openai_port),
+                "--stream-chunk-ms",
+                str(CHUNK_MS),
+                "--answer",
+                ANSWER,
+            ],
+            cwd=ROOT_DIR,
+        )
+        server = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--serve", "--port", str(app_port)],
+            cwd=ROOT_DIR,
+            env=env,
+        )
+        try:
+            wait_until_up(f"http://127.0.0.1:{openai_port}/_stats", fake)
+            wait_until_up(f"http://127.0.0.1:{app_port}/ready", server)
+            outcome = asyncio.run(drive(app_port, openai_port))
+        finally:
+            # SIGTERM runs the app's shutdown, which flushes queued log writes.
+            for process in (server, fake):
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+        answers = asyncio.run(logged_answers(sqlite_path))
+
+    stats = outcome["stats"]
+
+    def completed_stream() -> Dict[str, Any]:
+        assert outcome["completed"] == ANSWER, outcome["completed"]
+        assert stats.get("streams_completed") == 1, stats
+        logged = answers.get(QUESTIONS["completed"])
+        assert logged == ANSWER, logged
+        return {"ok": True}
+
+    def upstream_aborted() -> Dict[str, Any]:
+        assert stats.get("streams_aborted") == 1, stats
+        return {"ok": True, "upstream_requests": stats.get("requests")}
+
+    def partial_answer_logged() -> Dict[str, Any]:
+        partial = outcome["partial"]
+        logged = answers.get(QUESTIONS["disconnected"])
+        assert logged, f"no log for the disconnected stream: {sorted(answers)}"
+        # The app may relay a few more deltas before it notices the close.
+        assert logged.startswith(partial) and len(partial) <= len(logged) < len(ANSWER), logged
+        return {"ok": True, "sent_chars": len(partial), "logged_chars": len(logged)}
+
+    check("completed_stream", completed_stream)
+    check("upstream_aborted", upstream_aborted)
+    check("partial_answer_logged", partial_answer_logged)
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    if not all(result["ok"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
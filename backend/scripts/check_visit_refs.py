@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Check how visit refs are stored and counted.
+
+Registers visitors through ``visitor_service.create_visitor`` against the
+in-memory ``scripts/fake_firestore.py`` and a throwaway SQLite file, with
+``ANALYTICS_MAX_REF_LABELS=2``: the visitor document keeps the ref as
+entered while the counter label is normalized, refs past the cap count as
+``other`` on both storages, and a failing counter write does not fail the
+registration. Prints a JSON report and exits non-zero when a check fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+MAX_LABELS = 2
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Visit ref storage and counter checks")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    return parser.parse_args()
+
+
+def configure_env() -> None:
+    # Settings are read at import time, so this runs before importing `app`.
+    os.environ.update(
+        {"ANALYTICS_MAX_REF_LABELS": str(MAX_LABELS), "ANALYTICS_REF_LABELS": "[]"}
+    )
+
+
+async def main_async(workdir: Path) -> List[Dict[str, Any]]:
+    import fake_firestore
+    from app.services import analytics_service, storage
+    from app.services.visitor_service import create_visitor
+
+    results: List[Dict[str, Any]] = []
+
+    async def check(name: str, body: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+        try:
+            outcome = await body()
+        except Exception as exc:  # noqa: BLE001 - reported per check
+            outcome = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+        results.append({"check": name, **outcome})
+
+    async def register(refs: List[str]) -> List[Dict[str, Any]]:
+        return [
+            await create_visitor({"visitor_name": "확인", "visit_ref": ref}) for ref in refs
+        ]
+
+    async def firestore_refs() -> Dict[str, Any]:
+        fake = fake_firestore.install()
+        storage._storage = storage.FirestoreStorage()
+        visitors = await register([" LinkedIn ", "wanted", "remember", "notion", ""])
+        stored = fake._collections[storage.VISITORS_COLLECTION][visitors[0]["session_id"]]
+        assert stored["visit_ref"] == "LinkedIn", stored["visit_ref"]
+        counts = dict(await storage.get_storage().load_counter(analytics_service.REF_STAT))
+        expected = {"linkedin": 1, "wanted": 1, "other": 2, "direct": 1}
+        assert counts == expected, counts
+        return {"ok": True, "counts": counts}
+
+    async def counter_failure() -> Dict[str, Any]:
+        fake = fake_firestore.install()
+        storage._storage = storage.FirestoreStorage()
+        batch = fake.batch
+
+        def failing_batch():
+            broken = batch()
+
+            async def commit():
+                raise RuntimeError("counter shard unavailable")
+
+            broken.commit = commit
+            return broken
+
+        fake.batch = failing_batch
+        visitor = (await register(["linkedin"]))[0]
+        assert visitor["session_id"] in fake._collections[storage.VISITORS_COLLECTION]
+        return {"ok": True}
+
+    async def sqlite_refs() -> Dict[str, Any]:
+        storage._storage = storage.SQLiteStorage(str(workdir / "refs.sqlite3"))
+        await register(["LinkedIn", "linkedin", "wanted", "wanted", "remember", ""])
+        rows = await storage._storage._run(
+            storage._storage._query, "SELECT visit_ref FROM visitors ORDER BY visit_ref"
+        )
+        assert "LinkedIn" in [row["visit_ref"] for row in rows], "raw ref not stored"
+        counts = dict(await storage._storage.load_counter(analytics_service.REF_STAT))
+        expected = {"linkedin": 2, "wanted": 2, "other": 1, "direct": 1}
+        assert counts == expected, counts
+        return {"ok": True, "counts": counts}
+
+    await check("firestore_refs", firestore_refs)
+    await check("counter_failure", counter_failure)
+    await check("sqlite_refs", sqlite_refs)
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    configure_env()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = asyncio.run(main_async(Path(workdir)))
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    if not all(result["ok"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
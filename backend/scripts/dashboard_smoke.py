@@ -47,7 +47,7 @@ def main() -> None:
                 headers=headers,
             )
             logs_resp.raise_for_status()
-            logs = logs_resp.json()
+            logs = logs_resp.json()["items"]
     except httpx.HTTPStatusError as exc:
         print(
             f"[ERROR] {exc.response.status_code} {exc.request.url} | "
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Export every conversation log as NDJSON or CSV (optionally gzip).
+
+Reads the configured storage directly (``STORAGE_BACKEND`` and Firebase
+credentials from ``backend/.env``), one page at a time, and writes each page
+as it arrives, so memory stays flat however long the history is. The same
+stream is served to admins by ``GET /api/dashboard/export``.
+
+    python scripts/export_conversations.py --format csv --gzip \\
+        --since 2026-10-01 --until 2026-11-01 --ref linkedin -o october.csv.gz
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+load_dotenv(ROOT_DIR / ".env")
+
+from app.services import export_service  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export conversation logs")
+    parser.add_argument("--format", choices=export_service.EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--gzip", action="store_true", help="gzip 압축해서 저장")
+    parser.add_argument(
+        "--since", type=datetime.fromisoformat, help="시작 시각 포함 (예: 2026-10-01, 오프셋 없으면 UTC)"
+    )
+    parser.add_argument("--until", type=datetime.fromisoformat, help="종료 시각 미포함")
+    parser.add_argument("--ref", help="저장된 유입 경로(visit_ref) 값, 없는 경우 direct")
+    parser.add_argument(
+        "--page-size", type=int, default=export_service.DEFAULT_PAGE_SIZE, help="페이지당 문서 수"
+    )
+    parser.add_argument("-o", "--output", help="저장 경로 (생략하면 표준 출력)")
+    return parser.parse_args()
+
+
+async def export(args: argparse.Namespace, out: BinaryIO) -> int:
+    written = 0
+    async for chunk in export_service.export_conversations(
+        args.format,
+        compress=args.gzip,
+        since=args.since,
+        until=args.until,
+        ref=args.ref,
+        page_size=args.page_size,
+    ):
+        out.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def main() -> None:
+    args = parse_args()
+    try:
+        export_service.normalize_range(args.since, args.until)
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from exc
+
+    started = time.perf_counter()
+    if args.output:
+        with open(args.output, "wb") as out:
+            written = asyncio.run(export(args, out))
+    else:
+        written = asyncio.run(export(args, sys.stdout.buffer))
+    print(
+        f"exported {written:,} bytes in {time.perf_counter() - started:.1f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""In-memory stand-in for the async Firestore client, for local load tests.
+
+Implements the subset the app uses: collections and (sub)documents,
+``get``/``set`` with ``merge``, ``get_all``, ``WriteBatch``, comparison
+and ``in`` ``where`` filters, ``order_by`` (including ``__name__``), ``start_after``,
+``select``, ``limit`` and ``stream``. ``SERVER_TIMESTAMP`` and ``Increment`` are
+resolved on write, and writes return a ``WriteResult`` whose
+``transform_results`` carry the committed transform values in field-path
+order, as Firestore does. Every round-trip (document get/set, batch commit, query
+stream) sleeps ``latency`` seconds so results approximate a remote database.
+
+Install it with ``install()`` before the app handles requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import functools
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from firebase_admin import firestore
+from google.cloud.firestore_v1._helpers import encode_value
+from google.cloud.firestore_v1.types import write
+
+NAME_FIELD = "__name__"
+
+_FILTER_OPS = {
+    "==": lambda left, right: left == right,
+    "!=": lambda left, right: left != right,
+    "<": lambda left, right: left is not None and left < right,
+    "<=": lambda left, right: left is not None and left <= right,
+    ">": lambda left, right: left is not None and left > right,
+    ">=": lambda left, right: left is not None and left >= right,
+    "in": lambda left, right: left in right,
+}
+
+
+def _resolve(value: Any, current: Any) -> Any:
+    if value is firestore.SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc)
+    if isinstance(value, firestore.Increment):
+        return (current if isinstance(current, (int, float)) else 0) + value.value
+    if isinstance(value, dict):
+        base = current if isinstance(current, dict) else {}
+        return {key: _resolve(item, base.get(key)) for key, item in value.items()}
+    return value
+
+
+def _merge(target: Dict[str, Any], data: Dict[str, Any]) -> None:
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = _resolve(value, target.get(key))
+
+
+def _transform_paths(data: Dict[str, Any], prefix: Tuple[str, ...] = ()) -> List[Tuple[str, ...]]:
+    paths: List[Tuple[str, ...]] = []
+    for key, value in data.items():
+        path = prefix + (key,)
+        if value is firestore.SERVER_TIMESTAMP or isinstance(value, firestore.Increment):
+            paths.append(path)
+        elif isinstance(value, dict):
+            paths.extend(_transform_paths(value, path))
+    return paths
+
+
+def _write_result(doc: Dict[str, Any], data: Dict[str, Any]) -> write.WriteResult:
+    values = []
+    for path in sorted(_transform_paths(data)):
+        value: Any = doc
+        for key in path:
+            value = value[key]
+        values.append(encode_value(value))
+    return write.WriteResult(transform_results=values)
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id: str, data: Optional[Dict[str, Any]]) -> None:
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+
+class FakeDocumentReference:
+    def __init__(self, client: "FakeAsyncClient", path: str, doc_id: str) -> None:
+        self._client = client
+        self._path = path
+        self.id = doc_id
+
+    def collection(self, name: str) -> "FakeCollection":
+        return FakeCollection(self._client, f"{self._path}/{self.id}/{name}")
+
+    def _write(self, data: Dict[str, Any], merge: bool) -> write.WriteResult:
+        docs = self._client._collections.setdefault(self._path, {})
+        if merge and self.id in docs:
+            _merge(docs[self.id], data)
+        else:
+            docs[self.id] = _resolve(data, None)
+        self._client.ops["writes"] += 1
+        return _write_result(docs[self.id], data)
+
+    async def get(self) -> FakeSnapshot:
+        await self._client._round_trip("reads")
+        data = self._client._collections.get(self._path, {}).get(self.id)
+        return FakeSnapshot(self.id, copy.deepcopy(data))
+
+    async def set(self, data: Dict[str, Any], merge: bool = False) -> write.WriteResult:
+        await self._client._round_trip("commits")
+        return self._write(data, merge)
+
+
+class FakeQuery:
+    def __init__(
+        self,
+        client: "FakeAsyncClient",
+        path: str,
+        filters: Tuple[Tuple[str, str, Any], ...] = (),
+        orders: Tuple[Tuple[str, str], ...] = (),
+        limit: Optional[int] = None,
+        fields: Optional[Tuple[str, ...]] = None,
+        cursor: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self._client = client
+        self._path = path
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit
+        self._fields = fields
+        self._cursor = cursor
+
+    def _copy(self, **changes: Any) -> "FakeQuery":
+        state = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit": self._limit,
+            "fields": self._fields,
+            "cursor": self._cursor,
+            **changes,
+        }
+        return FakeQuery(self._client, self._path, **state)
+
+    def where(self, *, filter: Any) -> "FakeQuery":  # noqa: A002 - Firestore's name
+        if filter.op_string not in _FILTER_OPS:
+            raise NotImplementedError(f"operator {filter.op_string} is not faked")
+        return self._copy(
+            filters=self._filters + ((filter.field_path, filter.op_string, filter.value),)
+        )
+
+    def order_by(self, field: str, direction: str = firestore.Query.ASCENDING) -> "FakeQuery":
+        return self._copy(orders=self._orders + ((field, direction),))
+
+    def limit(self, count: int) -> "FakeQuery":
+        return self._copy(limit=count)
+
+    def select(self, fields: List[str]) -> "FakeQuery":
+        return self._copy(fields=tuple(fields))
+
+    def start_after(self, values: Dict[str, Any]) -> "FakeQuery":
+        return self._copy(cursor=dict(values))
+
+    def _order_key(self, doc_id: str, data: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(
+            doc_id if field == NAME_FIELD else data.get(field)
+            for field, _ in self._orders
+        )
+
+    def _compare(self, left: Tuple[Any, ...], right: Tuple[Any, ...]) -> int:
+        for (_, direction), a, b in zip(self._orders, left, right):
+            if a == b:
+                continue
+            if a is None or b is None:
+                result = -1 if a is None else 1
+            else:
+                result = -1 if a < b else 1
+            return -result if direction == firestore.Query.DESCENDING else result
+        return 0
+
+    async def stream(self) -> AsyncIterator[FakeSnapshot]:
+        await self._client._round_trip("queries")
+        docs = self._client._collections.get(self._path, {})
+        rows = [
+            (doc_id, data)
+            for doc_id, data in docs.items()
+            if all(
+                _FILTER_OPS[op](data.get(field), value)
+                for field, op, value in self._filters
+            )
+        ]
+        if self._orders:
+            rows.sort(
+                key=functools.cmp_to_key(
+                    lambda a, b: self._compare(
+                        self._order_key(*a), self._order_key(*b)
+                    )
+                )
+            )
+        if self._cursor is not None:
+            cursor = tuple(self._cursor.get(field) for field, _ in self._orders)
+            rows = [
+                row for row in rows if self._compare(self._order_key(*row), cursor) > 0
+            ]
+        if self._limit is not None:
+            rows = rows[: self._limit]
+        for doc_id, data in rows:
+            self._client.ops["reads"] += 1
+            if self._fields is not None:
+                data = {field: data[field] for field in self._fields if field in data}
+            yield FakeSnapshot(doc_id, copy.deepcopy(data))
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, client: "FakeAsyncClient", path: str) -> None:
+        super().__init__(client, path)
+
+    def document(self, doc_id: Optional[str] = None) -> FakeDocumentReference:
+        return FakeDocumentReference(self._client, self._path, doc_id or uuid.uuid4().hex)
+
+
+class FakeWriteBatch:
+    def __init__(self, client: "FakeAsyncClient") -> None:
+        self._client = client
+        self._writes: List[Tuple[FakeDocumentReference, Dict[str, Any], bool]] = []
+
+    def set(self, ref: FakeDocumentReference, data: Dict[str, Any], merge: bool = False) -> None:
+        self._writes.append((ref, data, merge))
+
+    async def commit(self) -> List[write.WriteResult]:
+        await self._client._round_trip("commits")
+        return [ref._write(data, merge) for ref, data, merge in self._writes]
+
+
+class FakeAsyncClient:
+    """Async Firestore look-alike holding every collection in a dict."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.ops: Counter = Counter()
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    async def _round_trip(self, kind: str) -> None:
+        self.ops[kind] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    async def get_all(self, refs: List[FakeDocumentReference]) -> AsyncIterator[FakeSnapshot]:
+        await self._round_trip("reads")
+        for ref in refs:
+            data = self._collections.get(ref._path, {}).get(ref.id)
+            yield FakeSnapshot(ref.id, copy.deepcopy(data))
+
+    def document_count(self, path: str) -> int:
+        return len(self._collections.get(path, {}))
+
+
+def install(latency: float = 0.0) -> FakeAsyncClient:
+    """Make ``get_async_firestore_client()`` return a fresh fake client."""
+    from app.core import firebase
+
+    client = FakeAsyncClient(latency=latency)
+    firebase._async_firestore_client = client
+    return client
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""Local stand-in for the OpenAI chat completions API.
+
+Serves ``POST /v1/chat/completions`` (plain and ``stream=true`` SSE) with a
+canned answer after ``--latency-ms``; streamed chunks are spaced by
+``--stream-chunk-ms``. Failures are scripted per request:
+``POST /_script`` queues steps such as ``{"status": 429, "retry_after": 1}``,
+``{"delay": 3}`` or ``{"chunk_delay": 0.1}`` that the next completions
+consume in order, and ``GET /_stats`` reports request counts, how many
+distinct client connections were seen (to check keep-alive reuse) and how
+many streams ran to the end or were cut off by the client
+(``streams_completed``, ``streams_aborted``). ``GET /_requests`` returns
+the user message of recent requests (to check what was sent).
+``POST /_reset`` clears all of them.
+Prompt caching is imitated: once a leading system message has been seen,
+later requests starting with the same bytes report it (rounded down to 128
+tokens, from 1024) as ``cached_tokens``. Point the app at it with
+``OPENAI_BASE_URL=http://127.0.0.1:<port>/v1``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter, deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_ANSWER = "안녕하세요, 309입니다. 테스트 서버에서 생성된 답변이에요."
+
+app = FastAPI(title="fake-openai")
+app.state.latency = 0.0
+app.state.answer = DEFAULT_ANSWER
+app.state.chunk_delay = 0.0
+_steps: Deque[Dict[str, Any]] = deque()
+_stats: Counter = Counter()
+_connections: set = set()
+_seen_prefixes: set = set()
+_user_messages: Deque[str] = deque(maxlen=200)
+
+# OpenAI caches prompts of at least 1024 tokens in 128-token increments.
+CACHE_MIN_TOKENS = 1024
+CACHE_INCREMENT = 128
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 2)
+
+
+def _cached_tokens(messages: List[Dict[str, Any]]) -> int:
+    if not messages or messages[0].get("role") != "system":
+        return 0
+    prefix = str(messages[0].get("content", ""))
+    tokens = _estimate_tokens(prefix)
+    if prefix not in _seen_prefixes:
+        _seen_prefixes.add(prefix)
+        return 0
+    if tokens < CACHE_MIN_TOKENS:
+        return 0
+    return tokens - tokens % CACHE_INCREMENT
+
+
+def _usage(messages: List[Dict[str, Any]], answer: str) -> Dict[str, Any]:
+    prompt_tokens = sum(
+        _estimate_tokens(str(message.get("content", ""))) for message in messages
+    )
+    completion_tokens = _estimate_tokens(answer)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": _cached_tokens(messages)},
+    }
+
+
+def _completion(model: str, answer: str, usage: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": f"chatcmpl-fake-{_stats['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": answer},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": usage,
+    }
+
+
+async def _stream(
+    model: str, answer: str, usage: Optional[Dict[str, Any]], chunk_delay: float
+) -> AsyncIterator[str]:
+    base = {
+        "id": f"chatcmpl-fake-{_stats['requests']}",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+    }
+    finished = False
+    try:
+        for start in range(0, len(answer), 8):
+            if start and chunk_delay:
+                await asyncio.sleep(chunk_delay)
+            chunk = {
+                **base,
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {"content": answer[start : start + 8]},
+                        "finish_reason": None,
+                    }
+                ],
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+        done = {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        yield f"data: {json.dumps(done)}\n\n"
+        if usage is not None:
+            # Like OpenAI with stream_options.include_usage: a final usage-only chunk.
+            yield f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n"
+        yield "data: [DONE]\n\n"
+        finished = True
+    finally:
+        # A client that closes the connection mid-answer ends up here early.
+        _stats["streams_completed" if finished else "streams_aborted"] += 1
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    _stats["requests"] += 1
+    if request.client:
+        _connections.add((request.client.host, request.client.port))
+    body = await request.json()
+    _user_messages.extend(
+        str(message.get("content", ""))
+        for message in body.get("messages", [])
+        if message.get("role") == "user"
+    )
+    step: Optional[Dict[str, Any]] = _steps.popleft() if _steps else None
+
+    delay = app.state.latency + ((step or {}).get("delay") or 0)
+    if delay:
+        await asyncio.sleep(delay)
+
+    status = (step or {}).get("status", 200)
+    if status != 200:
+        _stats[f"status_{status}"] += 1
+        headers = {}
+        if (step or {}).get("retry_after") is not None:
+            headers["retry-after"] = str(step["retry_after"])
+        return JSONResponse(
+            {"error": {"message": f"fake error {status}", "type": "fake_error", "code": None}},
+            status_code=status,
+            headers=headers,
+        )
+
+    _stats["status_200"] += 1
+    answer = (step or {}).get("answer", app.state.answer)
+    usage = _usage(body.get("messages", []), answer)
+    model = body.get("model", "fake-model")
+    if body.get("stream"):
+        if not (body.get("stream_options") or {}).get("include_usage"):
+            usage = None
+        chunk_delay = (step or {}).get("chunk_delay", app.state.chunk_delay)
+        return StreamingResponse(
+            _stream(model, answer, usage, chunk_delay), media_type="text/event-stream"
+        )
+    return _completion(model, answer, usage)
+
+
+@app.post("/_script")
+async def script(steps: List[Dict[str, Any]]):
+    _steps.extend(steps)
+    return {"queued": len(_steps)}
+
+
+@app.get("/_stats")
+async def stats():
+    return {**_stats, "connections": len(_connections), "queued": len(_steps)}
+
+
+@app.get("/_requests")
+async def requests_seen():
+    return {"user_messages": list(_user_messages)}
+
+
+@app.post("/_reset")
+async def reset():
+    _user_messages.clear()
+    _steps.clear()
+    _stats.clear()
+    _connections.clear()
+    _seen_prefixes.clear()
+    return {"ok": True}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="응답마다 추가되는 지연")
+    parser.add_argument(
+        "--stream-chunk-ms", type=float, default=0.0, help="스트리밍 청크 사이 지연"
+    )
+    parser.add_argument("--answer", default=DEFAULT_ANSWER, help="고정 답변 문장")
+    return parser.parse_args()
+
+
+def main() -> None:
+    import uvicorn
+
+    args = parse_args()
+    app.state.latency = args.latency_ms / 1000
+    app.state.answer = args.answer
+    app.state.chunk_delay = args.stream_chunk_ms / 1000
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
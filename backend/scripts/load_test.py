@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""Offline load test: the API against fake Firestore and fake OpenAI.
+
+Boots the app in a uvicorn subprocess whose async Firestore client is the
+in-memory ``scripts/fake_firestore.py`` (or, with ``--storage sqlite``, a
+fresh SQLite file; admin auth is bypassed there), with OpenAI pointed at
+``scripts/fake_openai_server.py``. Both stand-ins take a configurable
+latency. Endpoints are driven one phase at a time at
+``--concurrency`` and each gets throughput plus p50/p95/p99 latency (and
+time to first token for streaming). The JSON report carries the git commit
+so runs can be compared across commits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+PHASES = (
+    "visitors",
+    "chat",
+    "chat_stream",
+    "dashboard_stats",
+    "dashboard_logs",
+    "dashboard_cache",
+)
+
+QUESTIONS = (
+    "309의 협업 스타일은?",
+    "가장 어려웠던 프로젝트 의사결정은?",
+    "디자인 시스템을 어떻게 운영했나요?",
+    "UX 리서치는 어떻게 진행하나요?",
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline API load test")
+    parser.add_argument("--requests", type=int, default=200, help="엔드포인트별 요청 수")
+    parser.add_argument("--concurrency", type=int, default=20, help="동시 요청 수")
+    parser.add_argument(
+        "--phases", default=",".join(PHASES), help=f"실행할 단계 (쉼표 구분): {', '.join(PHASES)}"
+    )
+    parser.add_argument(
+        "--storage",
+        default="firestore",
+        choices=["firestore", "sqlite"],
+        help="STORAGE_BACKEND (firestore는 인메모리 가짜 사용)",
+    )
+    parser.add_argument("--firestore-latency-ms", type=float, default=10.0)
+    parser.add_argument("--openai-latency-ms", type=float, default=300.0, help="첫 바이트까지 지연")
+    parser.add_argument("--stream-chunk-ms", type=float, default=20.0)
+    parser.add_argument(
+        "--answer-cache",
+        action="store_true",
+        help="답변 캐시 사용 (기본은 꺼서 매 요청 LLM 경로를 측정)",
+    )
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    # Internal: run the app server with the fakes installed.
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def serve(port: int, firestore_latency: float) -> None:
+    import uvicorn
+
+    import fake_firestore
+    from app.core.auth import verify_admin
+    from app.core.config import settings
+    from app.main import app
+
+    if settings.storage_backend == "firestore":
+        fake_firestore.install(latency=firestore_latency)
+    app.dependency_overrides[verify_admin] = lambda: {"email": "loadtest@localhost"}
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with {process.returncode}")
+        try:
+            if httpx.get(url).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of ``samples`` (ms), rounded to 0.1."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)], 1)
+
+
+def summarize(latencies: List[float], errors: int, wall: float) -> Dict[str, Any]:
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": round(max(latencies), 1) if latencies else None,
+    }
+
+
+async def run_phase(
+    count: int, concurrency: int, send: Callable[[int], Awaitable[Optional[float]]]
+) -> Dict[str, Any]:
+    """Call ``send(i)`` ``count`` times from ``concurrency`` workers.
+
+    ``send`` raises on failure and may return an extra timing (ms), which is
+    reported as time to first token.
+    """
+    latencies: List[float] = []
+    first_token: List[float] = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker() -> None:
+        nonlocal errors
+        while (index := next(counter)) < count:
+            started = time.perf_counter()
+            try:
+                extra = await send(index)
+            except Exception:  # noqa: BLE001 - counted as an error
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            if extra is not None:
+                first_token.append(extra)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    report = summarize(latencies, errors, time.perf_counter() - started)
+    if first_token:
+        report["ttft_p50_ms"] = percentile(first_token, 50)
+        report["ttft_p95_ms"] = percentile(first_token, 95)
+        report["ttft_p99_ms"] = percentile(first_token, 99)
+    return report
+
+
+async def drive(base_url: str, args: argparse.Namespace) -> Dict[str, Any]:
+    phases = [name.strip() for name in args.phases.split(",") if name.strip()]
+    unknown = sorted(set(phases) - set(PHASES))
+    if unknown:
+        raise SystemExit(f"unknown phases: {', '.join(unknown)}")
+
+    sessions: List[str] = []
+    limits = httpx.Limits(max_connections=args.concurrency)
+    results: Dict[str, Any] = {}
+    async with httpx.AsyncClient(
+        base_url=f"{base_url}/api", limits=limits, timeout=60
+    ) as client:
+
+        async def create_visitor(index: int) -> None:
+            response = await client.post(
+                "/visitors",
+                json={
+                    "visitor_name": f"load-{index}",
+                    "visitor_affiliation": "load-test",
+                    "visit_ref": f"ref-{index % 5}",
+                },
+            )
+            response.raise_for_status()
+            body = response.json()
+            sessions.append(body.get("session_token") or body["session_id"])
+
+        def chat_payload(index: int) -> Dict[str, str]:
+            return {
+                "session_id": sessions[index % len(sessions)],
+                "question": QUESTIONS[index % len(QUESTIONS)],
+            }
+
+        async def chat(index: int) -> None:
+            response = await client.post("/chat", json=chat_payload(index))
+            response.raise_for_status()
+            if response.json()["blocked"]:
+                raise RuntimeError("question was blocked")
+
+        async def chat_stream(index: int) -> float:
+            started = time.perf_counter()
+            first_token = None
+            async with client.stream("POST", "/chat/stream", json=chat_payload(index)) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if first_token is None and line == "event: token":
+                        first_token = (time.perf_counter() - started) * 1000
+                    if line == "event: error":
+                        raise RuntimeError("stream error event")
+            if first_token is None:
+                raise RuntimeError("no token event")
+            return first_token
+
+        async def get(path: str) -> None:
+            (await client.get(path)).raise_for_status()
+
+        senders: Dict[str, Callable[[int], Awaitable[Optional[float]]]] = {
+            "visitors": create_visitor,
+            "chat": chat,
+            "chat_stream": chat_stream,
+            "dashboard_stats": lambda _: get("/dashboard/stats"),
+            "dashboard_logs": lambda _: get("/dashboard/logs?limit=50"),
+            "dashboard_cache": lambda _: get("/dashboard/cache"),
+        }
+        if any(name.startswith("chat") for name in phases) and "visitors" not in phases:
+            # Chat needs sessions even when visitors are not measured.
+            await asyncio.gather(*(create_visitor(i) for i in range(args.concurrency)))
+
+        for name in phases:
+            results[name] = await run_phase(args.requests, args.concurrency, senders[name])
+            print(f"{name}: {results[name]}", file=sys.stderr)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    args = parse_args()
+    if args.serve:
+        serve(args.port, args.firestore_latency_ms / 1000)
+        return
+
+    openai_port, app_port = free_port(), free_port()
+    workdir = tempfile.TemporaryDirectory(prefix="load-test-")
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "fake-key",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+        "SESSION_TOKEN_SECRET": "load-test-secret",
+        "MAX_SESSION_QUESTIONS": "1000000",
+        "RATE_LIMIT_BACKEND": "memory",
+        "STARTUP_WARMUP": "blocking",
+        "CONVERSATION_LOG_SPILL_PATH": "",
+        "STORAGE_BACKEND": args.storage,
+        "STORAGE_SQLITE_PATH": str(Path(workdir.name) / "storage.sqlite3"),
+    }
+    if not args.answer_cache:
+        env["ANSWER_CACHE_SIZE"] = "0"
+
+    processes = []
+    try:
+        processes.append(
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    str(ROOT_DIR / "scripts" / "fake_openai_server.py"),
+                    "--port",
+                    str(openai_port),
+                    "--latency-ms",
+                    str(args.openai_latency_ms),
+                    "--stream-chunk-ms",
+                    str(args.stream_chunk_ms),
+                ],
+                cwd=ROOT_DIR,
+            )
+        )
+        processes.append(
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    str(Path(__file__).resolve()),
+                    "--serve",
+                    "--port",
+                    str(app_port),
+                    "--firestore-latency-ms",
+                    str(args.firestore_latency_ms),
+                ],
+                cwd=ROOT_DIR,
+                env=env,
+            )
+        )
+        wait_until_up(f"http://127.0.0.1:{openai_port}/_stats", processes[0])
+        wait_until_up(f"http://127.0.0.1:{app_port}/ready", processes[1])
+        endpoints = asyncio.run(drive(f"http://127.0.0.1:{app_port}", args))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        workdir.cleanup()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "storage": args.storage,
+            "firestore_latency_ms": args.firestore_latency_ms,
+            "openai_latency_ms": args.openai_latency_ms,
+            "stream_chunk_ms": args.stream_chunk_ms,
+            "answer_cache": args.answer_cache,
+        },
+        "endpoints": endpoints,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
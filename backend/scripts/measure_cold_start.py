@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Measure cold-start cost: `app.main` import time and time to first chat.
+
+Import time is measured in fresh interpreters. Time to first chat starts a
+uvicorn process and records when it accepts connections, when `/ready`
+turns 200 and when the first visitor + chat round-trip succeeds. The server
+needs working Firebase/OpenAI settings in `backend/.env`; pass `--base-url`
+to time only the first chat against an already deployed (scaled-to-zero)
+instance instead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import httpx
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import app.main; "
+    "print((time.perf_counter() - t) * 1000)"
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Cold-start measurement")
+    parser.add_argument("--runs", type=int, default=5, help="import 측정 반복 횟수")
+    parser.add_argument(
+        "--warmup-mode",
+        default="background",
+        choices=["blocking", "background", "off"],
+        help="서버 실행 시 STARTUP_WARMUP 값",
+    )
+    parser.add_argument(
+        "--base-url",
+        help="이미 배포된 서버 루트 주소, /api 제외 (지정 시 서버를 띄우지 않고 첫 채팅만 측정)",
+    )
+    parser.add_argument(
+        "--question",
+        default="309의 프로젝트 경험 중 가장 어려웠던 의사결정은?",
+        help="첫 채팅 질문",
+    )
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--skip-chat", action="store_true", help="import 시간만 측정")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    return parser.parse_args()
+
+
+def measure_import(runs: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return {
+        "median_ms": round(statistics.median(samples), 1),
+        "min_ms": round(min(samples), 1),
+        "max_ms": round(max(samples), 1),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(client: httpx.Client, url: str, deadline: float) -> Optional[float]:
+    """Poll ``url`` until it returns 200; returns the time it did."""
+    while time.perf_counter() < deadline:
+        try:
+            if client.get(url).status_code == 200:
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        time.sleep(0.02)
+    return None
+
+
+def wait_ready(client: httpx.Client, url: str, deadline: float) -> float:
+    """Poll `/ready` until warm-up finishes; raises if it failed."""
+    while time.perf_counter() < deadline:
+        body = client.get(url).json()
+        if body["status"] not in ("pending", "warming"):
+            if body["errors"]:
+                raise RuntimeError(f"warm-up failed: {body['errors']}")
+            return time.perf_counter()
+        time.sleep(0.02)
+    raise RuntimeError("server did not become ready")
+
+
+def first_chat(client: httpx.Client, api_url: str, question: str) -> Dict[str, object]:
+    visitor = client.post(
+        f"{api_url}/visitors",
+        json={"visitor_name": "cold-start", "visit_ref": "cold-start"},
+    )
+    visitor.raise_for_status()
+    session = visitor.json()
+    chat = client.post(
+        f"{api_url}/chat",
+        json={
+            "session_id": session.get("session_token") or session["session_id"],
+            "question": question,
+        },
+    )
+    chat.raise_for_status()
+    return {"blocked": chat.json().get("blocked")}
+
+
+def measure_server(args: argparse.Namespace) -> Dict[str, object]:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "STARTUP_WARMUP": args.warmup_mode}
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        cwd=ROOT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        deadline = started + args.timeout
+        with httpx.Client(timeout=args.timeout) as client:
+            listening = wait_for(client, f"{base}/health", deadline)
+            if listening is None:
+                raise RuntimeError("server did not start listening")
+            ready = (
+                listening
+                if args.warmup_mode == "off"
+                else wait_ready(client, f"{base}/ready", deadline)
+            )
+            chat = first_chat(client, f"{base}/api", args.question)
+            chatted = time.perf_counter()
+        return {
+            "warmup_mode": args.warmup_mode,
+            "time_to_listen_ms": round((listening - started) * 1000, 1),
+            "time_to_ready_ms": round((ready - started) * 1000, 1),
+            "time_to_first_chat_ms": round((chatted - started) * 1000, 1),
+            **chat,
+        }
+    finally:
+        server.terminate()
+        try:
+            _, stderr = server.communicate(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            _, stderr = server.communicate()
+        if server.returncode not in (0, -15) and stderr:
+            print(stderr[-2000:], file=sys.stderr)
+
+
+def measure_remote(args: argparse.Namespace) -> Dict[str, object]:
+    started = time.perf_counter()
+    with httpx.Client(timeout=args.timeout) as client:
+        chat = first_chat(client, f"{args.base_url.rstrip('/')}/api", args.question)
+    return {
+        "base_url": args.base_url,
+        "time_to_first_chat_ms": round((time.perf_counter() - started) * 1000, 1),
+        **chat,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    report: Dict[str, object] = {"import_app_main": measure_import(args.runs)}
+    if not args.skip_chat:
+        report["first_chat"] = (
+            measure_remote(args) if args.base_url else measure_server(args)
+        )
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import os
 import sys
 from pathlib import Path
@@ -17,7 +18,6 @@ if str(ROOT_DIR) not in sys.path:
 load_dotenv(ROOT_DIR / ".env")
 
 from app.services import llm_service, question_filter  # noqa: E402
-from app.services.knowledge_base import build_context_block  # noqa: E402
 
 
 def parse_args() -> argparse.Namespace:
@@ -59,15 +59,28 @@ def main() -> None:
     category = question_filter.detect_category(args.question) or "general"
 
     if args.dry_run:
-        prompt = llm_service.build_user_payload(args.question, category, visitor)
-        context = build_context_block()
-        print("=== DRY RUN CONTEXT ===")
-        print(context)
+        messages, report = llm_service.build_messages_with_report(
+            args.question, category, visitor
+        )
+        print("=== DRY RUN CONTEXT (static prefix) ===")
+        print(messages[0]["content"])
+        if len(messages) > 2:
+            print("=== DRY RUN RETRIEVED DOCUMENTS ===")
+            print(messages[1]["content"])
         print("=== DRY RUN USER PAYLOAD ===")
-        print(prompt)
+        print(messages[-1]["content"])
+        print("=== DRY RUN TOKENS ===")
+        print(
+            f"input={report.input_tokens} prefix={report.prefix_tokens} "
+            f"budget={report.budget} tokenizer={report.tokenizer}"
+        )
+        for name, tokens in report.sections.items():
+            print(f"- {name}: {tokens}")
         return
 
-    answer = llm_service.generate_persona_answer(args.question, category, visitor)
+    answer = asyncio.run(
+        llm_service.generate_persona_answer(args.question, category, visitor)
+    )
     print("=== PERSONA ANSWER ===")
     print(answer)
 
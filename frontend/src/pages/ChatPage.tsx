@@ -126,6 +126,7 @@ export function ChatPage() {
     try {
       const response = await sendQuestion({
         sessionId: session.sessionId,
+        sessionToken: session.sessionToken,
         question,
       });
       appendMessage({
@@ -12,6 +12,8 @@ export function DashboardPage() {
   const auth = useAdminAuth();
   const [stats, setStats] = useState<DashboardStats | null>(null);
   const [logs, setLogs] = useState<ConversationRecord[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loadingData, setLoadingData] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
@@ -41,7 +43,8 @@ export function DashboardPage() {
         getConversationLogs(token, 50),
       ]);
       setStats(statsResponse);
-      setLogs(logsResponse);
+      setLogs(logsResponse.items);
+      setNextCursor(logsResponse.next_cursor ?? null);
     } catch (e) {
       setError((e as Error).message);
     } finally {
@@ -49,12 +52,29 @@ export function DashboardPage() {
     }
   };
 
+  const loadMoreLogs = async () => {
+    if (!auth.user || !nextCursor) return;
+    setLoadingMore(true);
+    setError(null);
+    try {
+      const token = await auth.user.getIdToken();
+      const page = await getConversationLogs(token, 50, nextCursor);
+      setLogs((prev) => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor ?? null);
+    } catch (e) {
+      setError((e as Error).message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     if (auth.user) {
       fetchData();
     } else {
       setStats(null);
       setLogs([]);
+      setNextCursor(null);
     }
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [auth.user]);
@@ -106,6 +126,11 @@ export function DashboardPage() {
         <StatCard label="많이 묻는 카테고리" value={popularCategory} />
       </div>
       {error ? <p className="text-sm text-rose-500">{error}</p> : null}
+      {stats?.partial ? (
+        <p className="text-sm text-amber-600">
+          일부 데이터를 제때 불러오지 못해 부분 결과를 표시합니다. 잠시 후 새로고침해 주세요.
+        </p>
+      ) : null}
       <section className="grid gap-6 lg:grid-cols-2">
         <div className="glass-panel rounded-3xl p-6">
           <div className="flex items-center justify-between">
@@ -165,6 +190,11 @@ export function DashboardPage() {
             ) : (
               <p className="text-sm text-slate-500">아직 로그가 없습니다.</p>
             )}
+            {nextCursor ? (
+              <Button variant="ghost" onClick={loadMoreLogs} loading={loadingMore}>
+                더 보기
+              </Button>
+            ) : null}
           </div>
         </div>
       </section>
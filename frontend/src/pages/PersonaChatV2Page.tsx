@@ -695,6 +695,7 @@ export function PersonaChatV2Page() {
     try {
       const response = await sendQuestion({
         sessionId: session.sessionId,
+        sessionToken: session.sessionToken,
         question: enrichQuestionContext(trimmed),
       });
       const normalizedAnswer =
@@ -1,7 +1,7 @@
 import type {
   ChatRequestPayload,
   ChatResponseBody,
-  ConversationRecord,
+  ConversationPage,
   DashboardStats,
   SessionInfo,
   VisitorPayload,
@@ -69,6 +69,7 @@ export async function createVisitor(payload: VisitorPayload): Promise<SessionInf
 
   return {
     sessionId: data.session_id,
+    sessionToken: data.session_token,
     visitorName: data.visitor_name,
     visitorAffiliation: data.visitor_affiliation,
     visitRef: data.visit_ref,
@@ -77,7 +78,8 @@ export async function createVisitor(payload: VisitorPayload): Promise<SessionInf
 
 export async function sendQuestion(payload: ChatRequestPayload): Promise<ChatResponseBody> {
   const body = {
-    session_id: payload.sessionId,
+    // Signed tokens are verified by the API without a visitor lookup.
+    session_id: payload.sessionToken ?? payload.sessionId,
     question: payload.question,
   };
 
@@ -98,8 +100,13 @@ export async function getDashboardStats(idToken: string): Promise<DashboardStats
 export async function getConversationLogs(
   idToken: string,
   limit = 50,
-): Promise<ConversationRecord[]> {
-  return request<ConversationRecord[]>(`/dashboard/logs?limit=${limit}`, {
+  cursor?: string,
+): Promise<ConversationPage> {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
+  return request<ConversationPage>(`/dashboard/logs?${params.toString()}`, {
     headers: {
       Authorization: `Bearer ${idToken}`,
     },
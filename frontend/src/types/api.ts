@@ -9,10 +9,12 @@ export interface VisitorResponse {
   visitor_name: string;
   visitor_affiliation?: string;
   visit_ref?: string;
+  session_token?: string;
 }
 
 export interface SessionInfo {
   sessionId: string;
+  sessionToken?: string;
   visitorName: string;
   visitorAffiliation?: string;
   visitRef?: string;
@@ -20,6 +22,7 @@ export interface SessionInfo {
 
 export interface ChatRequestPayload {
   sessionId: string;
+  sessionToken?: string;
   question: string;
 }
 
@@ -51,6 +54,8 @@ export interface DashboardStats {
   daily_visits: StatPoint[];
   latest_visitors: VisitorRecord[];
   recent_questions: ConversationRecord[];
+  partial?: boolean;
+  missing_sources?: string[];
 }
 
 export interface VisitorRecord {
@@ -64,11 +69,16 @@ export interface VisitorRecord {
 
 export interface ConversationRecord {
   id: string;
-  session_id: string;
-  question: string;
+  session_id?: string;
+  question?: string;
   answer?: string;
   category?: string;
   is_blocked?: boolean;
   timestamp?: string;
 }
 
+export interface ConversationPage {
+  items: ConversationRecord[];
+  next_cursor?: string | null;
+}
+